@@ -0,0 +1,316 @@
+"""
+Streaming alarm pipeline.
+
+Raw raise/clear events flow through generator stages:
+
+    ingest -> dedup -> chatter suppression -> flood limiting -> ActiveAlarms
+
+Every stage keeps only bounded state, so an alarm storm cannot grow
+memory. ActiveAlarms is a fixed-capacity ring of alarms keyed by
+(source, message) with acknowledge/clear state, and it records each
+change in a bounded change log. Readers ask for changes_since(seq) to
+get incremental deltas instead of re-listing every alarm.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+SEVERITY_RANK = {"Critical": 0, "Major": 1, "Minor": 2, "Info": 3}
+
+DEDUP_WINDOW_S = 30.0
+CHATTER_WINDOW_S = 60.0
+CHATTER_MAX_TRANSITIONS = 6
+FLOOD_WINDOW_S = 10.0
+FLOOD_MAX_EVENTS = 200
+MAX_ACTIVE = 1000
+MAX_CHANGES = 5000
+MAX_TRACKED_KEYS = 10000
+
+
+def _key(event: dict) -> tuple:
+    return (event["source"], event["message"])
+
+
+def _prune(tracker: OrderedDict, limit: int):
+    while len(tracker) > limit:
+        tracker.popitem(last=False)
+
+
+class ActiveAlarms:
+    """Bounded set of current alarms plus a change log for deltas."""
+
+    def __init__(self, capacity: int = MAX_ACTIVE, max_changes: int = MAX_CHANGES):
+        self.capacity = capacity
+        self._alarms = OrderedDict()  # key -> alarm dict, oldest first
+        self._by_id = {}  # id -> key
+        self._changes = deque(maxlen=max_changes)  # (seq, op, alarm)
+        self._seq = 0
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------
+    # mutations (called by the pipeline / UI)
+    # -------------------------------------------------------------
+    def _log(self, op: str, alarm: dict):
+        self._seq += 1
+        self._changes.append((self._seq, op, dict(alarm)))
+
+    def _evict(self):
+        # prefer dropping alarms that are already cleared and acknowledged
+        for key, alarm in self._alarms.items():
+            if alarm["cleared"] and alarm["acked"]:
+                break
+        else:
+            key = next(iter(self._alarms))
+        alarm = self._alarms.pop(key)
+        del self._by_id[alarm["id"]]
+        self._log("evict", alarm)
+
+    def raise_(self, event: dict):
+        with self._lock:
+            key = _key(event)
+            alarm = self._alarms.get(key)
+            if alarm is None:
+                if len(self._alarms) >= self.capacity:
+                    self._evict()
+                self._next_id += 1
+                alarm = {
+                    "id": self._next_id,
+                    "first_ts": event["ts"],
+                    "ts": event["ts"],
+                    "severity": event["severity"],
+                    "system": event["system"],
+                    "source": event["source"],
+                    "message": event["message"],
+                    "count": 1,
+                    "acked": False,
+                    "cleared": False,
+                    "chattering": False,
+                }
+                self._alarms[key] = alarm
+                self._by_id[alarm["id"]] = key
+                self._log("raise", alarm)
+            else:
+                alarm["ts"] = event["ts"]
+                alarm["count"] += 1
+                if alarm["cleared"]:
+                    alarm["cleared"] = False
+                    alarm["acked"] = False
+                self._alarms.move_to_end(key)
+                self._log("update", alarm)
+
+    def bump(self, event: dict):
+        """Count a duplicate without emitting a delta."""
+        with self._lock:
+            alarm = self._alarms.get(_key(event))
+            if alarm is not None:
+                alarm["count"] += 1
+                alarm["ts"] = event["ts"]
+
+    def clear(self, event: dict):
+        with self._lock:
+            alarm = self._alarms.get(_key(event))
+            if alarm is not None and not alarm["cleared"]:
+                alarm["cleared"] = True
+                alarm["ts"] = event["ts"]
+                self._log("clear", alarm)
+
+    def mark_chattering(self, event: dict, chattering: bool):
+        with self._lock:
+            alarm = self._alarms.get(_key(event))
+            if alarm is not None and alarm["chattering"] != chattering:
+                alarm["chattering"] = chattering
+                self._log("update", alarm)
+
+    def acknowledge(self, alarm_id: int) -> bool:
+        with self._lock:
+            key = self._by_id.get(alarm_id)
+            if key is None:
+                return False
+            alarm = self._alarms[key]
+            if not alarm["acked"]:
+                alarm["acked"] = True
+                self._log("ack", alarm)
+            return True
+
+    def is_active(self, event: dict) -> bool:
+        alarm = self._alarms.get(_key(event))
+        return alarm is not None and not alarm["cleared"]
+
+    # -------------------------------------------------------------
+    # readers
+    # -------------------------------------------------------------
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def snapshot(self) -> tuple:
+        """(seq, list of alarms) for a full resync."""
+        with self._lock:
+            return self._seq, [dict(a) for a in self._alarms.values()]
+
+    def changes_since(self, seq: int):
+        """
+        Return (new_seq, deltas) where deltas is a list of (op, alarm),
+        or (new_seq, None) when seq is too old and the caller must resync.
+        """
+        with self._lock:
+            if seq == self._seq:
+                return seq, []
+            if seq > self._seq or not self._changes or self._changes[0][0] > seq + 1:
+                return self._seq, None
+            deltas = [(op, dict(a)) for s, op, a in self._changes if s > seq]
+            return self._seq, deltas
+
+
+class AlarmPipeline:
+    """Generator-based ingest stages feeding an ActiveAlarms ring."""
+
+    def __init__(self, active: ActiveAlarms = None, history=None):
+        self.active = active or ActiveAlarms()
+        self.history = history  # optional AlarmStore receiving admitted events
+        self.detector = None  # AlarmDetector feeding this pipeline, if any
+        self.stats = {
+            "ingested": 0,
+            "deduplicated": 0,
+            "chatter_suppressed": 0,
+            "flood_suppressed": 0,
+        }
+        self._last_seen = OrderedDict()  # key -> last raise ts (dedup)
+        self._transitions = OrderedDict()  # key -> deque of transition ts
+        self._flood = deque()  # ts of recently admitted events
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------
+    # stages
+    # -------------------------------------------------------------
+    def _count(self, events):
+        for ev in events:
+            self.stats["ingested"] += 1
+            yield ev
+
+    def _dedup(self, events):
+        """Drop repeated raises of an already-active alarm within the window."""
+        for ev in events:
+            key = _key(ev)
+            if ev["state"] == "raise":
+                last = self._last_seen.get(key)
+                self._last_seen[key] = ev["ts"]
+                self._last_seen.move_to_end(key)
+                _prune(self._last_seen, MAX_TRACKED_KEYS)
+                if (
+                    last is not None
+                    and ev["ts"] - last < DEDUP_WINDOW_S
+                    and self.active.is_active(ev)
+                ):
+                    self.stats["deduplicated"] += 1
+                    self.active.bump(ev)
+                    continue
+            elif not self.active.is_active(ev):
+                # clearing something that is not active is a no-op
+                continue
+            yield ev
+
+    def _chatter(self, events):
+        """Hold back alarms that flip state too often within the window."""
+        for ev in events:
+            key = _key(ev)
+            hist = self._transitions.get(key)
+            if hist is None:
+                hist = self._transitions[key] = deque(
+                    maxlen=CHATTER_MAX_TRANSITIONS + 1
+                )
+            self._transitions.move_to_end(key)
+            _prune(self._transitions, MAX_TRACKED_KEYS)
+
+            hist.append(ev["ts"])
+            while hist and ev["ts"] - hist[0] > CHATTER_WINDOW_S:
+                hist.popleft()
+            if len(hist) > CHATTER_MAX_TRANSITIONS:
+                self.stats["chatter_suppressed"] += 1
+                # keep a chattering alarm visible as active, but stop flapping
+                if ev["state"] == "raise" and not self.active.is_active(ev):
+                    yield ev
+                self.active.mark_chattering(ev, True)
+                continue
+            if len(hist) <= 1:
+                self.active.mark_chattering(ev, False)
+            yield ev
+
+    def _flood_limit(self, events):
+        """During a flood, pass Critical/Major and drop Minor/Info."""
+        for ev in events:
+            now = ev["ts"]
+            while self._flood and now - self._flood[0] > FLOOD_WINDOW_S:
+                self._flood.popleft()
+            flooding = len(self._flood) >= FLOOD_MAX_EVENTS
+            if flooding and SEVERITY_RANK.get(ev["severity"], 3) > 1:
+                self.stats["flood_suppressed"] += 1
+                continue
+            if not flooding:
+                self._flood.append(now)
+            yield ev
+
+    # -------------------------------------------------------------
+    # driving
+    # -------------------------------------------------------------
+    def ingest(self, events) -> int:
+        """Run an iterable of raw events through the stages; return admitted count."""
+        admitted = 0
+        with self._lock:
+            stream = self._flood_limit(self._chatter(self._dedup(self._count(events))))
+            for ev in stream:
+                if ev["state"] == "raise":
+                    self.active.raise_(ev)
+                else:
+                    self.active.clear(ev)
+                if self.history is not None:
+                    self.history.append(ev)
+                admitted += 1
+        return admitted
+
+    def acknowledge(self, alarm_id: int) -> bool:
+        return self.active.acknowledge(alarm_id)
+
+    def changes_since(self, seq: int):
+        return self.active.changes_since(seq)
+
+    def snapshot(self):
+        return self.active.snapshot()
+
+
+def format_ts(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline() -> AlarmPipeline:
+    """
+    Process-wide pipeline. Alarms are detected from the readings of every
+    scheduler tick (alarm_detector), so pages only read deltas.
+    """
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            from alarm_store import get_alarm_store
+            from alarm_detector import AlarmDetector
+            from scheduler import get_scheduler
+
+            _pipeline = AlarmPipeline(history=get_alarm_store())
+            detector = AlarmDetector()
+            pipeline = _pipeline
+
+            def on_tick(readings, batch):
+                events = detector.update(
+                    readings.device_class, readings.names, batch, readings.ts
+                )
+                if events:
+                    pipeline.ingest(events)
+
+            pipeline.detector = detector
+            get_scheduler().add_listener(on_tick)
+        return _pipeline
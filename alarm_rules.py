@@ -0,0 +1,315 @@
+"""
+Declarative alarm explanation rules and their compiled matcher.
+
+Each rule lists the systems it applies to ("systems", None for every
+system), keyword conjunctions ("any_of" is a list of "all of these
+substrings" groups) and the explanation text. All keywords applicable to
+a system are compiled into one regex that reports every keyword occurring
+in the message in a single scan, and rules are then checked in table
+order against that keyword set. Results are cached per
+(system, message template), where the template is the lowercased message
+with digit runs masked, so "CH-5" and "CH-12" alarms share one entry;
+a small front cache short-circuits exact repeats during alarm floods.
+"""
+
+import re
+import time
+from functools import lru_cache
+
+RULES = [
+    # ------- Chiller related -------
+    {
+        "id": "chw_high_return",
+        "systems": ["Chiller"],
+        "any_of": [["high chilled water return"], ["high chilled water"]],
+        "root_cause": (
+            "Load on the chilled water loop is high or one of the coils/CRACs "
+            "is not rejecting heat effectively. Return water is coming back too hot."
+        ),
+        "action": (
+            "Check IT load in corresponding zone, verify CH pump status and valve positions, "
+            "inspect CRAC/CRAH coil cleanliness and confirm {source} is running at required capacity."
+        ),
+    },
+    {
+        "id": "low_delta_t",
+        "systems": ["Chiller"],
+        "any_of": [["low delta-t"]],
+        "root_cause": (
+            "Chiller is not getting enough heat transfer. Either flow is too high "
+            "or coils are bypassing, causing poor temperature drop across evaporator."
+        ),
+        "action": (
+            "Check chilled water balancing valves, verify 2-way/3-way valve positions, "
+            "and optimize chiller flow setpoints. Investigate bypass lines kept open."
+        ),
+    },
+    # ------- UPS related -------
+    {
+        "id": "ups_on_battery",
+        "systems": ["UPS"],
+        "any_of": [["ups", "battery"]],
+        "root_cause": (
+            "Utility supply to this UPS is lost or unstable, causing it to run from battery."
+        ),
+        "action": (
+            "Check upstream panel feed to {source}, confirm breaker status, "
+            "and verify remaining battery backup time. Prepare for controlled IT load shutdown "
+            "if mains power is not restored."
+        ),
+    },
+    {
+        "id": "ups_high_load",
+        "systems": ["UPS"],
+        "any_of": [["ups", "high load"]],
+        "root_cause": (
+            "IT load on this UPS is close to its rating, often because a redundant "
+            "UPS or feeder is out and its load has moved here."
+        ),
+        "action": (
+            "Check the status of the partner UPS and upstream feeders of {source}, "
+            "confirm redundancy is intact, and move or shed non-critical IT load "
+            "before the UPS reaches overload."
+        ),
+    },
+    # ------- Transformer related -------
+    {
+        "id": "transformer_overload",
+        "systems": ["Power"],
+        "any_of": [["overload", "transformer"]],
+        "root_cause": (
+            "Total downstream load has exceeded transformer's rated capacity."
+        ),
+        "action": (
+            "Review active IT and mechanical loads fed by {source}, "
+            "shed non-critical load, and redistribute feeders if redundancy is available."
+        ),
+    },
+    # ------- Genset related -------
+    {
+        "id": "genset_low_fuel",
+        "systems": ["Genset", "Power"],
+        "any_of": [["low fuel", "genset"]],
+        "root_cause": "Fuel level in genset day tank or main tank is below configured threshold.",
+        "action": (
+            "Schedule refilling for {source} immediately. If genset is expected to auto-start "
+            "on power failure, ensure fuel is replenished before any planned maintenance "
+            "or grid instability."
+        ),
+    },
+    # ------- Environment / HVAC -------
+    {
+        "id": "room_high_temp",
+        "systems": ["Environment"],
+        "any_of": [["high server room temperature"]],
+        "root_cause": (
+            "Cooling capacity in the affected hall is insufficient or airflow distribution is poor."
+        ),
+        "action": (
+            "Check running status of CRAC/CRAH/PAHU units in that hall, verify setpoints and "
+            "fan speeds, and inspect hot/cold aisle containment. Confirm no blocked floor tiles."
+        ),
+    },
+    {
+        "id": "filter_dp_high",
+        "systems": ["Environment"],
+        "any_of": [["filter differential pressure high"], ["filter choking"]],
+        "root_cause": (
+            "Air filter across the unit is clogged, reducing airflow and increasing fan energy."
+        ),
+        "action": (
+            "Inspect and clean or replace filters on {source}. After replacement, "
+            "reset the DP alarm and trend airflow/temperature for stability."
+        ),
+    },
+    # ------- Standby / Info -------
+    {
+        "id": "chiller_standby",
+        "systems": ["Chiller"],
+        "any_of": [["standby mode"]],
+        "root_cause": (
+            "Chiller has been taken to standby as part of load sharing or rotation policy."
+        ),
+        "action": (
+            "Verify that N+1 redundancy is intact after {source} moved to standby. "
+            "No immediate action required unless plant capacity margin is low."
+        ),
+    },
+]
+
+FALLBACK = {
+    "id": "generic",
+    "root_cause": (
+        "No specific rule matched. This appears to be a generic BMS event or OEM-specific alarm."
+    ),
+    "action": (
+        "Check detailed alarm description in BMS/DCIM, consult OEM manual for this alarm code, "
+        "and follow site SOP for triage and escalation."
+    ),
+}
+
+_DIGITS = re.compile(r"\d+")
+
+
+class _CompiledRules:
+    """Keyword scanner + ordered rule list for one system."""
+
+    def __init__(self, rules: list):
+        self.rules = rules
+        keywords = sorted(
+            {k for r in rules for group in r["any_of"] for k in group},
+            key=len,
+            reverse=True,
+        )
+        # every keyword also implies the shorter keywords it contains
+        self.implied = {k: {s for s in keywords if s in k} for k in keywords}
+        # a lookahead at each position reports overlapping matches too
+        alternation = "|".join(re.escape(k) for k in keywords)
+        self.scanner = re.compile("(?=({}))".format(alternation)) if keywords else None
+        self.groups = [[frozenset(g) for g in r["any_of"]] for r in rules]
+
+    def match(self, text: str):
+        if self.scanner is None:
+            return None
+        found = set()
+        for m in self.scanner.finditer(text):
+            found |= self.implied[m.group(1)]
+        if not found:
+            return None
+        for rule, groups in zip(self.rules, self.groups):
+            for group in groups:
+                if group <= found:
+                    return rule
+        return None
+
+
+_by_system = {}
+
+
+def _compiled_for(system: str) -> _CompiledRules:
+    compiled = _by_system.get(system)
+    if compiled is None:
+        rules = [r for r in RULES if r["systems"] is None or system in r["systems"]]
+        compiled = _by_system[system] = _CompiledRules(rules)
+    return compiled
+
+
+def message_template(message: str) -> str:
+    """Lowercased message with digit runs masked."""
+    return _DIGITS.sub("#", message.lower())
+
+
+@lru_cache(maxsize=4096)
+def classify(system: str, template: str) -> dict:
+    """Rule (or FALLBACK) for a (system, message template) pair."""
+    return _compiled_for(system).match(template) or FALLBACK
+
+
+@lru_cache(maxsize=16384)
+def _explain_exact(system: str, message: str, source: str) -> tuple:
+    """Front cache for repeated identical alarms (the flood case)."""
+    rule = classify(system, message_template(message))
+    return rule["root_cause"], rule["action"].format(source=source)
+
+
+def explain(alarm: dict) -> dict:
+    root_cause, action = _explain_exact(
+        alarm["system"], alarm["message"], alarm["source"]
+    )
+    return {"root_cause": root_cause, "action": action}
+
+
+def reload_rules():
+    """Drop compiled matchers and cached results after editing RULES."""
+    _by_system.clear()
+    classify.cache_clear()
+    _explain_exact.cache_clear()
+
+
+# -------------------------------------------------------------
+# Benchmark: python alarm_rules.py
+# -------------------------------------------------------------
+def _legacy_rule_id(alarm: dict) -> str:
+    """The former explain_alarm if-chain, kept as a reference."""
+    msg = alarm["message"].lower()
+    if "high chilled water return" in msg or "high chilled water" in msg:
+        return "chw_high_return"
+    if "low delta-t" in msg:
+        return "low_delta_t"
+    if "ups" in msg and "battery" in msg:
+        return "ups_on_battery"
+    if "ups" in msg and "high load" in msg:
+        return "ups_high_load"
+    if "overload" in msg and "transformer" in msg:
+        return "transformer_overload"
+    if "low fuel" in msg and "genset" in msg:
+        return "genset_low_fuel"
+    if "high server room temperature" in msg:
+        return "room_high_temp"
+    if "filter differential pressure high" in msg or "filter choking" in msg:
+        return "filter_dp_high"
+    if "standby mode" in msg:
+        return "chiller_standby"
+    return "generic"
+
+
+def _legacy_explain(alarm: dict) -> dict:
+    rule = _RULES_BY_ID.get(_legacy_rule_id(alarm), FALLBACK)
+    return {
+        "root_cause": rule["root_cause"],
+        "action": rule["action"].format(source=alarm["source"]),
+    }
+
+
+_RULES_BY_ID = {r["id"]: r for r in RULES}
+
+
+def _bench(n: int = 100_000):
+    import random
+
+    from alarms_agent import get_simulated_alarms
+
+    base = get_simulated_alarms()
+    base.append(
+        {"system": "Power", "source": "PDU-7", "message": "PDU-7 breaker trip."}
+    )
+    base.append(
+        {
+            "system": "UPS",
+            "source": "UPS2",
+            "message": "UPS2 high load – output above 80% rated.",
+        }
+    )
+    alarms = []
+    for i in range(n):
+        a = dict(random.choice(base))
+        num = str(random.randint(1, 400))
+        a["message"] = _DIGITS.sub(num, a["message"])
+        a["source"] = _DIGITS.sub(num, a["source"])
+        alarms.append(a)
+
+    for a in base + alarms[:2000]:
+        assert classify(a["system"], message_template(a["message"]))["id"] == (
+            _legacy_rule_id(a)
+        ), a
+    covered = {_legacy_rule_id(a) for a in base}
+    assert covered >= set(_RULES_BY_ID), set(_RULES_BY_ID) - covered
+
+    t0 = time.perf_counter()
+    for a in alarms:
+        _legacy_explain(a)
+    legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for a in alarms:
+        explain(a)
+    compiled = time.perf_counter() - t0
+
+    print(f"{n} alarms")
+    print(f"  legacy if-chain explain     : {n / legacy:12,.0f} alarms/s")
+    print(f"  compiled + cached explain   : {n / compiled:12,.0f} alarms/s")
+    print(f"  cache: {classify.cache_info()}")
+
+
+if __name__ == "__main__":
+    _bench()
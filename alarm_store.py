@@ -0,0 +1,193 @@
+"""
+Indexed alarm history.
+
+Records are appended in arrival (time) order and addressed by a
+monotonically increasing id. Secondary indexes map system, severity and
+source to ascending id lists, as does a combined (system, severity)
+index, and a parallel timestamp array serves time-range lookups by
+bisection. Facet counters are kept incrementally.
+
+query() walks the most selective posting list newest-first from a
+cursor and stops after one page. With system and/or severity filters
+every entry of that list matches, so the cost depends on the page size,
+not on how much history has accumulated. A source filter combined with
+them is checked per record, so a rare combination can cost up to the
+length of the shorter list.
+"""
+
+import bisect
+import threading
+from array import array
+from collections import Counter
+
+INDEXED_FIELDS = ("system", "severity", "source")
+MAX_RECORDS = 500_000
+
+
+class AlarmStore:
+    def __init__(self, max_records: int = MAX_RECORDS):
+        self.max_records = max_records
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._base = 0  # id of self._records[0]
+        self._records = []
+        self._ts = array("d")
+        self._index = {f: {} for f in INDEXED_FIELDS}
+        self._facets = {f: Counter() for f in INDEXED_FIELDS}
+        self._pairs = Counter()  # (system, severity) -> count
+        self._pair_ids = {}  # (system, severity) -> ascending ids
+
+    # -------------------------------------------------------------
+    # writes
+    # -------------------------------------------------------------
+    def append(self, event: dict) -> int:
+        """Store one alarm event (raise or clear); returns its id."""
+        rec = {
+            "ts": float(event["ts"]),
+            "state": event.get("state", "raise"),
+            "severity": event["severity"],
+            "system": event["system"],
+            "source": event["source"],
+            "message": event["message"],
+        }
+        with self._lock:
+            if self._ts and rec["ts"] < self._ts[-1]:
+                rec["ts"] = self._ts[-1]  # keep the time index sorted
+            rid = self._base + len(self._records)
+            rec["id"] = rid
+            self._records.append(rec)
+            self._ts.append(rec["ts"])
+            for f in INDEXED_FIELDS:
+                self._index[f].setdefault(rec[f], []).append(rid)
+                self._facets[f][rec[f]] += 1
+            pair = (rec["system"], rec["severity"])
+            self._pairs[pair] += 1
+            self._pair_ids.setdefault(pair, []).append(rid)
+            if len(self._records) > self.max_records:
+                self._compact()
+            return rid
+
+    def _compact(self):
+        """Drop the oldest half of the history and rebuild the indexes."""
+        keep = self._records[len(self._records) // 2 :]
+        self._reset()
+        self._base = keep[0]["id"]
+        for rec in keep:
+            self._records.append(rec)
+            self._ts.append(rec["ts"])
+            for f in INDEXED_FIELDS:
+                self._index[f].setdefault(rec[f], []).append(rec["id"])
+                self._facets[f][rec[f]] += 1
+            pair = (rec["system"], rec["severity"])
+            self._pairs[pair] += 1
+            self._pair_ids.setdefault(pair, []).append(rec["id"])
+
+    # -------------------------------------------------------------
+    # reads
+    # -------------------------------------------------------------
+    def __len__(self):
+        return len(self._records)
+
+    def facets(self, system: str = None) -> dict:
+        """Counts per system / severity / source; severities scoped to a system."""
+        with self._lock:
+            if system is None:
+                severity = dict(self._facets["severity"])
+            else:
+                severity = {
+                    sev: n for (sys_, sev), n in self._pairs.items() if sys_ == system
+                }
+            return {
+                "system": dict(self._facets["system"]),
+                "severity": severity,
+                "source": dict(self._facets["source"]),
+            }
+
+    def count(self, system: str = None, severity: str = None):
+        """Exact match count for system/severity filters (None = any)."""
+        with self._lock:
+            if system is None and severity is None:
+                return len(self._records)
+            if system is None:
+                return self._facets["severity"].get(severity, 0)
+            if severity is None:
+                return self._facets["system"].get(system, 0)
+            return self._pairs.get((system, severity), 0)
+
+    def query(
+        self,
+        system: str = None,
+        severity: str = None,
+        source: str = None,
+        t0: float = None,
+        t1: float = None,
+        limit: int = 20,
+        cursor: int = None,
+    ) -> dict:
+        """
+        Newest-first page of records matching every given filter.
+
+        cursor is the "next_cursor" of the previous page (exclusive upper
+        bound on id). Returns {"items", "next_cursor", "total"}; total is
+        exact when only system/severity filters are used, else None.
+        """
+        filters = {"system": system, "severity": severity, "source": source}
+        active = {f: v for f, v in filters.items() if v is not None}
+
+        with self._lock:
+            # upper id bound from cursor and t1
+            hi = self._base + len(self._records)
+            if cursor is not None:
+                hi = min(hi, cursor)
+            if t1 is not None:
+                hi = min(hi, self._base + bisect.bisect_left(self._ts, t1))
+            lo = self._base
+            if t0 is not None:
+                lo = self._base + bisect.bisect_left(self._ts, t0)
+
+            # walk the shortest posting list (or the id range itself)
+            lists = [(self._index[f].get(v, []), (f,)) for f, v in active.items()]
+            if system is not None and severity is not None:
+                ids = self._pair_ids.get((system, severity), [])
+                lists.append((ids, ("system", "severity")))
+            postings = None
+            for ids, fields in lists:
+                if postings is None or len(ids) < len(postings):
+                    postings, covered = ids, fields
+            if postings is None:
+                candidates = range(hi - 1, lo - 1, -1)
+            else:
+                stop = bisect.bisect_left(postings, hi)
+                start = bisect.bisect_left(postings, lo)
+                candidates = (postings[i] for i in range(stop - 1, start - 1, -1))
+                for f in covered:
+                    active.pop(f)
+
+            items = []
+            next_cursor = None
+            for rid in candidates:
+                rec = self._records[rid - self._base]
+                if all(rec[f] == v for f, v in active.items()):
+                    if len(items) == limit:
+                        next_cursor = items[-1]["id"]
+                        break
+                    items.append(dict(rec))
+
+            total = None
+            if source is None and t0 is None and t1 is None:
+                total = self.count(system, severity)
+            return {"items": items, "next_cursor": next_cursor, "total": total}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_alarm_store() -> AlarmStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AlarmStore()
+        return _store
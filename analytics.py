@@ -0,0 +1,284 @@
+"""
+Energy and PUE analytics over the live telemetry stream.
+
+The scheduler hands every tick's readings to EnergyAnalytics.update().
+Each device class contributes to a small vector of plant totals:
+
+    facility_kw      transformers + gensets (everything the site draws)
+    it_kw            UPS output
+    chiller_kw       chiller electrical power
+    pahu_kw          PAHU electrical power
+    cooling_load_kw  chiller evaporator duty, flow x cp x (inlet - supply)
+
+The vector is held between ticks and integrated over time. Integration
+uses running sums: kW x seconds over the process lifetime, plus one
+bucketed ring per window:
+
+    1h   60 x 1 min buckets
+    24h  96 x 15 min buckets
+    30d  120 x 6 h buckets
+
+Each bucket keeps energy, covered seconds and peak kW per metric. An
+update touches one bucket and the window's running total, so memory per
+metric is fixed and a window query does not revisit raw samples. Ratios
+over a window are taken from its energies, e.g. PUE = facility kWh / IT
+kWh, not from the mean of instantaneous ratios.
+
+Windows start filling when the process starts; they are not rebuilt from
+the telemetry store.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from plant_model import CP_WATER
+
+METRICS = ("facility_kw", "it_kw", "chiller_kw", "pahu_kw", "cooling_load_kw")
+_M = {name: i for i, name in enumerate(METRICS)}
+
+# window name -> (span seconds, buckets)
+WINDOWS = {
+    "1h": (3600, 60),
+    "24h": (86400, 96),
+    "30d": (30 * 86400, 120),
+}
+MAX_GAP_S = 60.0  # a longer silence is skipped, not integrated as if values held
+KW_PER_TR = 3.517  # 1 ton of refrigeration
+
+# which classes carry which totals ("power" in kW)
+_CLASS_METRIC = {
+    "transformers": "facility_kw",
+    "genset": "facility_kw",
+    "ups": "it_kw",
+    "chillers": "chiller_kw",
+    "pahu": "pahu_kw",
+}
+
+
+def class_totals(device_class: str, batch: dict) -> np.ndarray:
+    """Contribution of one device-class readings batch to the metric vector."""
+    out = np.zeros(len(METRICS))
+    metric = _CLASS_METRIC.get(device_class)
+    if metric is None or "power" not in batch:
+        return out
+    out[_M[metric]] = np.nansum(batch["power"])
+    if device_class == "chillers" and {"flow", "inlet", "supply"} <= batch.keys():
+        # m3/h -> kg/s is / 3.6; kW = kg/s x kJ/kg.K x K
+        delta_t = np.clip(np.asarray(batch["inlet"]) - batch["supply"], 0.0, None)
+        out[_M["cooling_load_kw"]] = np.nansum(
+            np.asarray(batch["flow"]) / 3.6 * CP_WATER * delta_t
+        )
+    return out
+
+
+def plant_ratios(kw: np.ndarray) -> dict:
+    """Derived figures from a metric vector (kW, or kWh over a window)."""
+    facility, it, chiller, pahu, load = (float(v) for v in kw)
+    tons = load / KW_PER_TR
+    return {
+        "cooling_kw": chiller + pahu,
+        "cooling_tr": tons,
+        "pue": facility / it if it > 0 else None,
+        "kw_per_tr": chiller / tons if tons > 0 else None,
+        "cop": load / chiller if chiller > 0 else None,
+    }
+
+
+class BucketWindow:
+    """Sliding window of span seconds held as n fixed buckets per metric."""
+
+    __slots__ = (
+        "span", "width", "n", "slot", "energy", "seconds", "peak", "total", "total_s"
+    )
+
+    def __init__(self, span: float, n_buckets: int, n_metrics: int):
+        self.span = span
+        self.width = span / n_buckets
+        self.n = n_buckets
+        self.slot = np.full(n_buckets, -1, dtype=np.int64)  # bucket number held
+        self.energy = np.zeros((n_buckets, n_metrics))  # kW x s
+        self.seconds = np.zeros(n_buckets)
+        self.peak = np.zeros((n_buckets, n_metrics))
+        self.total = np.zeros(n_metrics)
+        self.total_s = 0.0
+
+    def _reset(self, i):
+        self.total -= np.atleast_2d(self.energy[i]).sum(axis=0)
+        self.total_s -= float(np.sum(self.seconds[i]))
+        self.energy[i] = 0.0
+        self.seconds[i] = 0.0
+        self.peak[i] = 0.0
+
+    def add(self, ts: float, kw: np.ndarray, dt: float):
+        b = int(ts // self.width)
+        i = b % self.n
+        if self.slot[i] != b:
+            # the slot still holds a bucket from one lap ago
+            self._reset(i)
+            self.slot[i] = b
+        self.energy[i] += kw * dt
+        self.seconds[i] += dt
+        np.maximum(self.peak[i], kw, out=self.peak[i])
+        self.total += kw * dt
+        self.total_s += dt
+
+    def expire(self, now: float):
+        """Drop buckets that fell out of the window without being reused."""
+        stale = (self.slot >= 0) & (self.slot <= int(now // self.width) - self.n)
+        if stale.any():
+            idx = np.flatnonzero(stale)
+            self._reset(idx)
+            self.slot[idx] = -1
+
+    def live_peak(self) -> np.ndarray:
+        live = self.slot >= 0
+        return self.peak[live].max(axis=0) if live.any() else np.zeros(self.peak.shape[1])
+
+
+class EnergyAnalytics:
+    """Instantaneous and windowed plant energy figures, updated per tick."""
+
+    def __init__(self, windows: dict = None, max_gap_s: float = MAX_GAP_S):
+        self.max_gap_s = max_gap_s
+        self.windows = {
+            name: BucketWindow(span, n, len(METRICS))
+            for name, (span, n) in (windows or WINDOWS).items()
+        }
+        self.lifetime = np.zeros(len(METRICS))
+        self.lifetime_s = 0.0
+        self._by_class = {}
+        self._kw = np.zeros(len(METRICS))
+        self._last_ts = None
+        self._lock = threading.Lock()
+
+    def _integrate(self, ts: float):
+        if self._last_ts is not None:
+            dt = ts - self._last_ts
+            if 0 < dt <= self.max_gap_s:
+                for window in self.windows.values():
+                    window.add(ts, self._kw, dt)
+                self.lifetime += self._kw * dt
+                self.lifetime_s += dt
+        if self._last_ts is None or ts > self._last_ts:
+            self._last_ts = ts
+
+    def update(self, device_class: str, batch: dict, ts: float = None):
+        """Scheduler listener: fold one device-class tick into the totals."""
+        if device_class not in _CLASS_METRIC:
+            return
+        totals = class_totals(device_class, batch)
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            # the previous totals held until now
+            self._integrate(ts)
+            self._by_class[device_class] = totals
+            self._kw = np.sum(list(self._by_class.values()), axis=0)
+
+    # -------------------------------------------------------------
+    # readers
+    # -------------------------------------------------------------
+    def current(self) -> dict:
+        """Latest instantaneous figures (kW, TR, ratios)."""
+        with self._lock:
+            kw = self._kw.copy()
+        out = {name: float(v) for name, v in zip(METRICS, kw)}
+        out.update(plant_ratios(kw))
+        return out
+
+    def window(self, name: str, now: float = None) -> dict:
+        """
+        Aggregates over one window: mean and peak kW, kWh per metric, and
+        ratios from the window's energies. covered_s is how much of the
+        window has data.
+        """
+        w = self.windows[name]
+        now = time.time() if now is None else now
+        with self._lock:
+            w.expire(now)
+            energy = w.total.copy()
+            seconds = w.total_s
+            peak = w.live_peak()
+        out = {"window": name, "covered_s": seconds}
+        for metric, e, p in zip(METRICS, energy, peak):
+            base = metric[:-3]  # "facility_kw" -> "facility"
+            out[metric] = float(e / seconds) if seconds > 0 else 0.0
+            out[base + "_kwh"] = float(e / 3600.0)
+            out["peak_" + metric] = float(p)
+        out.update(plant_ratios(energy))
+        del out["cooling_kw"], out["cooling_tr"]
+        out["cooling_kwh"] = out["chiller_kwh"] + out["pahu_kwh"]
+        return out
+
+    def summary(self, now: float = None) -> dict:
+        return {name: self.window(name, now) for name in self.windows}
+
+    def lifetime_kwh(self) -> dict:
+        with self._lock:
+            return {m[:-3] + "_kwh": float(v / 3600.0) for m, v in zip(METRICS, self.lifetime)}
+
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+
+def get_analytics() -> EnergyAnalytics:
+    """Process-wide analytics, fed by the background scheduler."""
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            from scheduler import get_scheduler
+
+            _analytics = EnergyAnalytics()
+            get_scheduler().add_listener(
+                lambda readings, batch: _analytics.update(
+                    readings.device_class, batch, readings.ts
+                )
+            )
+        return _analytics
+
+
+# -------------------------------------------------------------
+# Benchmark: python analytics.py
+# -------------------------------------------------------------
+def _bench(days: int = 30, dt: float = 1.0):
+    rng = np.random.default_rng(0)
+    classes = list(_CLASS_METRIC)
+    n = int(days * 86400 / dt / 50)  # one update per class per step, sampled
+    batches = {
+        "transformers": {"power": rng.uniform(500, 700, 6)},
+        "genset": {"power": np.zeros(4)},
+        "ups": {"power": rng.uniform(380, 440, 6)},
+        "chillers": {
+            "power": rng.uniform(150, 250, 30),
+            "flow": np.full(30, 230.0),
+            "inlet": np.full(30, 13.0),
+            "supply": np.full(30, 7.0),
+        },
+        "pahu": {"power": rng.uniform(4, 8, 4)},
+    }
+    engine = EnergyAnalytics()
+    t = time.time() - days * 86400
+    t0 = time.perf_counter()
+    for step in range(n):
+        for c in classes:
+            engine.update(c, batches[c], t + step * dt * 50)
+    elapsed = time.perf_counter() - t0
+    updates = n * len(classes)
+
+    now = t + n * dt * 50
+    t0 = time.perf_counter()
+    for _ in range(1000):
+        engine.summary(now)
+    query = (time.perf_counter() - t0) / 1000
+
+    buckets = sum(w.n for w in engine.windows.values())
+    print(f"{updates:,} updates over {days} days: {elapsed / updates * 1e6:.1f} us/update")
+    print(f"  summary(1h/24h/30d): {query * 1e6:.0f} us, state {buckets} buckets")
+    for name, w in engine.summary(now).items():
+        print(f"  {name:>4}: PUE {w['pue']:.2f}  kW/TR {w['kw_per_tr']:.2f}  COP {w['cop']:.2f}")
+
+
+if __name__ == "__main__":
+    _bench()
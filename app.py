@@ -1,24 +1,31 @@
-import re
 import streamlit as st
 
-from chiller_manager import get_chiller_data, toggle_chiller, update_setpoint
+from chiller_manager import (
+    device_version as chiller_version,
+    get_chiller_data,
+    toggle_chiller,
+    update_setpoint,
+)
 from power_manager import (
+    device_version as power_version,
     get_power_data,
     toggle_transformer,
     toggle_ups,
     toggle_genset,
     toggle_pahu,
 )
-from simulator import (
-    simulate_chiller,
-    simulate_transformer,
-    simulate_ups,
-    simulate_genset,
-    simulate_pahu,
-)
-from voice_agent import transcribe_voice, tts_voice
-from utils import save_chillers, save_power
-from alarms_agent import get_simulated_alarms, explain_alarm
+from control import Batch, ControlError
+from voice_control import handle_command
+from voice_batch import process_recordings
+from scheduler import get_scheduler
+from table_renderer import CHILLER_COLUMNS, TABLE_CSS, render_matrix, render_rows
+import stt
+from voice_agent import transcribe_voice, tts_mime, tts_voice
+from alarms_agent import explain_alarm
+from alarm_pipeline import format_ts, get_pipeline
+from alarm_store import get_alarm_store
+from analytics import get_analytics
+from sequencer import get_sequencer
 
 
 # -------------------------------------------------------------
@@ -34,6 +41,9 @@ st.set_page_config(
 # -------------------------------------------------------------
 # Helper functions
 # -------------------------------------------------------------
+ALARM_PAGE_SIZE = 20
+
+
 def status_badge(status: str) -> str:
     """Small pill badge for text explanations."""
     color = "#16d916" if status == "ON" else "#ff4d4d"
@@ -45,14 +55,8 @@ def status_badge(status: str) -> str:
     )
 
 
-def status_cell(status: str) -> str:
-    """Coloured table cell like PAHU ON/OFF bar."""
-    color = "#16d916" if status == "ON" else "#ff4d4d"
-    return (
-        "<div style='background:{};color:white;text-align:center;"
-        "padding:4px 6px;font-size:11px;font-weight:bold;"
-        "border:1px solid #1f2937;'>{}</div>".format(color, status)
-    )
+def ratio(x, fmt: str = "{:.2f}") -> str:
+    return "-" if x is None else fmt.format(x)
 
 
 def val(d: dict, key: str, default: float = 0.0) -> float:
@@ -67,132 +71,103 @@ def val(d: dict, key: str, default: float = 0.0) -> float:
         return float(default)
 
 
+def alarm_card(al: dict, state: str) -> str:
+    """HTML card for one alarm with its rule-based explanation."""
+    explanation = explain_alarm(al)
+
+    sev = al["severity"]
+    if sev == "Critical":
+        sev_color = "#f97373"
+    elif sev == "Major":
+        sev_color = "#facc15"
+    elif sev == "Minor":
+        sev_color = "#4ade80"
+    else:
+        sev_color = "#60a5fa"
+
+    return """
+        <div style='background:#111827; padding:14px; border-radius:10px;
+                    border:1px solid #1f2937; margin-bottom:12px;'>
+            <div style='display:flex; justify-content:space-between; align-items:center;'>
+                <div>
+                    <span style='color:#9ca3af; font-size:12px;'>Time</span>
+                    <div style='color:#e5e7eb; font-size:13px;'>{timestamp}</div>
+                </div>
+                <div>
+                    <span style='color:#9ca3af; font-size:12px;'>Severity</span><br>
+                    <span style='color:{sev_color}; font-weight:bold;'>{severity}</span>
+                </div>
+                <div>
+                    <span style='color:#9ca3af; font-size:12px;'>System</span>
+                    <div style='color:#e5e7eb; font-size:13px;'>{system}</div>
+                </div>
+                <div>
+                    <span style='color:#9ca3af; font-size:12px;'>Source</span>
+                    <div style='color:#e5e7eb; font-size:13px;'>{source}</div>
+                </div>
+                <div>
+                    <span style='color:#9ca3af; font-size:12px;'>State</span>
+                    <div style='color:#e5e7eb; font-size:13px;'>{state}</div>
+                </div>
+            </div>
+            <hr style='border:1px solid #1f2937; margin-top:8px; margin-bottom:8px;'>
+            <div style='color:#e5e7eb; font-size:14px;'>
+                <b>Alarm:</b> {message}
+            </div>
+            <div style='margin-top:6px; color:#fbbf24; font-size:13px;'>
+                <b>Probable root cause:</b> {root}</div>
+            <div style='margin-top:4px; color:#93c5fd; font-size:13px;'>
+                <b>Recommended action:</b> {action}</div>
+        </div>
+        """.format(
+        timestamp=format_ts(al["ts"]),
+        state=state,
+        sev_color=sev_color,
+        severity=al["severity"],
+        system=al["system"],
+        source=al["source"],
+        message=al["message"],
+        root=explanation["root_cause"],
+        action=explanation["action"],
+    )
+
+
 def voice_agent_handle_command(text: str, chillers_data: dict, power_data: dict):
     """
-    Rule-based agent that understands simple natural language control:
+    Grammar-based agent for natural language control (see voice_commands):
       - 'turn on chiller 5'
       - 'set chiller 3 setpoint to 20'
-      - 'turn off transformer 2'
+      - 'turn off chillers 3 to 7'
       - 'start genset 3'
-      - 'switch off ups 1'
+      - 'switch off ups 1 and ups 2'
+    Every intent in one command is staged in a single Batch and persisted
+    together; a rejected intent (e.g. index out of range) rejects them all.
     Returns:
         reply_text, updated_chillers_data, updated_power_data
     """
-    t = text.lower()
-    reply = []
-
-    # ---------------- CHILLERS ----------------
-    if "chiller" in t:
-        m = re.search(r"chiller\s+(\d+)", t)
-        if m:
-            idx = int(m.group(1)) - 1
-            chillers = chillers_data["chillers"]
-            if 0 <= idx < len(chillers):
-                ch = chillers[idx]
-                if "setpoint" in t or "temperature" in t:
-                    m_sp = re.search(r"(\d+(\.\d+)?)", t)
-                    if m_sp:
-                        new_sp = float(m_sp.group(1))
-                        update_setpoint(chillers_data, idx, new_sp)
-                        reply.append(
-                            "Setpoint for {} updated to {:.1f} C.".format(
-                                ch["name"], new_sp
-                            )
-                        )
-                elif "on" in t or "start" in t:
-                    ch["status"] = "ON"
-                    reply.append("{} turned ON.".format(ch["name"]))
-                elif "off" in t or "stop" in t:
-                    ch["status"] = "OFF"
-                    reply.append("{} turned OFF.".format(ch["name"]))
-                else:
-                    ch["status"] = "OFF" if ch["status"] == "ON" else "ON"
-                    reply.append("Toggled {} to {}.".format(ch["name"], ch["status"]))
-            else:
-                reply.append("Chiller index out of range.")
-
-    # ---------------- TRANSFORMERS ----------------
-    if "transformer" in t or re.search(r"\btr\s*\d+", t):
-        m = re.search(r"(transformer|tr)\s*([0-9]+)", t)
-        if m:
-            idx = int(m.group(2)) - 1
-            trs = power_data["transformers"]
-            if 0 <= idx < len(trs):
-                tr = trs[idx]
-                if "on" in t:
-                    tr["status"] = "ON"
-                    reply.append("{} turned ON.".format(tr["name"]))
-                elif "off" in t:
-                    tr["status"] = "OFF"
-                    reply.append("{} turned OFF.".format(tr["name"]))
-                else:
-                    tr["status"] = "OFF" if tr["status"] == "ON" else "ON"
-                    reply.append("Toggled {} to {}.".format(tr["name"], tr["status"]))
-
-    # ---------------- UPS ----------------
-    if "ups" in t:
-        m = re.search(r"ups\s*([0-9]+)", t)
-        if m:
-            idx = int(m.group(1)) - 1
-            ups_list = power_data["ups"]
-            if 0 <= idx < len(ups_list):
-                u = ups_list[idx]
-                if "on" in t:
-                    u["status"] = "ON"
-                    reply.append("{} turned ON.".format(u["name"]))
-                elif "off" in t:
-                    u["status"] = "OFF"
-                    reply.append("{} turned OFF.".format(u["name"]))
-                else:
-                    u["status"] = "OFF" if u["status"] == "ON" else "ON"
-                    reply.append("Toggled {} to {}.".format(u["name"], u["status"]))
-
-    # ---------------- GENSETS ----------------
-    if "genset" in t or re.search(r"\bg\s*[0-9]+", t):
-        m = re.search(r"(genset|g)\s*([0-9]+)", t)
-        if m:
-            idx = int(m.group(2)) - 1
-            gens = power_data["genset"]
-            if 0 <= idx < len(gens):
-                g = gens[idx]
-                if "on" in t or "start" in t:
-                    g["status"] = "ON"
-                    reply.append("{} started.".format(g["name"]))
-                elif "off" in t or "stop" in t:
-                    g["status"] = "OFF"
-                    reply.append("{} stopped.".format(g["name"]))
-                else:
-                    g["status"] = "OFF" if g["status"] == "ON" else "ON"
-                    reply.append("Toggled {} to {}.".format(g["name"], g["status"]))
-
-    # ---------------- PAHU ----------------
-    if "pahu" in t:
-        m = re.search(r"pahu\s*([0-9]+)", t)
-        if m:
-            idx = int(m.group(1)) - 1
-            pahu_list = power_data["pahu"]
-            if 0 <= idx < len(pahu_list):
-                p = pahu_list[idx]
-                if "on" in t or "start" in t:
-                    p["status"] = "ON"
-                    reply.append("{} turned ON.".format(p["name"]))
-                elif "off" in t or "stop" in t:
-                    p["status"] = "OFF"
-                    reply.append("{} turned OFF.".format(p["name"]))
-                else:
-                    p["status"] = "OFF" if p["status"] == "ON" else "ON"
-                    reply.append("Toggled {} to {}.".format(p["name"], p["status"]))
-
-    if not reply:
-        reply.append(
-            "I understood the text but could not map it to any control action."
-        )
+    reply = handle_command(text, chillers_data, power_data)
+    return reply, chillers_data, power_data
+
+
+def configure_sequencer(field: str, widget_key: str):
+    """on_change callback: persist one sequencer setting from its widget."""
+    get_sequencer().configure(**{field: st.session_state[widget_key]})
 
-    # persist
-    save_chillers(chillers_data)
-    save_power(power_data)
 
-    return " ".join(reply), chillers_data, power_data
+# Readings come from the shared background scheduler, not from this render.
+scheduler = get_scheduler()
+# Energy figures accumulate from scheduler ticks from server start onward.
+analytics = get_analytics()
+# Load the speech model once per server process, not on the first command.
+stt.preload()
+
+# (title, device class, toggle function, widget key prefix)
+POWER_SECTIONS = [
+    ("Transformers", "transformers", toggle_transformer, "tr"),
+    ("UPS", "ups", toggle_ups, "ups"),
+    ("Gensets", "genset", toggle_genset, "gen"),
+    ("PAHU Units", "pahu", toggle_pahu, "pahu"),
+]
 
 
 # -------------------------------------------------------------
@@ -213,572 +188,304 @@ st.sidebar.markdown(
 
 
 # -------------------------------------------------------------
-# CHILLER DASHBOARD – 30 chillers, 3×10 grid
+# CHILLER DASHBOARD – paged summary table + drill-down
 # -------------------------------------------------------------
 if menu == "Chillers":
-    st.header("Chiller Plant - 30 Units (3 x 10 Grid)")
-
     chillers_data = get_chiller_data()
     chillers = chillers_data["chillers"]
-
-    num_chillers = len(chillers)
-    chillers_per_row = 10
-    num_rows = (num_chillers + chillers_per_row - 1) // chillers_per_row
-
-    for row in range(num_rows):
-        cols = st.columns(chillers_per_row)
-        for col_idx in range(chillers_per_row):
-            idx = row * chillers_per_row + col_idx
-            if idx >= num_chillers:
-                continue
-
-            ch = chillers[idx]
-            sim = simulate_chiller(ch)
-
-            name = ch.get("name", "CH-{:02d}".format(idx + 1))
-            status = ch.get("status", "OFF")
-            sp = float(ch.get("setpoint", 22.0))
-
-            supply = val(sim, "supply_temp", val(sim, "supply_air_temp", 0.0))
-            inlet = val(sim, "inlet_temp", 0.0)
-            outlet = val(sim, "outlet_temp", 0.0)
-            ambient = val(sim, "ambient_temp", 0.0)
-            comp1 = val(sim, "comp1", 0.0)
-            comp2 = val(sim, "comp2", 0.0)
-            power_kw = val(sim, "power_kw", val(sim, "power", 0.0))
-            flow = val(sim, "water_flow", val(sim, "flow", 0.0))
-
-            col = cols[col_idx]
-
-            # blue header
-            col.markdown(
-                "<div style='background:#004b80;color:white;text-align:center;"
-                "padding:4px;font-size:12px;font-weight:bold;'>{}</div>".format(
-                    name
-                ),
-                unsafe_allow_html=True,
-            )
-
-            # status bar
-            color = "#00aa00" if status == "ON" else "#aa0000"
-            col.markdown(
-                "<div style='background:{};color:white;text-align:center;"
-                "padding:4px;font-size:12px;'>STATUS: {}</div>".format(
-                    color, status
-                ),
-                unsafe_allow_html=True,
-            )
-
-            # data panel
-            col.markdown(
-                """
-                <div style='background:#111;padding:6px;font-size:11px;color:#ddd;'>
-                    <b>Setpoint:</b> {:.1f} C<br>
-                    <b>Supply:</b> {:.1f} C<br>
-                    <b>Inlet:</b> {:.1f} C<br>
-                    <b>Outlet:</b> {:.1f} C<br>
-                    <b>Ambient:</b> {:.1f} C<br>
-                    <b>Comp-1:</b> {:.0f} %<br>
-                    <b>Comp-2:</b> {:.0f} %<br>
-                    <b>Power:</b> {:.1f} kW<br>
-                    <b>Flow:</b> {:.1f} m3/hr<br>
-                </div>
-                """.format(
-                    sp,
-                    supply,
-                    inlet,
-                    outlet,
-                    ambient,
-                    comp1,
-                    comp2,
-                    power_kw,
-                    flow,
-                ),
-                unsafe_allow_html=True,
-            )
-
-            if col.button(
-                "Toggle {}".format(name),
-                key="btn_chiller_toggle_{}".format(idx),
-            ):
-                toggle_chiller(chillers_data, idx)
-                save_chillers(chillers_data)
-                st.rerun()
-
-            new_sp = col.number_input(
-                "SP {}".format(name),
-                min_value=16.0,
-                max_value=26.0,
-                value=float(sp),
-                step=0.1,
-                key="num_chiller_sp_{}".format(idx),
-            )
-            if abs(new_sp - sp) > 1e-4:
-                update_setpoint(chillers_data, idx, float(new_sp))
-                save_chillers(chillers_data)
-
-
-# -------------------------------------------------------------
-# POWER CONTROL – PAHU-style matrix layout
-# -------------------------------------------------------------
-elif menu == "Power Control":
-    st.title("Power Control - Transformers / UPS / Genset / PAHU")
-
-    power = get_power_data()
-
-    # TRANSFORMERS
-    st.subheader("Transformers")
-
-    tr_list = power["transformers"]
-    tr_sims = [simulate_transformer(tr) for tr in tr_list]
-
-    html_tr = []
-    html_tr.append(
-        "<div style='background:#020617;padding:8px;border-radius:8px;"
-        "border:1px solid #1f2937;margin-bottom:16px;'>"
-    )
-    html_tr.append(
-        "<table style='border-collapse:collapse;width:100%;font-size:11px;'>"
-    )
-
-    html_tr.append("<tr>")
-    html_tr.append(
-        "<th style='background:#1f2937;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #111827;text-align:left;'>PARAMETERS</th>"
-    )
-    for tr in tr_list:
-        html_tr.append(
-            "<th style='background:#1d4ed8;color:white;padding:4px 6px;"
-            "border:1px solid #111827;text-align:center;'>{}</th>".format(
-                tr["name"]
-            )
-        )
-    html_tr.append("</tr>")
-
-    # status row
-    html_tr.append("<tr>")
-    html_tr.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>UNIT STATUS</td>"
-    )
-    for tr in tr_list:
-        html_tr.append("<td>{}</td>".format(status_cell(tr["status"])))
-    html_tr.append("</tr>")
-
-    # voltage
-    html_tr.append("<tr>")
-    html_tr.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>VOLTAGE (V)</td>"
-    )
-    for sim in tr_sims:
-        html_tr.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.1f}</td>".format(
-                val(sim, "voltage")
-            )
+    chiller_sims = scheduler.readings("chillers", chillers)
+
+    st.header("Chiller Plant - {} Units".format(len(chillers)))
+
+    power_kw = [val(sim, "power") for sim in chiller_sims]
+    running = sum(1 for ch in chillers if ch["status"] == "ON")
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Running", "{} / {}".format(running, len(chillers)))
+    m2.metric("Plant power", "{:.0f} kW".format(sum(power_kw)))
+    m3.metric(
+        "Mean supply (running)",
+        "{:.1f} C".format(
+            sum(val(sim, "supply") for sim, ch in zip(chiller_sims, chillers) if ch["status"] == "ON")
+            / max(running, 1)
+        ),
+    )
+
+    with st.expander("Group control"):
+        g1, g2, g3 = st.columns([2, 1, 1])
+        selector = g1.text_input(
+            "Chillers (name glob, range '11-20', 'tag:<name>' or 'all')",
+            key="chiller_group_selector",
         )
-    html_tr.append("</tr>")
-
-    # current
-    html_tr.append("<tr>")
-    html_tr.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>CURRENT (A)</td>"
-    )
-    for sim in tr_sims:
-        html_tr.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.1f}</td>".format(
-                val(sim, "current")
-            )
+        action = g2.selectbox(
+            "Action", ["ON", "OFF", "Toggle", "Setpoint"], key="chiller_group_action"
         )
-    html_tr.append("</tr>")
-
-    # power
-    html_tr.append("<tr>")
-    html_tr.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>POWER (kW)</td>"
-    )
-    for sim in tr_sims:
-        html_tr.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.2f}</td>".format(
-                val(sim, "power")
-            )
+        group_sp = g3.number_input(
+            "Setpoint (C)", min_value=16.0, max_value=26.0, value=21.0, step=0.1,
+            key="chiller_group_sp",
         )
-    html_tr.append("</tr>")
-
-    html_tr.append("</table></div>")
-    st.markdown("".join(html_tr), unsafe_allow_html=True)
-
-    tr_cols = st.columns(len(tr_list))
-    for i, tr in enumerate(tr_list):
-        if tr_cols[i].button(
-            "Toggle {}".format(tr["name"]),
-            key="btn_power_tr_{}".format(i),
-        ):
-            toggle_transformer(power, i)
-            save_power(power)
-            st.rerun()
-
-    st.markdown("---")
-
-    # UPS
-    st.subheader("UPS")
-
-    ups_list = power["ups"]
-    ups_sims = [simulate_ups(u) for u in ups_list]
-
-    html_ups = []
-    html_ups.append(
-        "<div style='background:#020617;padding:8px;border-radius:8px;"
-        "border:1px solid #1f2937;margin-bottom:16px;'>"
-    )
-    html_ups.append(
-        "<table style='border-collapse:collapse;width:100%;font-size:11px;'>"
-    )
-
-    html_ups.append("<tr>")
-    html_ups.append(
-        "<th style='background:#1f2937;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #111827;text-align:left;'>PARAMETERS</th>"
-    )
-    for u in ups_list:
-        html_ups.append(
-            "<th style='background:#1d4ed8;color:white;padding:4px 6px;"
-            "border:1px solid #111827;text-align:center;'>{}</th>".format(
-                u["name"]
-            )
-        )
-    html_ups.append("</tr>")
-
-    # status
-    html_ups.append("<tr>")
-    html_ups.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>UNIT STATUS</td>"
-    )
-    for u in ups_list:
-        html_ups.append("<td>{}</td>".format(status_cell(u["status"])))
-    html_ups.append("</tr>")
-
-    # voltage
-    html_ups.append("<tr>")
-    html_ups.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>VOLTAGE (V)</td>"
-    )
-    for sim in ups_sims:
-        html_ups.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.1f}</td>".format(
-                val(sim, "voltage")
-            )
-        )
-    html_ups.append("</tr>")
-
-    # current
-    html_ups.append("<tr>")
-    html_ups.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>CURRENT (A)</td>"
-    )
-    for sim in ups_sims:
-        html_ups.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.1f}</td>".format(
-                val(sim, "current")
-            )
-        )
-    html_ups.append("</tr>")
-
-    # power
-    html_ups.append("<tr>")
-    html_ups.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>POWER (kW)</td>"
-    )
-    for sim in ups_sims:
-        html_ups.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.2f}</td>".format(
-                val(sim, "power")
-            )
+        if st.button("Apply to group", key="btn_chiller_group_apply"):
+            selectors = [p.strip() for p in selector.split(",") if p.strip()]
+            try:
+                with Batch(chillers_data=chillers_data) as batch:
+                    if action == "Setpoint":
+                        batch.set_setpoint(selectors, group_sp)
+                    elif action == "Toggle":
+                        batch.toggle("chillers", selectors)
+                    else:
+                        batch.set_status("chillers", selectors, action)
+                    changed = batch.pending()
+            except ControlError as e:
+                st.error("Group command rejected: {}".format(e))
+            else:
+                st.success("Applied to {} chiller(s).".format(len(changed)))
+                scheduler.request_tick("chillers")
+
+    with st.expander("Automatic sequencing"):
+        sequencer = get_sequencer()
+        s1, s2, s3 = st.columns(3)
+        # settings are shared by every session: only a user's own edit
+        # (on_change) writes them, a rerun never does
+        s1.checkbox(
+            "Re-plan every minute", value=sequencer.enabled, key="chk_sequencer_enabled",
+            on_change=configure_sequencer, args=("enabled", "chk_sequencer_enabled"),
         )
-    html_ups.append("</tr>")
-
-    # load
-    html_ups.append("<tr>")
-    html_ups.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>LOAD (%)</td>"
-    )
-    for sim in ups_sims:
-        html_ups.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.1f}</td>".format(
-                val(sim, "load")
-            )
+        s2.number_input(
+            "Max supply setpoint (C)", min_value=16.0, max_value=26.0,
+            value=float(sequencer.max_setpoint), step=0.5, key="num_sequencer_sp",
+            on_change=configure_sequencer, args=("max_setpoint", "num_sequencer_sp"),
         )
-    html_ups.append("</tr>")
-
-    html_ups.append("</table></div>")
-    st.markdown("".join(html_ups), unsafe_allow_html=True)
-
-    ups_cols = st.columns(len(ups_list))
-    for i, u in enumerate(ups_list):
-        if ups_cols[i].button(
-            "Toggle {}".format(u["name"]),
-            key="btn_power_ups_{}".format(i),
-        ):
-            toggle_ups(power, i)
-            save_power(power)
-            st.rerun()
-
-    st.markdown("---")
-
-    # GENSETS
-    st.subheader("Gensets")
-
-    g_list = power["genset"]
-    g_sims = [simulate_genset(g) for g in g_list]
-
-    html_g = []
-    html_g.append(
-        "<div style='background:#020617;padding:8px;border-radius:8px;"
-        "border:1px solid #1f2937;margin-bottom:16px;'>"
-    )
-    html_g.append(
-        "<table style='border-collapse:collapse;width:100%;font-size:11px;'>"
-    )
-
-    html_g.append("<tr>")
-    html_g.append(
-        "<th style='background:#1f2937;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #111827;text-align:left;'>PARAMETERS</th>"
-    )
-    for g in g_list:
-        html_g.append(
-            "<th style='background:#1d4ed8;color:white;padding:4px 6px;"
-            "border:1px solid #111827;text-align:center;'>{}</th>".format(
-                g["name"]
-            )
+        s3.number_input(
+            "Redundant units (N+x)", min_value=0, max_value=3,
+            value=int(sequencer.redundancy), step=1, key="num_sequencer_redundancy",
+            on_change=configure_sequencer, args=("redundancy", "num_sequencer_redundancy"),
         )
-    html_g.append("</tr>")
-
-    # status
-    html_g.append("<tr>")
-    html_g.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>UNIT STATUS</td>"
-    )
-    for g in g_list:
-        html_g.append("<td>{}</td>".format(status_cell(g["status"])))
-    html_g.append("</tr>")
-
-    # voltage
-    html_g.append("<tr>")
-    html_g.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>VOLTAGE (V)</td>"
-    )
-    for sim in g_sims:
-        html_g.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.1f}</td>".format(
-                val(sim, "voltage")
+        proposal = sequencer.plan(chillers_data)
+        st.write(
+            "Load {:.0f} kW: run {} chillers at {:.1f} C for about {:.0f} kW "
+            "({} to start, {} to stop{}).".format(
+                proposal.load_kw,
+                int(proposal.running.sum()),
+                proposal.setpoint,
+                proposal.predicted_kw,
+                len(proposal.start),
+                len(proposal.stop),
+                "" if proposal.feasible else "; N+1 not reachable",
             )
         )
-    html_g.append("</tr>")
-
-    # current
-    html_g.append("<tr>")
-    html_g.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>CURRENT (A)</td>"
-    )
-    for sim in g_sims:
-        html_g.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.1f}</td>".format(
-                val(sim, "current")
-            )
+        if st.button("Apply plan now", key="btn_sequencer_apply"):
+            applied = sequencer.apply(chillers_data, proposal)
+            st.success("Sequencer changed {} chiller(s).".format(len(applied)))
+            scheduler.request_tick("chillers")
+
+    f1, f2, f3, f4 = st.columns(4)
+    status_filter = f1.selectbox(
+        "Status", ["All", "ON", "OFF"], index=0, key="chiller_filter_status"
+    )
+    min_power = f2.number_input(
+        "Power above (kW)", min_value=0.0, value=0.0, step=10.0, key="chiller_filter_power"
+    )
+    name_filter = f3.text_input("Name contains", key="chiller_filter_name").strip().upper()
+    page_size = f4.selectbox(
+        "Rows per page", [25, 50, 100], index=0, key="chiller_page_size"
+    )
+
+    visible = [
+        idx
+        for idx, ch in enumerate(chillers)
+        if (status_filter == "All" or ch["status"] == status_filter)
+        and power_kw[idx] >= min_power
+        and (not name_filter or name_filter in ch["name"].upper())
+    ]
+
+    num_pages = max((len(visible) + page_size - 1) // page_size, 1)
+    page = st.number_input(
+        "Page (of {})".format(num_pages),
+        min_value=1,
+        max_value=num_pages,
+        value=1,
+        step=1,
+        key="chiller_page",
+    )
+    page_idx = visible[(page - 1) * page_size : page * page_size]
+
+    if not page_idx:
+        st.info("No chillers match the selected filters.")
+    else:
+        st.markdown(TABLE_CSS, unsafe_allow_html=True)
+        st.markdown(
+            render_rows(
+                CHILLER_COLUMNS,
+                [chillers[idx] for idx in page_idx],
+                [chiller_sims[idx] for idx in page_idx],
+                keys=[chiller_version(chillers[idx]["name"]) for idx in page_idx],
+            ),
+            unsafe_allow_html=True,
         )
-    html_g.append("</tr>")
 
-    # power
-    html_g.append("<tr>")
-    html_g.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>POWER (kW)</td>"
-    )
-    for sim in g_sims:
-        html_g.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.2f}</td>".format(
-                val(sim, "power")
-            )
+        # per-row drill-down with controls for a single chiller
+        idx = st.selectbox(
+            "Drill down",
+            page_idx,
+            format_func=lambda i: chillers[i]["name"],
+            key="chiller_drilldown",
         )
-    html_g.append("</tr>")
-
-    # load
-    html_g.append("<tr>")
-    html_g.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>LOAD (%)</td>"
-    )
-    for sim in g_sims:
-        html_g.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.1f}</td>".format(
-                val(sim, "load")
-            )
+        ch = chillers[idx]
+        sim = chiller_sims[idx]
+        name = ch["name"]
+        sp = float(ch.get("setpoint", 22.0))
+
+        col_info, col_ctrl = st.columns([2, 1])
+        col_info.markdown(
+            """
+            <div style='background:#111;padding:6px;font-size:12px;color:#ddd;'>
+                <b>{}</b> - STATUS: {}<br>
+                <b>Setpoint:</b> {:.1f} C<br>
+                <b>Supply:</b> {:.1f} C<br>
+                <b>Inlet:</b> {:.1f} C<br>
+                <b>Outlet:</b> {:.1f} C<br>
+                <b>Ambient:</b> {:.1f} C<br>
+                <b>Comp-1:</b> {:.0f} %<br>
+                <b>Comp-2:</b> {:.0f} %<br>
+                <b>Power:</b> {:.1f} kW<br>
+                <b>Flow:</b> {:.1f} m3/hr<br>
+            </div>
+            """.format(
+                name,
+                ch["status"],
+                sp,
+                val(sim, "supply"),
+                val(sim, "inlet"),
+                val(sim, "outlet"),
+                val(sim, "ambient"),
+                val(sim, "comp1"),
+                val(sim, "comp2"),
+                val(sim, "power"),
+                val(sim, "flow"),
+            ),
+            unsafe_allow_html=True,
         )
-    html_g.append("</tr>")
-
-    html_g.append("</table></div>")
-    st.markdown("".join(html_g), unsafe_allow_html=True)
 
-    g_cols = st.columns(len(g_list))
-    for i, g in enumerate(g_list):
-        if g_cols[i].button(
-            "Toggle {}".format(g["name"]),
-            key="btn_power_gen_{}".format(i),
+        if col_ctrl.button(
+            "Toggle {}".format(name),
+            key="btn_chiller_toggle_{}".format(idx),
         ):
-            toggle_genset(power, i)
-            save_power(power)
+            toggle_chiller(chillers_data, idx)
+            scheduler.request_tick("chillers")
             st.rerun()
 
-    st.markdown("---")
-
-    # PAHU
-    st.subheader("PAHU Units")
-
-    p_list = power["pahu"]
-    p_sims = [simulate_pahu(p) for p in p_list]
+        new_sp = col_ctrl.number_input(
+            "SP {}".format(name),
+            min_value=16.0,
+            max_value=26.0,
+            value=float(sp),
+            step=0.1,
+            key="num_chiller_sp_{}".format(idx),
+        )
+        if abs(new_sp - sp) > 1e-4:
+            update_setpoint(chillers_data, idx, float(new_sp))
+            scheduler.request_tick("chillers")
 
-    html_p = []
-    html_p.append(
-        "<div style='background:#020617;padding:8px;border-radius:8px;"
-        "border:1px solid #1f2937;margin-bottom:16px;'>"
-    )
-    html_p.append(
-        "<table style='border-collapse:collapse;width:100%;font-size:11px;'>"
-    )
 
-    html_p.append("<tr>")
-    html_p.append(
-        "<th style='background:#1f2937;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #111827;text-align:left;'>PARAMETERS</th>"
-    )
-    for p in p_list:
-        html_p.append(
-            "<th style='background:#1d4ed8;color:white;padding:4px 6px;"
-            "border:1px solid #111827;text-align:center;'>{}</th>".format(
-                p["name"]
-            )
-        )
-    html_p.append("</tr>")
+# -------------------------------------------------------------
+# POWER CONTROL – PAHU-style matrix layout
+# -------------------------------------------------------------
+elif menu == "Power Control":
+    st.title("Power Control - Transformers / UPS / Genset / PAHU")
 
-    # status
-    html_p.append("<tr>")
-    html_p.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>UNIT STATUS</td>"
-    )
-    for p in p_list:
-        html_p.append("<td>{}</td>".format(status_cell(p["status"])))
-    html_p.append("</tr>")
-
-    # supply air temp
-    html_p.append("<tr>")
-    html_p.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>SUPPLY AIR TEMP (C)</td>"
-    )
-    for sim in p_sims:
-        html_p.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.1f}</td>".format(
-                val(sim, "supply_air_temp")
-            )
-        )
-    html_p.append("</tr>")
+    power = get_power_data()
 
-    # return air temp
-    html_p.append("<tr>")
-    html_p.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>RETURN AIR TEMP (C)</td>"
-    )
-    for sim in p_sims:
-        html_p.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.1f}</td>".format(
-                val(sim, "return_air_temp")
-            )
+    now = analytics.current()
+    day = analytics.window("24h")
+    e1, e2, e3, e4, e5, e6 = st.columns(6)
+    e1.metric("Facility", "{:.0f} kW".format(now["facility_kw"]))
+    e2.metric("IT (UPS)", "{:.0f} kW".format(now["it_kw"]))
+    e3.metric("Cooling", "{:.0f} kW".format(now["cooling_kw"]))
+    e4.metric("PUE", ratio(now["pue"]), help="24h: {}".format(ratio(day["pue"])))
+    e5.metric("kW/TR", ratio(now["kw_per_tr"]), help="24h: {}".format(ratio(day["kw_per_tr"])))
+    e6.metric("Chiller COP", ratio(now["cop"]), help="24h: {}".format(ratio(day["cop"])))
+
+    with st.expander("Energy by window"):
+        st.dataframe(
+            [
+                {
+                    "Window": w["window"],
+                    "Covered (h)": round(w["covered_s"] / 3600.0, 2),
+                    "Facility kWh": round(w["facility_kwh"], 1),
+                    "IT kWh": round(w["it_kwh"], 1),
+                    "Cooling kWh": round(w["cooling_kwh"], 1),
+                    "Peak facility kW": round(w["peak_facility_kw"], 0),
+                    "PUE": ratio(w["pue"]),
+                    "kW/TR": ratio(w["kw_per_tr"]),
+                    "COP": ratio(w["cop"]),
+                }
+                for w in analytics.summary().values()
+            ],
+            use_container_width=True,
+            hide_index=True,
         )
-    html_p.append("</tr>")
 
-    # airflow
-    html_p.append("<tr>")
-    html_p.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>AIRFLOW (CFM)</td>"
-    )
-    for sim in p_sims:
-        html_p.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.0f}</td>".format(
-                val(sim, "airflow")
-            )
+    for name, state in scheduler.grid.alerts():
+        if state == "TRIPPED":
+            st.error("{} tripped on overload - load moved to redundant feeders.".format(name))
+        else:
+            st.warning("{} has no energized feeder.".format(name))
+
+    with st.expander("Group control"):
+        g1, g2, g3 = st.columns([1, 2, 1])
+        group_titles = {device_class: title for title, device_class, _, _ in POWER_SECTIONS}
+        group_class = g1.selectbox(
+            "Section",
+            list(group_titles),
+            format_func=group_titles.get,
+            key="power_group_section",
         )
-    html_p.append("</tr>")
-
-    # power
-    html_p.append("<tr>")
-    html_p.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>POWER (kW)</td>"
-    )
-    for sim in p_sims:
-        html_p.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.2f}</td>".format(
-                val(sim, "power")
-            )
+        selector = g2.text_input(
+            "Devices (name glob, range '1-4', 'tag:<name>' or 'all')",
+            key="power_group_selector",
         )
-    html_p.append("</tr>")
-
-    # filter dp
-    html_p.append("<tr>")
-    html_p.append(
-        "<td style='background:#111827;color:#e5e7eb;padding:4px 6px;"
-        "border:1px solid #1f2937;font-weight:bold;'>FILTER DP (in-wg)</td>"
-    )
-    for sim in p_sims:
-        html_p.append(
-            "<td style='background:#020617;color:#e5e7eb;padding:4px 6px;"
-            "border:1px solid #1f2937;text-align:center;'>{:.2f}</td>".format(
-                val(sim, "filter_dp")
-            )
+        action = g3.selectbox("Action", ["ON", "OFF", "Toggle"], key="power_group_action")
+        if st.button("Apply to group", key="btn_power_group_apply"):
+            selectors = [p.strip() for p in selector.split(",") if p.strip()]
+            try:
+                with Batch(power_data=power) as batch:
+                    if action == "Toggle":
+                        batch.toggle(group_class, selectors)
+                    else:
+                        batch.set_status(group_class, selectors, action)
+                    changed = batch.pending()
+            except ControlError as e:
+                st.error("Group command rejected: {}".format(e))
+            else:
+                st.success("Applied to {} device(s).".format(len(changed)))
+                scheduler.request_tick(group_class)
+
+    st.markdown(TABLE_CSS, unsafe_allow_html=True)
+
+    for i_section, (title, device_class, toggle_fn, key_prefix) in enumerate(
+        POWER_SECTIONS
+    ):
+        if i_section:
+            st.markdown("---")
+        st.subheader(title)
+
+        devices = power[device_class]
+        sims = scheduler.readings(device_class, devices)
+        states = scheduler.grid.states(devices)
+        keys = [power_version(device_class, d["name"]) for d in devices]
+        st.markdown(
+            render_matrix(device_class, devices, sims, states, keys),
+            unsafe_allow_html=True,
         )
-    html_p.append("</tr>")
-
-    html_p.append("</table></div>")
-    st.markdown("".join(html_p), unsafe_allow_html=True)
 
-    p_cols = st.columns(len(p_list))
-    for i, p in enumerate(p_list):
-        if p_cols[i].button(
-            "Toggle {}".format(p["name"]),
-            key="btn_power_pahu_{}".format(i),
-        ):
-            toggle_pahu(power, i)
-            save_power(power)
-            st.rerun()
+        cols = st.columns(len(devices))
+        for i, dev in enumerate(devices):
+            if cols[i].button(
+                "Toggle {}".format(dev["name"]),
+                key="btn_power_{}_{}".format(key_prefix, i),
+            ):
+                toggle_fn(power, i)
+                scheduler.request_tick(device_class)
+                st.rerun()
 
 
 # -------------------------------------------------------------
@@ -790,7 +497,8 @@ elif menu == "Voice Assistant":
     st.write(
         "Upload a short WAV file with a command such as: "
         "'turn on chiller 5', 'set chiller 3 setpoint to 20', "
-        "'turn off transformer 2', 'turn on genset 4', 'turn off ups 1'."
+        "'turn off transformer 2', 'turn on genset 4', 'turn off ups 1', "
+        "'turn on chillers 3 to 7'."
     )
 
     audio_file = st.file_uploader(
@@ -800,9 +508,8 @@ elif menu == "Voice Assistant":
     )
 
     if audio_file is not None:
-        raw_bytes = audio_file.read()
         with st.spinner("Transcribing voice command..."):
-            text = transcribe_voice(raw_bytes)
+            text = transcribe_voice(audio_file.getbuffer())
 
         if not text:
             st.error("No speech recognized or STT error. Try again.")
@@ -821,7 +528,40 @@ elif menu == "Voice Assistant":
             with st.spinner("Generating spoken reply..."):
                 out_audio = tts_voice(reply_text)
 
-            st.audio(out_audio, format="audio/mp3", key="voice_audio_player")
+            st.audio(out_audio, format=tts_mime(), key="voice_audio_player")
+
+    st.subheader("Batch mode")
+    st.write(
+        "Upload several WAV files, one command each, or one long recording "
+        "with a pause between commands. All commands are applied together."
+    )
+
+    batch_files = st.file_uploader(
+        "Upload WAV files",
+        type=["wav"],
+        accept_multiple_files=True,
+        key="voice_batch_uploader",
+    )
+
+    if batch_files and st.button("Process batch", key="btn_voice_batch"):
+        recordings = [(f.name, f.getbuffer()) for f in batch_files]
+        with st.spinner("Transcribing {} recording(s)...".format(len(recordings))):
+            try:
+                result = process_recordings(
+                    recordings, get_chiller_data(), get_power_data()
+                )
+            except ValueError as e:
+                result = None
+                st.error("Could not read audio: {}".format(e))
+
+        if result is not None:
+            st.dataframe(result["results"], use_container_width=True, hide_index=True)
+            st.info("Agent reply: {}".format(result["summary"]))
+
+            with st.spinner("Generating spoken reply..."):
+                out_audio = tts_voice(result["summary"])
+
+            st.audio(out_audio, format=tts_mime(), key="voice_batch_audio_player")
 
 
 # -------------------------------------------------------------
@@ -836,7 +576,23 @@ elif menu == "Alarms & Events":
         "cause and recommended action."
     )
 
-    alarms = get_simulated_alarms()
+    pipeline = get_pipeline()
+    history = get_alarm_store()
+
+    # Apply only the changes since this session's last render.
+    alarm_view = st.session_state.setdefault("alarm_view", {})
+    seq, deltas = pipeline.changes_since(st.session_state.get("alarm_seq", -1))
+    if deltas is None:
+        seq, current = pipeline.snapshot()
+        alarm_view.clear()
+        alarm_view.update({a["id"]: a for a in current})
+    else:
+        for op, a in deltas:
+            if op == "evict":
+                alarm_view.pop(a["id"], None)
+            else:
+                alarm_view[a["id"]] = a
+    st.session_state["alarm_seq"] = seq
 
     col1, col2 = st.columns(2)
     with col1:
@@ -853,71 +609,86 @@ elif menu == "Alarms & Events":
             index=0,
             key="alarm_filter_severity",
         )
+    system_key = None if system_filter == "All" else system_filter
+    severity_key = None if severity_filter == "All" else severity_filter
+
+    # aggregate counters (kept incrementally by the store)
+    facets = history.facets(system_key)
+    metric_cols = st.columns(5)
+    metric_cols[0].metric(
+        "Active now", sum(1 for a in alarm_view.values() if not a["cleared"])
+    )
+    for col, sev in zip(metric_cols[1:], ["Critical", "Major", "Minor", "Info"]):
+        col.metric("{} events".format(sev), facets["severity"].get(sev, 0))
+
+    tab_active, tab_history = st.tabs(["Active alarms", "History"])
+
+    with tab_active:
+        filtered = [
+            al
+            for al in alarm_view.values()
+            if (system_key is None or al["system"] == system_key)
+            and (severity_key is None or al["severity"] == severity_key)
+        ]
+        filtered.sort(key=lambda a: a["ts"], reverse=True)
+
+        if not filtered:
+            st.info("No alarms matching the selected filters.")
+        for al in filtered[:ALARM_PAGE_SIZE]:
+            state = "CLEARED" if al["cleared"] else "ACTIVE"
+            if al["acked"]:
+                state += " / ACK"
+            if al["count"] > 1:
+                state += " (x{})".format(al["count"])
+            if al["chattering"]:
+                state += " - CHATTERING"
+            st.markdown(alarm_card(al, state), unsafe_allow_html=True)
+            if not al["acked"] and st.button(
+                "Acknowledge", key="btn_alarm_ack_{}".format(al["id"])
+            ):
+                pipeline.acknowledge(al["id"])
+                st.rerun()
+        if len(filtered) > ALARM_PAGE_SIZE:
+            st.caption(
+                "Showing newest {} of {} alarms.".format(ALARM_PAGE_SIZE, len(filtered))
+            )
 
-    filtered = []
-    for al in alarms:
-        if system_filter != "All" and al["system"] != system_filter:
-            continue
-        if severity_filter != "All" and al["severity"] != severity_filter:
-            continue
-        filtered.append(al)
-
-    if not filtered:
-        st.info("No alarms matching the selected filters.")
-    else:
-        for al in filtered:
-            explanation = explain_alarm(al)
-
-            sev = al["severity"]
-            if sev == "Critical":
-                sev_color = "#f97373"
-            elif sev == "Major":
-                sev_color = "#facc15"
-            elif sev == "Minor":
-                sev_color = "#4ade80"
-            else:
-                sev_color = "#60a5fa"
-
+    with tab_history:
+        # cursor stack for paging; reset when the filters change
+        filter_key = (system_key, severity_key)
+        if st.session_state.get("alarm_hist_filter") != filter_key:
+            st.session_state["alarm_hist_filter"] = filter_key
+            st.session_state["alarm_hist_cursors"] = [None]
+        cursors = st.session_state["alarm_hist_cursors"]
+
+        page = history.query(
+            system=system_key,
+            severity=severity_key,
+            limit=ALARM_PAGE_SIZE,
+            cursor=cursors[-1],
+        )
+        if not page["items"]:
+            st.info("No alarm history matching the selected filters.")
+        else:
+            st.caption(
+                "Page {} - {} matching events".format(len(cursors), page["total"])
+            )
             st.markdown(
-                """
-                <div style='background:#111827; padding:14px; border-radius:10px;
-                            border:1px solid #1f2937; margin-bottom:12px;'>
-                    <div style='display:flex; justify-content:space-between; align-items:center;'>
-                        <div>
-                            <span style='color:#9ca3af; font-size:12px;'>Time</span>
-                            <div style='color:#e5e7eb; font-size:13px;'>{timestamp}</div>
-                        </div>
-                        <div>
-                            <span style='color:#9ca3af; font-size:12px;'>Severity</span><br>
-                            <span style='color:{sev_color}; font-weight:bold;'>{severity}</span>
-                        </div>
-                        <div>
-                            <span style='color:#9ca3af; font-size:12px;'>System</span>
-                            <div style='color:#e5e7eb; font-size:13px;'>{system}</div>
-                        </div>
-                        <div>
-                            <span style='color:#9ca3af; font-size:12px;'>Source</span>
-                            <div style='color:#e5e7eb; font-size:13px;'>{source}</div>
-                        </div>
-                    </div>
-                    <hr style='border:1px solid #1f2937; margin-top:8px; margin-bottom:8px;'>
-                    <div style='color:#e5e7eb; font-size:14px;'>
-                        <b>Alarm:</b> {message}
-                    </div>
-                    <div style='margin-top:6px; color:#fbbf24; font-size:13px;'>
-                        <b>Probable root cause:</b> {root}</div>
-                    <div style='margin-top:4px; color:#93c5fd; font-size:13px;'>
-                        <b>Recommended action:</b> {action}</div>
-                </div>
-                """.format(
-                    timestamp=al["timestamp"],
-                    sev_color=sev_color,
-                    severity=al["severity"],
-                    system=al["system"],
-                    source=al["source"],
-                    message=al["message"],
-                    root=explanation["root_cause"],
-                    action=explanation["action"],
+                "".join(
+                    alarm_card(
+                        al, "CLEARED" if al["state"] == "clear" else "RAISED"
+                    )
+                    for al in page["items"]
                 ),
                 unsafe_allow_html=True,
             )
+
+        prev_col, next_col = st.columns(2)
+        if len(cursors) > 1 and prev_col.button("Newer", key="btn_alarm_hist_prev"):
+            cursors.pop()
+            st.rerun()
+        if page["next_cursor"] is not None and next_col.button(
+            "Older", key="btn_alarm_hist_next"
+        ):
+            cursors.append(page["next_cursor"])
+            st.rerun()
@@ -1,4 +1,21 @@
-from utils import load_chillers, save_chillers
+from utils import edit_record, load_chillers, update_device, update_devices
+
+# name -> change counter; bumped on every control write from this process
+_versions = {}
+
+
+def _bump(name: str):
+    _versions[name] = _versions.get(name, 0) + 1
+
+
+def device_version(name: str) -> int:
+    """
+    Change counter for the table renderer's memo key. It is per-process:
+    writes journaled by other processes do not bump it. Memoized columns
+    stay correct only because the key also holds the device's status and
+    setpoint, which come from the shared config.
+    """
+    return _versions.get(name, 0)
 
 
 def get_chiller_data():
@@ -6,13 +23,41 @@ def get_chiller_data():
 
 
 def toggle_chiller(data: dict, idx: int):
-    ch = data["chillers"][idx]
+    ch = edit_record(data, "chillers", idx)
     ch["status"] = "OFF" if ch["status"] == "ON" else "ON"
-    save_chillers(data)
+    update_device("chillers", ch["name"], {"status": ch["status"]})
+    _bump(ch["name"])
+    return data
+
+
+def set_chiller_status(data: dict, idx: int, status: str):
+    ch = edit_record(data, "chillers", idx)
+    ch["status"] = status
+    update_device("chillers", ch["name"], {"status": status})
+    _bump(ch["name"])
     return data
 
 
 def update_setpoint(data: dict, idx: int, new_sp: float):
-    data["chillers"][idx]["setpoint"] = float(new_sp)
-    save_chillers(data)
+    ch = edit_record(data, "chillers", idx)
+    ch["setpoint"] = float(new_sp)
+    update_device("chillers", ch["name"], {"setpoint": ch["setpoint"]})
+    _bump(ch["name"])
+    return data
+
+
+def apply_changes(data: dict, changes: dict):
+    """
+    Apply {idx: fields} to many chillers and persist them as one journal
+    record, so the whole set lands or none of it does.
+    """
+    records = []
+    for idx, fields in changes.items():
+        ch = edit_record(data, "chillers", idx)
+        ch.update(fields)
+        records.append({"section": "chillers", "name": ch["name"], "fields": fields})
+    if records:
+        update_devices(records)
+        for rec in records:
+            _bump(rec["name"])
     return data
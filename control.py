@@ -0,0 +1,288 @@
+"""
+Bulk control: stage status / setpoint changes for many devices and
+commit them in one write.
+
+Devices are picked with selectors:
+
+    "CH-1*"        name glob (case-insensitive)
+    "3-7"          1-based index range, inclusive
+    5              single 1-based index
+    "tag:north"    devices whose "tags" list contains "north"
+    "all"          every device in the section
+    [..]           union of any of the above
+
+A Batch validates each operation when it is staged and touches nothing
+until commit(). commit() merges the staged changes per device and
+persists each config file with one journal record, so a batch either
+lands completely or not at all (per config file; chillers and power live
+in separate files).
+
+    with Batch() as b:
+        b.set_status("chillers", "11-20", "ON")
+        b.set_setpoint("tag:hall-b", 19.5)
+"""
+
+import fnmatch
+import re
+import time
+
+from chiller_manager import apply_changes as apply_chiller_changes
+from chiller_manager import get_chiller_data
+from power_manager import apply_changes as apply_power_changes
+from power_manager import get_power_data
+from registry import get_registry
+
+POWER_SECTIONS = ("transformers", "ups", "genset", "pahu")
+SECTIONS = ("chillers",) + POWER_SECTIONS
+STATUSES = ("ON", "OFF")
+SETPOINT_RANGE = (16.0, 26.0)
+
+_RANGE = re.compile(r"^\s*(\d+)\s*(?:-|\.\.|to)\s*(\d+)\s*$")
+
+
+class ControlError(ValueError):
+    """A batch operation was rejected; nothing has been written."""
+
+
+def _checked(devices: list, table, idxs: list):
+    """idxs from a registry table if they still name the same devices, else None."""
+    if len(table) != len(devices):
+        return None
+    for i in idxs:
+        if devices[i]["name"] != table.names[i]:
+            return None
+    return idxs
+
+
+def select(devices: list, selector, table=None) -> list:
+    """
+    Sorted 0-based indices of the devices matched by a selector. table is
+    an optional registry.DeviceTable for the same devices; exact names and
+    tags are looked up in it instead of scanning the list.
+    """
+    if isinstance(selector, (list, tuple, set)):
+        picked = set()
+        for s in selector:
+            picked.update(select(devices, s, table))
+        return sorted(picked)
+
+    if isinstance(selector, int):
+        if not 1 <= selector <= len(devices):
+            raise ControlError("index {} out of range 1-{}".format(selector, len(devices)))
+        return [selector - 1]
+
+    sel = str(selector).strip()
+    if sel.lower() in ("all", "*"):
+        return list(range(len(devices)))
+    if sel.isdigit():
+        return select(devices, int(sel))
+
+    m = _RANGE.match(sel)
+    if m:
+        lo, hi = sorted((int(m.group(1)), int(m.group(2))))
+        if lo < 1 or hi > len(devices):
+            raise ControlError(
+                "range {}-{} out of range 1-{}".format(lo, hi, len(devices))
+            )
+        return list(range(lo - 1, hi))
+
+    if sel.lower().startswith("tag:"):
+        tag = sel[4:].strip().lower()
+        if table is not None:
+            hit = _checked(devices, table, table.tagged_ci(tag))
+            if hit is not None:
+                return hit
+        return [
+            i
+            for i, d in enumerate(devices)
+            if tag in (t.lower() for t in d.get("tags", ()))
+        ]
+
+    if table is not None and not any(c in sel for c in "*?["):
+        i = table.find(sel)
+        hit = _checked(devices, table, [] if i is None else [i])
+        if hit:
+            return hit
+
+    pattern = sel.upper()
+    return [
+        i for i, d in enumerate(devices) if fnmatch.fnmatchcase(d["name"].upper(), pattern)
+    ]
+
+
+class Batch:
+    """Staged, all-or-nothing group operation on chillers and power devices."""
+
+    def __init__(self, chillers_data: dict = None, power_data: dict = None):
+        self._chillers = chillers_data
+        self._power = power_data
+        self._staged = {}  # section -> {idx: fields}
+
+    # -------------------------------------------------------------
+    # data access
+    # -------------------------------------------------------------
+    @property
+    def chillers_data(self) -> dict:
+        if self._chillers is None:
+            self._chillers = get_chiller_data()
+        return self._chillers
+
+    @property
+    def power_data(self) -> dict:
+        if self._power is None:
+            self._power = get_power_data()
+        return self._power
+
+    def devices(self, section: str) -> list:
+        if section == "chillers":
+            return self.chillers_data["chillers"]
+        if section in POWER_SECTIONS:
+            return self.power_data[section]
+        raise ControlError("unknown section {!r}".format(section))
+
+    def _pick(self, section: str, selector) -> list:
+        idxs = select(self.devices(section), selector, get_registry().tables.get(section))
+        if not idxs:
+            raise ControlError("{!r} matches no {}".format(selector, section))
+        return idxs
+
+    def _stage(self, section: str, idx: int, fields: dict):
+        self._staged.setdefault(section, {}).setdefault(idx, {}).update(fields)
+
+    def _current(self, section: str, idx: int, field: str):
+        staged = self._staged.get(section, {}).get(idx, {})
+        if field in staged:
+            return staged[field]
+        return self.devices(section)[idx].get(field)
+
+    # -------------------------------------------------------------
+    # operations (validated now, applied on commit)
+    # -------------------------------------------------------------
+    def set_status(self, section: str, selector, status: str) -> list:
+        status = str(status).upper()
+        if status not in STATUSES:
+            raise ControlError("status must be ON or OFF, got {!r}".format(status))
+        idxs = self._pick(section, selector)
+        for i in idxs:
+            self._stage(section, i, {"status": status})
+        return idxs
+
+    def toggle(self, section: str, selector) -> list:
+        idxs = self._pick(section, selector)
+        for i in idxs:
+            status = "OFF" if self._current(section, i, "status") == "ON" else "ON"
+            self._stage(section, i, {"status": status})
+        return idxs
+
+    def set_setpoint(self, selector, setpoint: float, section: str = "chillers") -> list:
+        if section != "chillers":
+            raise ControlError("setpoints only apply to chillers")
+        lo, hi = SETPOINT_RANGE
+        setpoint = float(setpoint)
+        if not lo <= setpoint <= hi:
+            raise ControlError(
+                "setpoint {:.1f} C outside {:.0f}-{:.0f} C".format(setpoint, lo, hi)
+            )
+        idxs = self._pick(section, selector)
+        for i in idxs:
+            self._stage(section, i, {"setpoint": setpoint})
+        return idxs
+
+    def savepoint(self) -> dict:
+        """Copy of the staged changes, for rollback() if a later step fails."""
+        return {s: {i: dict(f) for i, f in by.items()} for s, by in self._staged.items()}
+
+    def rollback(self, savepoint: dict):
+        self._staged = savepoint
+
+    # -------------------------------------------------------------
+    # commit
+    # -------------------------------------------------------------
+    def _diffs(self):
+        """(section, idx, fields) for every staged change that alters a device."""
+        for section, by_idx in self._staged.items():
+            devices = self.devices(section)
+            for idx, fields in sorted(by_idx.items()):
+                diff = {k: v for k, v in fields.items() if devices[idx].get(k) != v}
+                if diff:
+                    yield section, idx, diff
+
+    def pending(self) -> list:
+        """(section, name, fields) that commit() would write."""
+        return [
+            (section, self.devices(section)[idx]["name"], diff)
+            for section, idx, diff in self._diffs()
+        ]
+
+    def commit(self) -> list:
+        """Persist all staged changes; returns what was applied."""
+        applied = self.pending()
+        chillers = {}
+        power = {}
+        for section, idx, diff in self._diffs():
+            if section == "chillers":
+                chillers[idx] = diff
+            else:
+                power.setdefault(section, {})[idx] = diff
+        if chillers:
+            apply_chiller_changes(self.chillers_data, chillers)
+        if power:
+            apply_power_changes(self.power_data, power)
+        self._staged = {}
+        return applied
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self._staged = {}
+        return False
+
+
+# -------------------------------------------------------------
+# Benchmark: python control.py
+# -------------------------------------------------------------
+def _bench(n: int = 20, rounds: int = 5):
+    import os
+    import shutil
+    import tempfile
+
+    from chiller_manager import set_chiller_status
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    tmp = tempfile.mkdtemp()
+    for name in ("config_chillers.json", "config_power.json"):
+        shutil.copy(os.path.join(here, name), tmp)
+    cwd = os.getcwd()
+    os.chdir(tmp)
+    try:
+        looped = batched = 0.0
+        for r in range(rounds):
+            status = "ON" if r % 2 == 0 else "OFF"
+
+            data = get_chiller_data()
+            t0 = time.perf_counter()
+            for i in range(n):
+                set_chiller_status(data, i, status)
+            looped += time.perf_counter() - t0
+
+            status = "OFF" if status == "ON" else "ON"
+            data = get_chiller_data()
+            t0 = time.perf_counter()
+            with Batch(chillers_data=data) as b:
+                b.set_status("chillers", "1-{}".format(n), status)
+            batched += time.perf_counter() - t0
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp)
+
+    print(f"{n} chillers x {rounds} rounds")
+    print(f"  looped single-device calls : {1000 * looped / rounds:8.2f} ms/op")
+    print(f"  one Batch commit           : {1000 * batched / rounds:8.2f} ms/op")
+
+
+if __name__ == "__main__":
+    _bench()
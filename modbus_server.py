@@ -0,0 +1,148 @@
+"""
+Local fake Modbus-TCP server for exercising ModbusTcpDriver.
+
+Serves function code 3 (read holding registers) from an in-memory
+register file per unit id. load_fleet() fills the registers from the
+simulators using the driver's register map and default addressing, so a
+driver pointed at this server reads back what the simulators produced.
+Latency and unit failures can be injected for timeout testing.
+
+    server = FakeModbusServer().start()
+    server.load_fleet("chillers", devices)
+    driver = ModbusTcpDriver(server.host, server.port)
+"""
+
+import asyncio
+import struct
+import threading
+
+import numpy as np
+
+from drivers import (
+    MBAP,
+    READ_HOLDING_REGISTERS,
+    REGISTER_MAPS,
+    default_address,
+    encode_batch,
+)
+from simulator import simulate_fleet_batch
+
+ILLEGAL_FUNCTION = 1
+ILLEGAL_ADDRESS = 2
+DEVICE_FAILURE = 4
+
+
+class FakeModbusServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_s: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency_s = latency_s
+        self.failed_units = set()
+        self.requests = 0
+        self._units = {}  # unit -> np.int16 register file (65536 words)
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    # -------------------------------------------------------------
+    # register file
+    # -------------------------------------------------------------
+    def _unit(self, unit: int) -> np.ndarray:
+        regs = self._units.get(unit)
+        if regs is None:
+            regs = self._units[unit] = np.zeros(65536, dtype=np.int16)
+        return regs
+
+    def write(self, unit: int, start: int, values):
+        values = np.asarray(values, dtype=np.int16).ravel()
+        self._unit(unit)[start : start + values.size] = values
+
+    def load_fleet(self, device_class: str, devices: list, batch: dict = None):
+        """Write a (simulated) batch into the registers at each device's address."""
+        if batch is None:
+            batch = simulate_fleet_batch(device_class, devices)
+        block = encode_batch(device_class, batch)
+        for i, dev in enumerate(devices):
+            unit, base = default_address(device_class, i, dev)
+            self.write(unit, base, block[i])
+
+    def registers_for(self, device_class: str, devices: list) -> np.ndarray:
+        """Current register block of each device, as the driver would read it."""
+        width = len(REGISTER_MAPS[device_class])
+        rows = []
+        for i, dev in enumerate(devices):
+            unit, base = default_address(device_class, i, dev)
+            rows.append(self._unit(unit)[base : base + width])
+        return np.array(rows, dtype=np.float64)
+
+    # -------------------------------------------------------------
+    # protocol
+    # -------------------------------------------------------------
+    def _respond(self, unit: int, pdu: bytes) -> bytes:
+        function = pdu[0]
+        if unit in self.failed_units:
+            return struct.pack(">BB", function | 0x80, DEVICE_FAILURE)
+        if function != READ_HOLDING_REGISTERS:
+            return struct.pack(">BB", function | 0x80, ILLEGAL_FUNCTION)
+        start, count = struct.unpack(">HH", pdu[1:5])
+        if not 1 <= count <= 125 or start + count > 65536:
+            return struct.pack(">BB", function | 0x80, ILLEGAL_ADDRESS)
+        data = self._unit(unit)[start : start + count].astype(">i2").tobytes()
+        return struct.pack(">BB", function, len(data)) + data
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readexactly(MBAP.size)
+                tid, proto, length, unit = MBAP.unpack(header)
+                pdu = await reader.readexactly(length - 1)
+                self.requests += 1
+                if self.latency_s:
+                    await asyncio.sleep(self.latency_s)
+                reply = self._respond(unit, pdu)
+                writer.write(MBAP.pack(tid, proto, len(reply) + 1, unit) + reply)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.CancelledError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    # -------------------------------------------------------------
+    # lifecycle
+    # -------------------------------------------------------------
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="fake-modbus", daemon=True)
+        self._thread.start()
+        started.wait(5)
+        return self
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            handlers = [
+                t for t in asyncio.all_tasks() if t is not asyncio.current_task()
+            ]
+            for t in handlers:
+                t.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = None
@@ -0,0 +1,280 @@
+"""
+Stateful chiller plant model.
+
+Every chiller keeps its own water temperatures and compressor stage
+between ticks, and the whole fleet advances together in fixed dt steps
+(NumPy arrays, one element per chiller):
+
+  - Supply temperature follows the setpoint with a first-order lag while
+    the compressors have spare capacity. Once they are saturated it drifts
+    with the energy balance of the loop's thermal mass.
+  - The load reaches the loop through coils, so it scales with the
+    difference between ZONE_C and supply: at setpoint it is the full
+    share, and a loop warming toward the zone picks up less. An
+    undersized plant settles below ZONE_C instead of heating without bound.
+  - Compressors stage up/down with hysteresis (2 x 50% per chiller).
+  - Return (inlet) temperature comes from the load share and water flow.
+  - Electrical power = rated kW x EIR(part-load) x EIR(temperatures).
+
+Readings use the same keys as simulator.simulate_chiller, so the model can
+replace the random simulator anywhere a chiller readings dict is expected.
+"""
+
+import math
+import time
+
+import numpy as np
+
+CP_WATER = 4.186  # kJ/kg.K
+
+CAPACITY_KW = 1055.0  # cooling capacity per chiller (300 TR)
+RATED_COP = 4.0
+DESIGN_FLOW = 230.0  # m3/h
+LOOP_MASS_KG = 20000.0  # water mass seen by each chiller's evaporator
+CONTROL_TAU_S = 120.0  # closed-loop supply temperature time constant
+IDLE_TAU_S = 1800.0  # OFF chillers drift toward the plant room temperature
+ZONE_C = 35.0  # air temperature the cooling coils take heat from
+N_STAGES = 2
+
+
+def design_load_kw(t: float) -> float:
+    """Default building cooling load: diurnal swing around ~8 chillers' worth."""
+    hour = (t / 3600.0) % 24.0
+    return CAPACITY_KW * (8.0 + 2.0 * math.sin((hour - 9.0) / 24.0 * 2 * math.pi))
+
+
+def design_ambient(t: float) -> float:
+    """Default outdoor temperature: 30 C +/- 3 C, peaking mid-afternoon."""
+    hour = (t / 3600.0) % 24.0
+    return 30.0 + 3.0 * math.sin((hour - 9.0) / 24.0 * 2 * math.pi)
+
+
+def eir_part_load(plr: np.ndarray) -> np.ndarray:
+    """Electric input ratio vs part-load ratio (1.0 at full load)."""
+    return 0.2 + 0.15 * plr + 0.65 * plr * plr
+
+
+def eir_temperature(ambient, supply: np.ndarray) -> np.ndarray:
+    """Hotter condensing air or colder leaving water both cost power."""
+    return np.clip(1.0 + 0.025 * (ambient - 30.0) - 0.02 * (supply - 18.0), 0.5, 1.5)
+
+
+class ChillerPlantModel:
+    """Vectorized, incrementally stepped model of the whole chiller fleet."""
+
+    def __init__(
+        self,
+        n: int,
+        capacity_kw=CAPACITY_KW,
+        rated_cop=RATED_COP,
+        design_flow=DESIGN_FLOW,
+        noise: float = 0.0,
+        seed=None,
+    ):
+        self.n = n
+        self.capacity_kw = np.broadcast_to(
+            np.asarray(capacity_kw, dtype=np.float64), (n,)
+        ).copy()
+        self.rated_kw = self.capacity_kw / rated_cop
+        self.design_flow = np.broadcast_to(
+            np.asarray(design_flow, dtype=np.float64), (n,)
+        ).copy()
+        self.noise = noise
+        self._rng = np.random.default_rng(seed)
+
+        # inputs (edited by the UI through status / setpoint)
+        self.on = np.zeros(n, dtype=bool)
+        self.setpoint = np.full(n, 21.0)
+
+        # state
+        self.t = 0.0
+        self.supply = np.full(n, 24.0)
+        self.inlet = np.full(n, 24.0)
+        self.stages = np.zeros(n, dtype=np.int8)
+        self.q_evap = np.zeros(n)
+        self.power = np.zeros(n)
+        self.flow = np.zeros(n)
+        self.ambient = 30.0
+
+    # -------------------------------------------------------------
+    # inputs
+    # -------------------------------------------------------------
+    def sync(self, devices: list):
+        """Pick up status / setpoint from a config device list."""
+        self.on[:] = [d.get("status") == "ON" for d in devices]
+        self.setpoint[:] = [float(d.get("setpoint", 21.0)) for d in devices]
+
+    # -------------------------------------------------------------
+    # dynamics
+    # -------------------------------------------------------------
+    def step(self, dt: float, load_kw: float, ambient: float):
+        """Advance every chiller by dt seconds under a plant cooling load."""
+        on = self.on
+        n_on = int(on.sum())
+        self.ambient = ambient
+
+        self.flow = np.where(on, self.design_flow, 0.0)
+        m_dot = self.flow * 1000.0 / 3600.0  # kg/s
+        share = np.where(on, load_kw / max(n_on, 1), 0.0)
+        # kW the coils hand the loop per K of zone-to-supply difference
+        gain = share / np.maximum(ZONE_C - self.setpoint, 1.0)
+        load = gain * np.maximum(ZONE_C - self.supply, 0.0)
+
+        # capacity needed to carry the load and pull supply toward setpoint
+        mass_cp = LOOP_MASS_KG * CP_WATER
+        demand = load + mass_cp / CONTROL_TAU_S * (self.supply - self.setpoint)
+        desired_plr = np.clip(demand / self.capacity_kw, 0.0, 1.0)
+
+        # stage with hysteresis: up above 95% of current stages, down below 80%
+        stage_frac = self.stages / N_STAGES
+        up = desired_plr > stage_frac * 0.95
+        down = desired_plr < (self.stages - 1) / N_STAGES * 0.8
+        stages = self.stages + up.astype(np.int8) - down.astype(np.int8)
+        self.stages = np.where(on, np.clip(stages, 1, N_STAGES), 0).astype(np.int8)
+
+        available = self.capacity_kw * self.stages / N_STAGES
+        q = np.clip(demand, 0.0, available)
+        saturated = (demand > available) | (demand < 0.0)
+
+        # first-order lag where unsaturated, energy balance where saturated
+        lag = self.setpoint + (self.supply - self.setpoint) * math.exp(
+            -dt / CONTROL_TAU_S
+        )
+        # exact solution of mass_cp dT/dt = gain (ZONE_C - T) - q
+        with np.errstate(divide="ignore", invalid="ignore"):
+            settle = np.where(gain > 0, ZONE_C - q / gain, self.supply)
+        drift = settle + (self.supply - settle) * np.exp(-gain * dt / mass_cp)
+        idle = ambient + (self.supply - ambient) * math.exp(-dt / IDLE_TAU_S)
+        self.supply = np.where(on, np.where(saturated, drift, lag), idle)
+
+        self.q_evap = np.where(on, q, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            load = gain * np.maximum(ZONE_C - self.supply, 0.0)
+            rise = np.where(m_dot > 0, load / (m_dot * CP_WATER), 0.0)
+        self.inlet = np.where(on, self.supply + rise, self.supply)
+
+        plr = np.where(on, self.q_evap / self.capacity_kw, 0.0)
+        self.power = np.where(
+            on,
+            self.rated_kw * eir_part_load(plr) * eir_temperature(ambient, self.supply),
+            0.0,
+        )
+        self.t += dt
+
+    # -------------------------------------------------------------
+    # outputs
+    # -------------------------------------------------------------
+    def readings(self) -> dict:
+        """Current readings as arrays, keyed like simulate_chiller."""
+        on = self.on
+        plr = np.where(on, self.q_evap / self.capacity_kw, 0.0)
+        comp1 = np.where(self.stages == 1, np.minimum(plr * N_STAGES, 1.0), plr)
+        comp2 = np.where(self.stages >= 2, plr, 0.0)
+
+        out = {
+            "supply": self.supply,
+            "inlet": self.inlet,
+            "outlet": self.supply,
+            "ambient": np.full(self.n, self.ambient),
+            "comp1": comp1 * 100.0,
+            "comp2": comp2 * 100.0,
+            "power": self.power,
+            "flow": self.flow,
+        }
+        if self.noise:
+            out = {
+                k: v + self._rng.normal(0.0, self.noise, self.n) for k, v in out.items()
+            }
+        return {k: np.round(np.where(on, v, 0.0), 2) for k, v in out.items()}
+
+    # -------------------------------------------------------------
+    # accelerated what-if runs
+    # -------------------------------------------------------------
+    def run(
+        self,
+        duration_s: float,
+        dt: float = 60.0,
+        load_profile=design_load_kw,
+        ambient_profile=design_ambient,
+        schedule=None,
+    ) -> dict:
+        """
+        Step the model for duration_s and return plant-level time series:
+        t, load_kw, plant_kw, cooling_kw, mean_supply, max_supply, running.
+
+        schedule(model, t) may change model.on / model.setpoint between
+        steps (e.g. a staging policy under test).
+        """
+        steps = int(round(duration_s / dt))
+        series = {
+            k: np.empty(steps)
+            for k in (
+                "t",
+                "load_kw",
+                "plant_kw",
+                "cooling_kw",
+                "mean_supply",
+                "max_supply",
+                "running",
+            )
+        }
+        for i in range(steps):
+            if schedule is not None:
+                schedule(self, self.t)
+            load = load_profile(self.t)
+            self.step(dt, load, ambient_profile(self.t))
+            on = self.on
+            series["t"][i] = self.t
+            series["load_kw"][i] = load
+            series["plant_kw"][i] = self.power.sum()
+            series["cooling_kw"][i] = self.q_evap.sum()
+            series["mean_supply"][i] = self.supply[on].mean() if on.any() else 0.0
+            series["max_supply"][i] = self.supply[on].max() if on.any() else 0.0
+            series["running"][i] = on.sum()
+        return series
+
+
+def run_scenario(devices: list, hours: float = 24.0, dt: float = 60.0, **kwargs):
+    """What-if run for a config device list (status / setpoint as in the UI)."""
+    model = ChillerPlantModel(len(devices))
+    model.sync(devices)
+    return model.run(hours * 3600.0, dt, **kwargs)
+
+
+class LivePlant:
+    """Wall-clock driver used by the scheduler: one model, stepped per tick."""
+
+    def __init__(self, noise: float = 0.05):
+        self.noise = noise
+        self.model = None
+        self.names = ()
+        self._last = None
+
+    def tick(self, devices: list) -> dict:
+        names = tuple(d["name"] for d in devices)
+        if self.model is None or names != self.names:
+            self.model = ChillerPlantModel(len(devices), noise=self.noise)
+            self.names = names
+            self._last = None
+        self.model.sync(devices)
+
+        now = time.time()
+        dt = 1.0 if self._last is None else min(max(now - self._last, 0.0), 60.0)
+        self._last = now
+        local = now + time.localtime(now).tm_gmtoff
+        self.model.step(dt, design_load_kw(local), design_ambient(local))
+        return self.model.readings()
+
+
+if __name__ == "__main__":
+    devices = [
+        {"name": f"CH-{i}", "status": "ON" if i <= 10 else "OFF", "setpoint": 21.0}
+        for i in range(1, 31)
+    ]
+    t0 = time.perf_counter()
+    out = run_scenario(devices, hours=24, dt=10)
+    elapsed = time.perf_counter() - t0
+    print(f"24h at dt=10s for {len(devices)} chillers in {elapsed * 1e3:.1f} ms")
+    print(f"  energy      : {out['plant_kw'].sum() * 10 / 3600:.0f} kWh")
+    print(f"  peak kW     : {out['plant_kw'].max():.0f}")
+    print(f"  max supply  : {out['max_supply'].max():.2f} C")
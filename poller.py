@@ -0,0 +1,271 @@
+"""
+Asyncio device poller with deadlines, stale values and backpressure.
+
+Reads go through per-device functions with the simulate_* signature,
+read(device) -> readings dict. Plain functions run on a bounded thread
+pool, and coroutine functions are awaited directly. Each cycle reads a
+whole device class concurrently with these guarantees:
+
+  - at most max_concurrency reads are in flight;
+  - every read has its own timeout, so one slow or offline device cannot
+    hold up the cycle;
+  - a failed read returns the device's last good values, marked stale,
+    with their age in seconds;
+  - a plain function that overruns its deadline keeps its thread (Python
+    cannot interrupt it). Until that call returns, the device is reported
+    stale ("busy") without submitting another read, so a hung device holds
+    at most one thread. The pool has max_hung threads beyond
+    max_concurrency, so up to that many hung devices leave the shared
+    workers free;
+  - published cycles go into a bounded queue. When consumers fall behind
+    and the queue is full, the poller waits instead of piling up cycles,
+    so the polling rate drops to the rate at which cycles are consumed.
+
+Per-class read latencies are kept in a bounded window for percentiles.
+PollerDriver exposes one poll cycle through the drivers.Driver interface
+so the scheduler can use it like any other source.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from drivers import Driver
+from simulator import (
+    simulate_chiller,
+    simulate_genset,
+    simulate_pahu,
+    simulate_transformer,
+    simulate_ups,
+)
+
+READ_FNS = {
+    "chillers": simulate_chiller,
+    "transformers": simulate_transformer,
+    "ups": simulate_ups,
+    "genset": simulate_genset,
+    "pahu": simulate_pahu,
+}
+
+LATENCY_WINDOW = 4096
+
+# values: readings dict (last good when stale, {} if never read)
+Reading = namedtuple("Reading", ["name", "values", "ts", "age", "stale", "error"])
+PollCycle = namedtuple("PollCycle", ["device_class", "seq", "ts", "readings"])
+
+
+class AsyncPoller:
+    def __init__(
+        self,
+        read_fns: dict = None,
+        max_concurrency: int = 32,
+        timeout: float = 0.5,
+        max_pending: int = 4,
+        max_hung: int = None,
+    ):
+        self.read_fns = dict(read_fns or READ_FNS)
+        self.max_concurrency = max_concurrency
+        self.max_hung = max_concurrency if max_hung is None else max_hung
+        self.timeout = timeout
+        self.cycles = queue.Queue(maxsize=max_pending)
+        self.stats = {
+            "cycles": 0, "reads": 0, "timeouts": 0, "errors": 0, "busy": 0, "throttled": 0
+        }
+        self._last_good = {}  # (device_class, name) -> (values, ts)
+        self._hung = {}  # (device_class, name) -> future of an overrun sync read
+        self._latency = {}  # device_class -> deque of seconds
+        self._seq = 0
+        self._executor = ThreadPoolExecutor(
+            max_concurrency + self.max_hung, thread_name_prefix="poll"
+        )
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="bms-poller", daemon=True
+        )
+        self._thread.start()
+        self._tasks = {}
+
+    # -------------------------------------------------------------
+    # one cycle
+    # -------------------------------------------------------------
+    def _stale(self, key: tuple, error: str) -> Reading:
+        now = time.time()
+        values, ts = self._last_good.get(key, ({}, None))
+        age = now - ts if ts is not None else float("inf")
+        return Reading(key[1], values, ts, age, True, error)
+
+    async def _read_one(self, device_class: str, device: dict, slots) -> Reading:
+        fn = self.read_fns[device_class]
+        name = device["name"]
+        key = (device_class, name)
+        if key in self._hung:
+            # the previous read is still stuck in its thread
+            self.stats["busy"] += 1
+            return self._stale(key, "busy")
+        async with slots:
+            t0 = time.perf_counter()
+            error = None
+            future = None
+            try:
+                if asyncio.iscoroutinefunction(fn):
+                    call = fn(device)
+                else:
+                    future = self._executor.submit(fn, device)
+                    call = asyncio.wrap_future(future, loop=self._loop)
+                values = await asyncio.wait_for(call, self.timeout)
+            except asyncio.TimeoutError:
+                error = "timeout"
+                self.stats["timeouts"] += 1
+                if future is not None and not future.cancel():
+                    self._hung[key] = future
+                    future.add_done_callback(lambda _: self._hung.pop(key, None))
+            except Exception as e:
+                error = "{}: {}".format(type(e).__name__, e)
+                self.stats["errors"] += 1
+            elapsed = time.perf_counter() - t0
+
+        self.stats["reads"] += 1
+        self._latency.setdefault(device_class, deque(maxlen=LATENCY_WINDOW)).append(elapsed)
+        now = time.time()
+        if error is None:
+            self._last_good[key] = (values, now)
+            return Reading(name, values, now, 0.0, False, None)
+        return self._stale(key, error)
+
+    async def poll_cycle(self, device_class: str, devices: list) -> PollCycle:
+        slots = asyncio.Semaphore(self.max_concurrency)
+        readings = await asyncio.gather(
+            *(self._read_one(device_class, d, slots) for d in devices)
+        )
+        self._seq += 1
+        self.stats["cycles"] += 1
+        return PollCycle(device_class, self._seq, time.time(), list(readings))
+
+    def poll(self, device_class: str, devices: list) -> PollCycle:
+        """Run one cycle from a synchronous caller."""
+        return asyncio.run_coroutine_threadsafe(
+            self.poll_cycle(device_class, devices), self._loop
+        ).result()
+
+    # -------------------------------------------------------------
+    # continuous polling with backpressure
+    # -------------------------------------------------------------
+    async def _run(self, device_class: str, get_devices, period: float):
+        while True:
+            started = time.monotonic()
+            # backpressure: do not produce while consumers are behind
+            while self.cycles.full():
+                self.stats["throttled"] += 1
+                await asyncio.sleep(period / 4)
+            cycle = await self.poll_cycle(device_class, get_devices())
+            self.cycles.put_nowait(cycle)
+            await asyncio.sleep(max(period - (time.monotonic() - started), 0.0))
+
+    def start(self, device_class: str, get_devices, period: float = 1.0):
+        """Poll device_class every period seconds into self.cycles."""
+        self.stop(device_class)
+        self._tasks[device_class] = asyncio.run_coroutine_threadsafe(
+            self._run(device_class, get_devices, period), self._loop
+        )
+
+    def stop(self, device_class: str = None):
+        classes = list(self._tasks) if device_class is None else [device_class]
+        for c in classes:
+            task = self._tasks.pop(c, None)
+            if task is not None:
+                task.cancel()
+
+    def close(self):
+        self.stop()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # -------------------------------------------------------------
+    # introspection
+    # -------------------------------------------------------------
+    def latency_percentiles(self, device_class: str, pcts=(50, 90, 99)) -> dict:
+        """Read latency percentiles in milliseconds over the recent window."""
+        window = self._latency.get(device_class)
+        if not window:
+            return {}
+        values = np.percentile(np.fromiter(window, dtype=np.float64), pcts) * 1000.0
+        return {"p{}".format(p): round(float(v), 3) for p, v in zip(pcts, values)}
+
+    def stale(self, device_class: str, max_age: float = 0.0) -> dict:
+        """name -> age of every device whose last good value is older than max_age."""
+        now = time.time()
+        out = {}
+        for (cls, name), (_, ts) in self._last_good.items():
+            if cls == device_class and now - ts > max_age:
+                out[name] = now - ts
+        return out
+
+
+class PollerDriver(Driver):
+    """
+    One AsyncPoller cycle per read(). Stale devices report their last
+    good values; devices never read report NaN.
+    """
+
+    def __init__(self, poller: AsyncPoller = None):
+        self.poller = poller or AsyncPoller()
+        self.last_cycle = None
+
+    def read(self, device_class: str, devices: list) -> dict:
+        cycle = self.poller.poll(device_class, devices)
+        self.last_cycle = cycle
+        fields = []
+        for r in cycle.readings:
+            for k in r.values:
+                if k not in fields:
+                    fields.append(k)
+        return {
+            f: np.array(
+                [r.values.get(f, np.nan) for r in cycle.readings], dtype=np.float64
+            )
+            for f in fields
+        }
+
+    def close(self):
+        self.poller.close()
+
+
+# -------------------------------------------------------------
+# Benchmark: python poller.py
+# -------------------------------------------------------------
+def _bench(n_devices: int = 1000, cycles: int = 5):
+    import random
+
+    async def flaky_ups(device):
+        # most devices answer in a few ms, 2% hang past the deadline
+        if random.random() < 0.02:
+            await asyncio.sleep(5.0)
+        await asyncio.sleep(random.uniform(0.001, 0.02))
+        return simulate_ups(device)
+
+    devices = [{"name": "UPS{}".format(i + 1), "status": "ON"} for i in range(n_devices)]
+    poller = AsyncPoller({"ups": flaky_ups}, max_concurrency=200, timeout=0.25)
+    try:
+        t0 = time.perf_counter()
+        for _ in range(cycles):
+            cycle = poller.poll("ups", devices)
+        elapsed = (time.perf_counter() - t0) / cycles
+        stale = sum(r.stale for r in cycle.readings)
+    finally:
+        poller.close()
+
+    print(f"{n_devices} UPS per cycle, 2% hanging, 250 ms deadline")
+    print(f"  cycle time      : {1000 * elapsed:8.1f} ms")
+    print(f"  stale last cycle: {stale}")
+    print(f"  latency (ms)    : {poller.latency_percentiles('ups')}")
+    print(f"  stats           : {poller.stats}")
+
+
+if __name__ == "__main__":
+    _bench()
@@ -1,34 +1,72 @@
-from utils import load_power, save_power
+from utils import edit_record, load_power, update_device, update_devices
+
+# (section, name) -> change counter; bumped on every control write
+_versions = {}
+
+
+def _bump(section: str, name: str):
+    _versions[(section, name)] = _versions.get((section, name), 0) + 1
+
+
+def device_version(section: str, name: str) -> int:
+    """
+    Change counter for the table renderer's memo key. It is per-process:
+    writes journaled by other processes do not bump it. Memoized columns
+    stay correct only because the key also holds the device's status,
+    which comes from the shared config.
+    """
+    return _versions.get((section, name), 0)
 
 
 def get_power_data():
     return load_power()
 
 
-def toggle_transformer(power_data: dict, idx: int):
-    tr = power_data["transformers"][idx]
-    tr["status"] = "OFF" if tr["status"] == "ON" else "ON"
-    save_power(power_data)
+def set_power_status(power_data: dict, section: str, idx: int, status: str):
+    """Set ON/OFF for one device in a power section and persist just that device."""
+    dev = edit_record(power_data, section, idx)
+    dev["status"] = status
+    update_device(section, dev["name"], {"status": status})
+    _bump(section, dev["name"])
     return power_data
 
 
+def _toggle(power_data: dict, section: str, idx: int):
+    dev = power_data[section][idx]
+    status = "OFF" if dev["status"] == "ON" else "ON"
+    return set_power_status(power_data, section, idx, status)
+
+
+def toggle_transformer(power_data: dict, idx: int):
+    return _toggle(power_data, "transformers", idx)
+
+
 def toggle_ups(power_data: dict, idx: int):
-    u = power_data["ups"][idx]
-    u["status"] = "OFF" if u["status"] == "ON" else "ON"
-    save_power(power_data)
-    return power_data
+    return _toggle(power_data, "ups", idx)
 
 
 def toggle_genset(power_data: dict, idx: int):
-    g = power_data["genset"][idx]
-    g["status"] = "OFF" if g["status"] == "ON" else "ON"
-    save_power(power_data)
-    return power_data
+    return _toggle(power_data, "genset", idx)
 
 
 def toggle_pahu(power_data: dict, idx: int):
     """Toggle PAHU ON/OFF."""
-    p = power_data["pahu"][idx]
-    p["status"] = "OFF" if p["status"] == "ON" else "ON"
-    save_power(power_data)
+    return _toggle(power_data, "pahu", idx)
+
+
+def apply_changes(power_data: dict, changes: dict):
+    """
+    Apply {section: {idx: fields}} across power sections and persist them
+    as one journal record.
+    """
+    records = []
+    for section, by_idx in changes.items():
+        for idx, fields in by_idx.items():
+            dev = edit_record(power_data, section, idx)
+            dev.update(fields)
+            records.append({"section": section, "name": dev["name"], "fields": fields})
+    if records:
+        update_devices(records)
+        for rec in records:
+            _bump(rec["section"], rec["name"])
     return power_data
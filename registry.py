@@ -0,0 +1,258 @@
+"""
+Compact device registry.
+
+Each config section is held as a DeviceTable, stored column-wise instead
+of as a list of dicts:
+
+    names     list of str              index -> name
+    index     dict                     name -> index
+    on        np.bool_ array           status == "ON"
+    setpoint  np.float64 array         NaN where a device has none
+    tags      dict tag -> np.int32     sorted member indices
+
+Uncommon per-device keys (e.g. "modbus") are kept in a sparse side
+table, so they survive a load/save round trip without costing every
+device a dict. state() returns the on / setpoint arrays themselves, in
+the shape simulator.fleet_state() produces, so simulating from a table
+does not copy.
+
+The registry loads from config_chillers.json and config_power.json
+through utils. save() writes only the devices changed since the last save,
+as one record per config file in its journal (utils.update_devices).
+
+get_registry() holds the registry for the current config and rebuilds it
+when either file changes. control.select uses it for name and tag
+lookups, so app, voice and sequencer commands do not scan the device
+lists. That registry is one shared instance for the whole process: its
+dirty state is seen by every session and dropped on the next rebuild, so
+treat it as read-only and edit through DeviceRegistry.from_config().
+"""
+
+import threading
+
+import numpy as np
+
+from utils import get_snapshot, load_chillers, load_power, update_devices
+
+POWER_SECTIONS = ("transformers", "ups", "genset", "pahu")
+_CORE_KEYS = ("name", "status", "setpoint", "tags")
+
+
+class DeviceTable:
+    __slots__ = ("section", "names", "index", "on", "setpoint", "tags", "extra", "dirty")
+
+    def __init__(self, section: str, devices: list):
+        n = len(devices)
+        self.section = section
+        self.names = [d["name"] for d in devices]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.on = np.fromiter(
+            (d.get("status") == "ON" for d in devices), dtype=bool, count=n
+        )
+        self.setpoint = np.fromiter(
+            (d.get("setpoint", np.nan) for d in devices), dtype=np.float64, count=n
+        )
+        members = {}
+        self.extra = {}
+        for i, d in enumerate(devices):
+            for tag in d.get("tags", ()):
+                members.setdefault(tag, []).append(i)
+            rest = {k: v for k, v in d.items() if k not in _CORE_KEYS}
+            if rest:
+                self.extra[i] = rest
+        self.tags = {t: np.array(ix, dtype=np.int32) for t, ix in members.items()}
+        self.dirty = {}  # index -> fields changed since the last save
+
+    def __len__(self):
+        return len(self.names)
+
+    # -------------------------------------------------------------
+    # lookups
+    # -------------------------------------------------------------
+    def idx(self, name: str) -> int:
+        return self.index[name]
+
+    def status(self, i: int) -> str:
+        return "ON" if self.on[i] else "OFF"
+
+    def find(self, name: str):
+        """Index of a device name (exact, then upper-case), or None."""
+        i = self.index.get(name)
+        return self.index.get(name.upper()) if i is None else i
+
+    def tagged(self, tag: str) -> np.ndarray:
+        return self.tags.get(tag, np.empty(0, dtype=np.int32))
+
+    def tagged_ci(self, tag: str) -> list:
+        """Sorted member indices of a tag, ignoring case."""
+        tag = tag.lower()
+        ix = [self.tags[t] for t in self.tags if t.lower() == tag]
+        return np.unique(np.concatenate(ix)).tolist() if ix else []
+
+    def tags_of(self, i: int) -> list:
+        out = []
+        for tag, ix in self.tags.items():
+            pos = np.searchsorted(ix, i)
+            if pos < len(ix) and ix[pos] == i:
+                out.append(tag)
+        return out
+
+    def state(self) -> dict:
+        """Zero-copy {"on", "setpoint"} view, as simulator.fleet_state returns."""
+        return {"on": self.on, "setpoint": self.setpoint}
+
+    # -------------------------------------------------------------
+    # updates
+    # -------------------------------------------------------------
+    def set_status(self, i: int, status: str):
+        self.on[i] = status == "ON"
+        self.dirty.setdefault(i, {})["status"] = self.status(i)
+
+    def set_setpoint(self, i: int, setpoint: float):
+        self.setpoint[i] = setpoint
+        self.dirty.setdefault(i, {})["setpoint"] = float(setpoint)
+
+    def add_tag(self, tag: str, indices):
+        indices = np.asarray(indices, dtype=np.int32)
+        ix = np.union1d(self.tagged(tag), indices)
+        self.tags[tag] = ix.astype(np.int32)
+        for i in indices.tolist():
+            self.dirty.setdefault(i, {})["tags"] = self.tags_of(i)
+
+    # -------------------------------------------------------------
+    # dict form (config files, legacy callers)
+    # -------------------------------------------------------------
+    def device(self, i: int) -> dict:
+        d = {"name": self.names[i], "status": self.status(i)}
+        if not np.isnan(self.setpoint[i]):
+            d["setpoint"] = float(self.setpoint[i])
+        tags = self.tags_of(i)
+        if tags:
+            d["tags"] = tags
+        d.update(self.extra.get(i, {}))
+        return d
+
+    def to_dicts(self) -> list:
+        return [self.device(i) for i in range(len(self))]
+
+
+class DeviceRegistry:
+    """All device tables plus a name -> (section, index) map across sections."""
+
+    __slots__ = ("tables", "_where", "_other")
+
+    def __init__(self, chillers_data: dict = None, power_data: dict = None):
+        self.tables = {}
+        self._other = {}  # non-device config keys per file, e.g. "topology"
+        if chillers_data is not None:
+            self._load("chillers", chillers_data, ("chillers",))
+        if power_data is not None:
+            self._load("power", power_data, POWER_SECTIONS)
+        self._where = {
+            name: (section, i)
+            for section, table in self.tables.items()
+            for i, name in enumerate(table.names)
+        }
+
+    def _load(self, file_key: str, data: dict, sections: tuple):
+        for section in sections:
+            self.tables[section] = DeviceTable(section, data.get(section, []))
+        self._other[file_key] = {k: v for k, v in data.items() if k not in sections}
+
+    @classmethod
+    def from_config(cls) -> "DeviceRegistry":
+        return cls(load_chillers(), load_power())
+
+    def __getitem__(self, section: str) -> DeviceTable:
+        return self.tables[section]
+
+    def lookup(self, name: str) -> tuple:
+        """(section, index) of a device name, e.g. an alarm source "CH-5"."""
+        return self._where[name]
+
+    def to_config(self) -> tuple:
+        """(chillers_data, power_data) dicts in the config file layout."""
+        chillers = dict(self._other.get("chillers", {}))
+        chillers["chillers"] = self.tables["chillers"].to_dicts()
+        power = {s: self.tables[s].to_dicts() for s in POWER_SECTIONS if s in self.tables}
+        power.update(self._other.get("power", {}))
+        return chillers, power
+
+    def save(self) -> int:
+        """
+        Journal the devices changed since the last save, one record per
+        config file (via utils.update_devices); returns how many devices.
+        """
+        records = [
+            {"section": section, "name": table.names[i], "fields": fields}
+            for section, table in self.tables.items()
+            for i, fields in table.dirty.items()
+        ]
+        if records:
+            update_devices(records)
+        for table in self.tables.values():
+            table.dirty = {}
+        return len(records)
+
+
+_registry = None
+_registry_key = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> DeviceRegistry:
+    """
+    Shared, read-only registry of the current config, rebuilt when either
+    config file changes. Callers that edit devices build their own
+    DeviceRegistry so dirty state stays with them.
+    """
+    global _registry, _registry_key
+    chillers, power = get_snapshot("chillers"), get_snapshot("power")
+    with _registry_lock:
+        if _registry_key != (chillers.version, power.version):
+            _registry = DeviceRegistry(chillers.data, power.data)
+            _registry_key = (chillers.version, power.version)
+        return _registry
+
+
+# -------------------------------------------------------------
+# Benchmark: python registry.py
+# -------------------------------------------------------------
+def _bench(n: int = 100_000):
+    import time
+    import tracemalloc
+
+    # names are needed either way; measure what each layout adds on top
+    names = ["CH-{}".format(i + 1) for i in range(n)]
+    tracemalloc.start()
+
+    base = tracemalloc.get_traced_memory()[0]
+    dicts = [
+        {"name": name, "status": "ON" if i % 3 else "OFF", "setpoint": 21.0 + i % 5}
+        for i, name in enumerate(names)
+    ]
+    dict_bytes = tracemalloc.get_traced_memory()[0] - base
+
+    base = tracemalloc.get_traced_memory()[0]
+    table = DeviceTable("chillers", dicts)
+    table_bytes = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+
+    t0 = time.perf_counter()
+    for name in names[::7]:
+        table.idx(name)
+    lookup = (time.perf_counter() - t0) / len(names[::7])
+
+    t0 = time.perf_counter()
+    for name in names[:: n // 100]:
+        next(i for i, d in enumerate(dicts) if d["name"] == name)
+    scan = (time.perf_counter() - t0) / len(names[:: n // 100])
+
+    print(f"{n} chillers")
+    print(f"  list of dicts : {dict_bytes / n:8.0f} bytes/device")
+    print(f"  DeviceTable   : {table_bytes / n:8.0f} bytes/device (incl. name index)")
+    print(f"  name -> index : {lookup * 1e9:10.0f} ns (linear scan {scan * 1e9:,.0f} ns)")
+
+
+if __name__ == "__main__":
+    _bench()
@@ -0,0 +1,224 @@
+"""
+Background acquisition scheduler.
+
+A single daemon thread ticks the simulators for every device class at a
+fixed rate and publishes the latest readings as an immutable snapshot.
+Streamlit sessions are threads of one server process, so every browser
+tab reads the same published snapshot instead of simulating on render.
+"""
+
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from drivers import SimulatorDriver
+from plant_model import LivePlant
+from topology import LiveGrid
+from simulator import batch_to_rows
+from telemetry_store import get_store
+from utils import get_snapshot
+
+log = logging.getLogger(__name__)
+
+# device_class -> (config section, tick period in seconds)
+DEVICE_CLASSES = {
+    "chillers": ("chillers", 1.0),
+    "transformers": ("power", 1.0),
+    "ups": ("power", 1.0),
+    "genset": ("power", 1.0),
+    "pahu": ("power", 1.0),
+}
+
+FleetReadings = namedtuple(
+    "FleetReadings", ["device_class", "seq", "ts", "config_version", "names", "rows"]
+)
+
+
+class SimulationScheduler:
+    """Tick every device class on its own period and publish the results."""
+
+    def __init__(self, device_classes: dict = None, record: bool = True):
+        self.device_classes = dict(device_classes or DEVICE_CLASSES)
+        self.record = record
+        self._latest = {}
+        self._seq = 0
+        self._tick_lock = threading.Lock()
+        # the plant model and load flow are shared by every class and are
+        # also ticked from session threads through latest()
+        self._source_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._due = {c: 0.0 for c in self.device_classes}
+        self._jobs = {}  # name -> (period, fn)
+        self._listeners = []  # fn(readings, batch) after every tick
+
+        # chillers come from the stateful plant model, transformers / UPS /
+        # gensets from the load-flow engine, PAHUs from the random simulator;
+        # a driver registered with set_driver() replaces any of these
+        self._plant = LivePlant()
+        self.grid = LiveGrid()
+        self._sources = {"chillers": self._tick_chillers}
+        for device_class in ("transformers", "ups", "genset"):
+            self._sources[device_class] = self._grid_source(device_class)
+        self._default_driver = SimulatorDriver()
+        self._drivers = {}
+
+    # -------------------------------------------------------------
+    # lifecycle
+    # -------------------------------------------------------------
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="bms-scheduler", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        for driver in self._drivers.values():
+            driver.close()
+        self._drivers = {}
+
+    def add_job(self, name: str, period: float, fn):
+        """Run fn() every period seconds on the scheduler thread."""
+        self._jobs[name] = (period, fn)
+        self._due[name] = 0.0
+        self._wake.set()
+
+    def add_listener(self, fn):
+        """
+        Call fn(readings, batch) after every tick: the published
+        FleetReadings (class, ts, names, ...) and the raw column arrays.
+        """
+        self._listeners.append(fn)
+
+    def set_driver(self, device_class: str, driver):
+        """Acquire device_class through driver (None restores the simulation)."""
+        old = self._drivers.pop(device_class, None)
+        if driver is not None:
+            self._drivers[device_class] = driver
+        if old is not None and old is not driver:
+            old.close()
+        self.request_tick(device_class)
+
+    def request_tick(self, device_class: str):
+        """Make the next loop iteration refresh device_class right away."""
+        self._due[device_class] = 0.0
+        self._wake.set()
+
+    # -------------------------------------------------------------
+    # ticking
+    # -------------------------------------------------------------
+    def _tick_chillers(self, devices: list, snap) -> dict:
+        batch = self._plant.tick(devices)
+        self.grid.set_demand("MECH-A", batch["power"].sum())
+        return batch
+
+    def _grid_source(self, device_class: str):
+        def source(devices: list, snap) -> dict:
+            return self.grid.tick(device_class, devices, snap.data, snap.version)
+
+        return source
+
+    def tick(self, device_class: str) -> FleetReadings:
+        """Acquire one device class now and publish the snapshot."""
+        section, _ = self.device_classes[device_class]
+        snap = get_snapshot(section)
+        devices = snap.data[device_class]
+        driver = self._drivers.get(device_class)
+        source = self._sources.get(device_class)
+        with self._source_lock:
+            if driver is not None:
+                batch = driver.read(device_class, devices)
+                if device_class == "chillers":
+                    self.grid.set_demand("MECH-A", float(np.nansum(batch["power"])))
+            elif source is not None:
+                batch = source(devices, snap)
+            else:
+                batch = self._default_driver.read(device_class, devices)
+        names = tuple(d["name"] for d in devices)
+
+        with self._tick_lock:
+            self._seq += 1
+            ts = time.time()
+            readings = FleetReadings(
+                device_class, self._seq, ts, snap.version, names, batch_to_rows(batch)
+            )
+            self._latest[device_class] = readings
+            if self.record:
+                try:
+                    get_store().append(device_class, list(names), batch, ts)
+                except Exception:
+                    # listeners still get the tick when persistence fails
+                    log.exception("telemetry append failed for %s", device_class)
+        for fn in self._listeners:
+            try:
+                fn(readings, batch)
+            except Exception:
+                # a failing consumer must not stop acquisition
+                log.exception("tick listener %r failed for %s", fn, device_class)
+        return readings
+
+    def _run(self):
+        while not self._stop.is_set():
+            now = time.monotonic()
+            for device_class, (_, period) in self.device_classes.items():
+                if now >= self._due[device_class]:
+                    self._due[device_class] = now + period
+                    try:
+                        self.tick(device_class)
+                    except Exception:
+                        # keep the loop alive; the last good snapshot stays published
+                        log.exception("tick failed for %s", device_class)
+            for name, (period, fn) in list(self._jobs.items()):
+                if now >= self._due[name]:
+                    self._due[name] = now + period
+                    try:
+                        fn()
+                    except Exception:
+                        log.exception("scheduler job %r failed", name)
+            next_due = min(self._due.values())
+            self._wake.wait(max(next_due - time.monotonic(), 0.0))
+            self._wake.clear()
+
+    # -------------------------------------------------------------
+    # readers
+    # -------------------------------------------------------------
+    def latest(self, device_class: str) -> FleetReadings:
+        """Latest published readings; ticks synchronously on first use."""
+        readings = self._latest.get(device_class)
+        if readings is None:
+            readings = self.tick(device_class)
+        return readings
+
+    def readings(self, device_class: str, devices: list) -> list:
+        """Latest readings aligned to a device list by name."""
+        snap = self.latest(device_class)
+        if len(snap.names) == len(devices) and all(
+            n == d["name"] for n, d in zip(snap.names, devices)
+        ):
+            return snap.rows
+        by_name = dict(zip(snap.names, snap.rows))
+        return [by_name.get(d["name"], {}) for d in devices]
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> SimulationScheduler:
+    """Process-wide scheduler, started on first use."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SimulationScheduler().start()
+        return _scheduler
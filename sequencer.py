@@ -0,0 +1,367 @@
+"""
+Chiller sequencing: which chillers run, and at what setpoint, for the
+least plant kW at a given cooling load.
+
+Power per chiller follows the same curves as the plant model:
+
+    kW = rated kW x EIR(part-load ratio) x EIR(ambient, supply)
+
+The part-load curve is held as a table on a uniform PLR grid. It is one
+row shared by the fleet, or one row per unit for measured curves. It is
+looked up by linear interpolation. The plant shares load equally between
+running units, so for k running units each carries load / k. The solver
+builds a k x unit matrix of unit kW in one vectorized pass. For every k it
+then keeps the k cheapest eligible units, using a row-wise sort and
+prefix sums, and picks the k with the lowest total. Constraints:
+
+  - min-run / min-off: a unit that changed state less than min_run_s /
+    min_off_s ago keeps its state
+  - N+1: the running set still carries the load after losing its
+    `redundancy` largest units
+  - a unit never runs above 100% part load
+
+A small switch penalty favours keeping the current running set when two
+plans are within a few kW. The EIR temperature term falls as supply
+water gets warmer, so every running unit gets the warmest setpoint the
+plant allows (max_setpoint).
+
+Plans are applied through control.Batch, i.e. chiller_manager's journal
+path, as one record. The live Sequencer re-plans every minute on the
+background scheduler when enabled.
+
+Its settings (enabled, max_setpoint, redundancy) live under "sequencer"
+in the chillers config and change only through configure(), which
+journals them. The scheduler job reloads them before each step, so every
+session and process sees the same settings.
+"""
+
+import math
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from control import SETPOINT_RANGE, Batch
+from plant_model import (
+    CAPACITY_KW,
+    RATED_COP,
+    design_ambient,
+    design_load_kw,
+    eir_part_load,
+    eir_temperature,
+)
+from utils import get_snapshot, update_settings
+
+PLR_GRID = np.linspace(0.0, 1.0, 101)
+MIN_RUN_S = 1800.0
+MIN_OFF_S = 600.0
+REPLAN_S = 60.0
+DEFAULT_MAX_SETPOINT = 21.0
+SWITCH_PENALTY_KW = 2.0
+SETTINGS_KEY = "sequencer"  # top-level key in the chillers config
+
+Plan = namedtuple(
+    "Plan", ["load_kw", "running", "setpoint", "predicted_kw", "start", "stop", "feasible"]
+)
+
+
+class ChillerCurves:
+    """Per-unit capacity, rated kW and part-load EIR table."""
+
+    def __init__(self, capacity_kw, rated_kw, eir_table=None, plr_grid=PLR_GRID):
+        self.capacity_kw = np.asarray(capacity_kw, dtype=np.float64)
+        self.rated_kw = np.asarray(rated_kw, dtype=np.float64)
+        self.plr_grid = plr_grid
+        table = eir_part_load(plr_grid) if eir_table is None else np.asarray(eir_table)
+        # (units, grid) so measured curves can differ per unit
+        self.eir = np.broadcast_to(table, (len(self.capacity_kw), len(plr_grid)))
+
+    @classmethod
+    def from_devices(cls, devices: list) -> "ChillerCurves":
+        """Curves from config; "capacity_kw" / "rated_cop" per device are optional."""
+        capacity = np.array([float(d.get("capacity_kw", CAPACITY_KW)) for d in devices])
+        cop = np.array([float(d.get("rated_cop", RATED_COP)) for d in devices])
+        return cls(capacity, capacity / cop)
+
+    def unit_kw(self, plr: np.ndarray) -> np.ndarray:
+        """kW of each unit (last axis) at part-load ratios plr, before temperature."""
+        steps = len(self.plr_grid) - 1
+        pos = np.clip(plr, 0.0, 1.0) * steps
+        lo = np.minimum(pos.astype(np.intp), steps - 1)
+        frac = pos - lo
+        units = np.arange(self.eir.shape[0])
+        eir = self.eir[units, lo] * (1.0 - frac) + self.eir[units, lo + 1] * frac
+        return self.rated_kw * eir
+
+
+def plan(
+    load_kw: float,
+    running: np.ndarray,
+    curves: ChillerCurves,
+    locked: np.ndarray = None,
+    ambient: float = 30.0,
+    max_setpoint: float = DEFAULT_MAX_SETPOINT,
+    redundancy: int = 1,
+    switch_penalty_kw: float = SWITCH_PENALTY_KW,
+) -> Plan:
+    """
+    Cheapest running set for load_kw. running is the current ON mask;
+    locked marks units inside their min-run / min-off time, which keep
+    their current state.
+    """
+    running = np.asarray(running, dtype=bool)
+    n = len(running)
+    locked = np.zeros(n, dtype=bool) if locked is None else np.asarray(locked, dtype=bool)
+    setpoint = float(np.clip(max_setpoint, *SETPOINT_RANGE))
+    cap = curves.capacity_kw
+    forced_on = running & locked
+    free = ~locked
+    n_forced = int(forced_on.sum())
+
+    # candidate plant sizes; a size below n_forced cannot be chosen
+    ks = np.arange(max(n_forced, 1), n + 1)
+    share = max(load_kw, 0.0) / ks
+    plr = share[:, None] / cap[None, :]
+    temp = float(eir_temperature(ambient, setpoint))
+    cost = curves.unit_kw(plr) * temp
+    cost = np.where(plr > 1.0, np.inf, cost)
+
+    # forced units are always in; free units compete, off ones pay a penalty
+    forced_kw = np.where(forced_on, cost, 0.0).sum(axis=1)
+    free_cost = np.where(free, cost + np.where(running, 0.0, switch_penalty_kw), np.inf)
+    order = np.argsort(free_cost, axis=1, kind="stable")
+    ranked = np.take_along_axis(free_cost, order, axis=1)
+    prefix = np.concatenate([np.zeros((len(ks), 1)), np.cumsum(ranked, axis=1)], axis=1)
+    m = ks - n_forced  # free units picked for each k
+    rows = np.arange(len(ks))
+    base = forced_kw + prefix[rows, m]
+
+    # N+1: capacity left after losing the `redundancy` largest running units
+    chosen = np.where(np.arange(n)[None, :] < m[:, None], cap[order], 0.0)
+    forced_cap = np.broadcast_to(cap[forced_on], (len(ks), n_forced))
+    chosen = -np.sort(-np.concatenate([chosen, forced_cap], axis=1), axis=1)
+    spare = chosen.sum(axis=1) - chosen[:, : max(redundancy, 0)].sum(axis=1)
+    total = np.where(spare >= load_kw, base, np.inf)
+
+    feasible = bool(np.isfinite(total).any())
+    if feasible:
+        best = int(np.argmin(total))
+    else:
+        # N+1 cannot be met: run as many units as are allowed to run
+        ok = np.flatnonzero(np.isfinite(base))
+        best = int(ok[-1]) if len(ok) else len(ks) - 1
+    on = forced_on.copy()
+    if load_kw > 0:
+        if np.isfinite(base[best]):
+            on[order[best, : m[best]]] = True
+        else:
+            # no running set keeps every unit within full load: run all that may
+            on |= free
+
+    k = max(int(on.sum()), 1)
+    unit = curves.unit_kw(np.full(n, max(load_kw, 0.0)) / k / cap) * temp
+    predicted = float(unit[on].sum())
+    return Plan(
+        load_kw=float(load_kw),
+        running=on,
+        setpoint=setpoint,
+        predicted_kw=predicted,
+        start=np.flatnonzero(on & ~running),
+        stop=np.flatnonzero(running & ~on),
+        feasible=feasible,
+    )
+
+
+# -------------------------------------------------------------
+# live sequencing
+# -------------------------------------------------------------
+def _simulated_conditions() -> tuple:
+    """(load kW, ambient C) of the simulated building, as LivePlant sees it."""
+    now = time.time()
+    local = now + time.localtime(now).tm_gmtoff
+    return design_load_kw(local), design_ambient(local)
+
+
+class Sequencer:
+    """Re-plans the fleet periodically and applies plans through Batch."""
+
+    def __init__(
+        self,
+        conditions=_simulated_conditions,
+        min_run_s: float = MIN_RUN_S,
+        min_off_s: float = MIN_OFF_S,
+        max_setpoint: float = DEFAULT_MAX_SETPOINT,
+        redundancy: int = 1,
+    ):
+        self.conditions = conditions
+        self.min_run_s = min_run_s
+        self.min_off_s = min_off_s
+        self.max_setpoint = max_setpoint
+        self.redundancy = redundancy
+        self.enabled = False
+        self.last_plan = None
+        self.last_applied = []
+        self._since = {}  # name -> (status, time it was first seen in that status)
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------------
+    # settings
+    # -------------------------------------------------------------
+    def settings(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "max_setpoint": self.max_setpoint,
+            "redundancy": self.redundancy,
+        }
+
+    def load_settings(self):
+        """Take the persisted settings from the chillers config, if any."""
+        saved = get_snapshot("chillers").data.get(SETTINGS_KEY) or {}
+        self.enabled = bool(saved.get("enabled", self.enabled))
+        self.max_setpoint = float(saved.get("max_setpoint", self.max_setpoint))
+        self.redundancy = int(saved.get("redundancy", self.redundancy))
+
+    def configure(self, **fields):
+        """Validate, persist and apply settings, e.g. configure(enabled=True)."""
+        unknown = set(fields) - set(self.settings())
+        if unknown:
+            raise ValueError("unknown sequencer settings: {}".format(sorted(unknown)))
+        if "enabled" in fields:
+            fields["enabled"] = bool(fields["enabled"])
+        if "max_setpoint" in fields:
+            fields["max_setpoint"] = float(np.clip(fields["max_setpoint"], *SETPOINT_RANGE))
+        if "redundancy" in fields:
+            fields["redundancy"] = max(int(fields["redundancy"]), 0)
+        update_settings("chillers", SETTINGS_KEY, fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    # -------------------------------------------------------------
+    # planning
+    # -------------------------------------------------------------
+    def observe(self, devices: list, now: float) -> np.ndarray:
+        """
+        Track status changes (including manual ones from the grid) and
+        return the mask of units still inside their min-run / min-off time.
+        A unit seen for the first time is not locked.
+        """
+        locked = np.zeros(len(devices), dtype=bool)
+        for i, d in enumerate(devices):
+            status = d.get("status")
+            seen = self._since.get(d["name"])
+            if seen is None:
+                self._since[d["name"]] = (status, -math.inf)
+            elif seen[0] != status:
+                self._since[d["name"]] = (status, now)
+            else:
+                hold = self.min_run_s if status == "ON" else self.min_off_s
+                locked[i] = now - seen[1] < hold
+        return locked
+
+    def plan(self, chillers_data: dict, now: float = None) -> Plan:
+        now = time.time() if now is None else now
+        devices = chillers_data["chillers"]
+        load_kw, ambient = self.conditions()
+        with self._lock:
+            locked = self.observe(devices, now)
+        running = np.array([d.get("status") == "ON" for d in devices])
+        result = plan(
+            load_kw,
+            running,
+            ChillerCurves.from_devices(devices),
+            locked,
+            ambient,
+            self.max_setpoint,
+            self.redundancy,
+        )
+        self.last_plan = result
+        return result
+
+    def apply(self, chillers_data: dict, result: Plan, now: float = None) -> list:
+        """Write a plan's starts, stops and setpoints as one batch."""
+        now = time.time() if now is None else now
+        batch = Batch(chillers_data=chillers_data)
+        if len(result.start):
+            batch.set_status("chillers", [int(i) + 1 for i in result.start], "ON")
+        if len(result.stop):
+            batch.set_status("chillers", [int(i) + 1 for i in result.stop], "OFF")
+        on = np.flatnonzero(result.running)
+        if len(on):
+            batch.set_setpoint([int(i) + 1 for i in on], result.setpoint)
+        applied = batch.commit()
+        with self._lock:
+            for _, name, fields in applied:
+                if "status" in fields:
+                    self._since[name] = (fields["status"], now)
+        self.last_applied = applied
+        return applied
+
+    def step(self):
+        """Scheduler job: re-plan and apply when enabled."""
+        self.load_settings()
+        if not self.enabled:
+            return
+        from chiller_manager import get_chiller_data
+        from scheduler import get_scheduler
+
+        data = get_chiller_data()
+        if self.apply(data, self.plan(data)):
+            get_scheduler().request_tick("chillers")
+
+
+_sequencer = None
+_sequencer_lock = threading.Lock()
+
+
+def get_sequencer() -> Sequencer:
+    """Process-wide sequencer; its job runs on the scheduler, idle until enabled."""
+    global _sequencer
+    with _sequencer_lock:
+        if _sequencer is None:
+            from scheduler import get_scheduler
+
+            _sequencer = Sequencer()
+            _sequencer.load_settings()
+            get_scheduler().add_job("sequencer", REPLAN_S, _sequencer.step)
+        return _sequencer
+
+
+# -------------------------------------------------------------
+# Benchmark: python sequencer.py
+# -------------------------------------------------------------
+def _bench(n: int = 400, rounds: int = 20):
+    from plant_model import ChillerPlantModel
+
+    rng = np.random.default_rng(1)
+    capacity = rng.choice([700.0, 1055.0, 1400.0], n)
+    curves = ChillerCurves(capacity, capacity / rng.uniform(3.6, 4.4, n))
+    load = 0.45 * capacity.sum()
+    running = rng.random(n) < 0.5
+    locked = rng.random(n) < 0.1
+
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        result = plan(load, running, curves, locked)
+    elapsed = (time.perf_counter() - t0) / rounds
+
+    # all-on with equal sharing is what the manual default tends toward
+    all_on = plan(load, np.ones(n, bool), curves, np.ones(n, bool))
+    print(f"{n} chillers, load {load / 1000:.0f} MW: plan in {elapsed * 1e3:.1f} ms")
+    print(
+        f"  {result.running.sum()} running, {result.predicted_kw:.0f} kW "
+        f"(all on: {all_on.predicted_kw:.0f} kW), "
+        f"{len(result.start)} starts / {len(result.stop)} stops"
+    )
+
+    # check the prediction against the plant model at steady state
+    model = ChillerPlantModel(n, capacity_kw=capacity, rated_cop=capacity / curves.rated_kw)
+    model.on[:] = result.running
+    model.setpoint[:] = result.setpoint
+    for _ in range(120):
+        model.step(60.0, load, 30.0)
+    print(f"  plant model at that plan: {model.power.sum():.0f} kW")
+
+
+if __name__ == "__main__":
+    _bench()
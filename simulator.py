@@ -1,65 +1,185 @@
 import random
+import time
 
+import numpy as np
 
-def simulate_chiller(ch: dict) -> dict:
-    """Return simulated readings for a chiller."""
-    if ch["status"] == "OFF":
-        return {
-            k: 0
-            for k in [
-                "supply",
-                "inlet",
-                "outlet",
-                "ambient",
-                "comp1",
-                "comp2",
-                "power",
-                "flow",
-            ]
-        }
+# -------------------------------------------------------------
+# Field specs per device class: (field, low, high, decimals)
+# -------------------------------------------------------------
+CHILLER_FIELDS = [
+    ("inlet", 22, 28, 2),
+    ("outlet", 18, 24, 2),
+    ("ambient", 28, 32, 2),
+    ("comp1", 40, 70, 2),
+    ("comp2", 0, 70, 2),
+    ("power", 200, 320, 2),
+    ("flow", 200, 350, 2),
+]
+
+TRANSFORMER_FIELDS = [
+    ("voltage", 410, 416, 2),
+    ("current", 400, 1200, 2),
+    ("power", 100, 800, 2),
+]
+
+UPS_FIELDS = [
+    ("voltage", 410, 416, 2),
+    ("current", 50, 300, 2),
+    ("power", 30, 150, 2),
+    ("load", 5, 40, 2),
+]
+
+GENSET_FIELDS = [
+    ("voltage", 410, 416, 2),
+    ("current", 30, 200, 2),
+    ("power", 20, 150, 2),
+    ("load", 5, 40, 2),
+]
+
+PAHU_FIELDS = [
+    ("supply_air_temp", 15, 18, 1),
+    ("return_air_temp", 22, 26, 1),
+    ("airflow", 3000, 6000, 0),  # CFM
+    ("power", 3, 8, 2),  # kW
+    ("filter_dp", 0.4, 1.2, 2),  # in WG
+]
+
+_rng = np.random.default_rng()
+
+
+def fleet_state(devices: list) -> dict:
+    """
+    Convert a list of device dicts (as stored in config_*.json) into
+    columnar arrays: {"on": bool mask, "setpoint": float array}.
+    A registry.DeviceTable already stores these columns and is used as is.
+    """
+    if hasattr(devices, "state"):
+        return devices.state()
+    on = np.fromiter(
+        (d.get("status") == "ON" for d in devices), dtype=bool, count=len(devices)
+    )
+    setpoint = np.fromiter(
+        (float(d.get("setpoint", 0.0)) for d in devices),
+        dtype=np.float64,
+        count=len(devices),
+    )
+    return {"on": on, "setpoint": setpoint}
+
+
+def _simulate_batch(fields: list, on: np.ndarray, rng=None) -> dict:
+    """
+    Draw one uniform sample per (device, field) in a single call.
+    OFF devices read 0 for every field.
+    """
+    rng = rng or _rng
+    on = np.asarray(on, dtype=bool)
+    n = on.shape[0]
+    low = np.array([f[1] for f in fields], dtype=np.float64)
+    high = np.array([f[2] for f in fields], dtype=np.float64)
+
+    samples = rng.uniform(low, high, size=(n, len(fields)))
+    samples *= on[:, None]
+
+    out = {}
+    for j, (name, _, _, decimals) in enumerate(fields):
+        out[name] = np.round(samples[:, j], decimals)
+    return out
+
+
+def simulate_chillers_batch(on: np.ndarray, setpoint: np.ndarray, rng=None) -> dict:
+    """Return readings for a whole chiller fleet as NumPy arrays."""
+    rng = rng or _rng
+    on = np.asarray(on, dtype=bool)
+    out = _simulate_batch(CHILLER_FIELDS, on, rng)
+    supply = np.asarray(setpoint, dtype=np.float64) + rng.uniform(
+        -1.0, 1.0, size=on.shape[0]
+    )
+    out["supply"] = np.round(np.where(on, supply, 0.0), 2)
+    return out
+
+
+def simulate_transformers_batch(on: np.ndarray, rng=None) -> dict:
+    return _simulate_batch(TRANSFORMER_FIELDS, on, rng)
+
+
+def simulate_ups_batch(on: np.ndarray, rng=None) -> dict:
+    return _simulate_batch(UPS_FIELDS, on, rng)
+
+
+def simulate_gensets_batch(on: np.ndarray, rng=None) -> dict:
+    return _simulate_batch(GENSET_FIELDS, on, rng)
+
+
+def simulate_pahu_batch(on: np.ndarray, rng=None) -> dict:
+    return _simulate_batch(PAHU_FIELDS, on, rng)
 
+
+def batch_to_rows(batch: dict) -> list:
+    """Split a columnar batch back into one dict per device."""
+    keys = list(batch.keys())
+    cols = [batch[k].tolist() for k in keys]
+    return [dict(zip(keys, row)) for row in zip(*cols)]
+
+
+_BATCH_BY_CLASS = {
+    "transformers": simulate_transformers_batch,
+    "ups": simulate_ups_batch,
+    "genset": simulate_gensets_batch,
+    "pahu": simulate_pahu_batch,
+}
+
+
+def simulate_fleet_batch(device_class: str, devices: list) -> dict:
+    """Simulate every device of one class; returns columnar arrays."""
+    state = fleet_state(devices)
+    if device_class == "chillers":
+        return simulate_chillers_batch(state["on"], state["setpoint"])
+    return _BATCH_BY_CLASS[device_class](state["on"])
+
+
+def simulate_fleet(device_class: str, devices: list) -> list:
+    """
+    Simulate every device of one class in a single batch and return
+    one readings dict per device (same shape as the per-device functions).
+    """
+    return batch_to_rows(simulate_fleet_batch(device_class, devices))
+
+
+# -------------------------------------------------------------
+# Per-device wrappers (kept for app.py and other callers)
+#
+# One device is cheaper to draw with the random module than through a
+# 1-row NumPy batch, so these stay scalar. OFF devices read integer 0.
+# -------------------------------------------------------------
+def _simulate_one(fields: list, status: str) -> dict:
+    if status == "OFF":
+        return {f[0]: 0 for f in fields}
     return {
-        "supply": round(ch["setpoint"] + random.uniform(-1.0, 1.0), 2),
-        "inlet": round(random.uniform(22, 28), 2),
-        "outlet": round(random.uniform(18, 24), 2),
-        "ambient": round(random.uniform(28, 32), 2),
-        "comp1": round(random.uniform(40, 70), 2),
-        "comp2": round(random.uniform(0, 70), 2),
-        "power": round(random.uniform(200, 320), 2),
-        "flow": round(random.uniform(200, 350), 2),
+        name: round(random.uniform(lo, hi), decimals)
+        for name, lo, hi, decimals in fields
     }
 
 
+def simulate_chiller(ch: dict) -> dict:
+    """Return simulated readings for a chiller."""
+    if ch["status"] == "OFF":
+        out = {"supply": 0}
+    else:
+        out = {"supply": round(ch["setpoint"] + random.uniform(-1.0, 1.0), 2)}
+    out.update(_simulate_one(CHILLER_FIELDS, ch["status"]))
+    return out
+
+
 def simulate_transformer(tr: dict) -> dict:
-    if tr["status"] == "OFF":
-        return {"voltage": 0, "current": 0, "power": 0}
-    return {
-        "voltage": round(random.uniform(410, 416), 2),
-        "current": round(random.uniform(400, 1200), 2),
-        "power": round(random.uniform(100, 800), 2),
-    }
+    return _simulate_one(TRANSFORMER_FIELDS, tr["status"])
 
 
 def simulate_ups(u: dict) -> dict:
-    if u["status"] == "OFF":
-        return {"voltage": 0, "current": 0, "power": 0, "load": 0}
-    return {
-        "voltage": round(random.uniform(410, 416), 2),
-        "current": round(random.uniform(50, 300), 2),
-        "power": round(random.uniform(30, 150), 2),
-        "load": round(random.uniform(5, 40), 2),
-    }
+    return _simulate_one(UPS_FIELDS, u["status"])
 
 
 def simulate_genset(g: dict) -> dict:
-    if g["status"] == "OFF":
-        return {"voltage": 0, "current": 0, "power": 0, "load": 0}
-    return {
-        "voltage": round(random.uniform(410, 416), 2),
-        "current": round(random.uniform(30, 200), 2),
-        "power": round(random.uniform(20, 150), 2),
-        "load": round(random.uniform(5, 40), 2),
-    }
+    return _simulate_one(GENSET_FIELDS, g["status"])
 
 
 def simulate_pahu(p: dict) -> dict:
@@ -67,25 +187,38 @@ def simulate_pahu(p: dict) -> dict:
     Simulated PAHU readings:
       - supply_air_temp, return_air_temp, airflow, power, filter_dp
     """
-    if p["status"] == "OFF":
-        return {
-            "supply_air_temp": 0,
-            "return_air_temp": 0,
-            "airflow": 0,
-            "power": 0,
-            "filter_dp": 0,
+    return _simulate_one(PAHU_FIELDS, p["status"])
+
+
+# -------------------------------------------------------------
+# Benchmark: python simulator.py
+# -------------------------------------------------------------
+def _bench(n_devices: int = 10_000, ticks: int = 20):
+    chillers = [
+        {
+            "name": f"CH-{i}",
+            "status": "ON" if random.random() < 0.7 else "OFF",
+            "setpoint": 21.0,
         }
+        for i in range(n_devices)
+    ]
 
-    supply = round(random.uniform(15, 18), 1)
-    return_temp = round(random.uniform(22, 26), 1)
-    airflow = round(random.uniform(3000, 6000), 0)  # CFM
-    power = round(random.uniform(3, 8), 2)  # kW
-    filter_dp = round(random.uniform(0.4, 1.2), 2)  # in WG
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        [simulate_chiller(ch) for ch in chillers]
+    per_device = (time.perf_counter() - t0) / ticks
 
-    return {
-        "supply_air_temp": supply,
-        "return_air_temp": return_temp,
-        "airflow": airflow,
-        "power": power,
-        "filter_dp": filter_dp,
-    }
+    state = fleet_state(chillers)
+    t0 = time.perf_counter()
+    for _ in range(ticks):
+        simulate_chillers_batch(state["on"], state["setpoint"])
+    batched = (time.perf_counter() - t0) / ticks
+
+    print(f"{n_devices} chillers, {ticks} ticks")
+    print(f"  per-device (scalar): {per_device * 1e3:8.2f} ms/tick")
+    print(f"  batched engine     : {batched * 1e3:8.2f} ms/tick")
+    print(f"  speed-up           : {per_device / batched:8.1f}x")
+
+
+if __name__ == "__main__":
+    _bench()
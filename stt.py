@@ -0,0 +1,296 @@
+"""
+Pluggable speech-to-text backends.
+
+    VoskBackend    offline Kaldi models via the optional "vosk" package
+    GoogleBackend  SpeechRecognition + Google Web Speech API (online)
+
+The backend is chosen once per process. Set BMS_STT_BACKEND to "vosk"
+or "google", or leave it at "auto" to use Vosk when its package and
+model directory (BMS_VOSK_MODEL) are present. Vosk models are loaded
+once and shared by every session and every recognizer.
+
+Recognition is streaming: a session accepts PCM chunks as they arrive
+with feed() and returns the final transcript from finish(). Most of the
+decoding is therefore done by the time the audio ends.
+
+    session = get_stt_backend().session(sample_rate=16000)
+    for chunk in chunks:
+        session.feed(chunk)
+    text = session.finish()
+
+Uploads are parsed in place: samples are a NumPy view over the upload
+buffer, converted to mono 16 kHz int16 in one vectorized step, and fed
+to the session in chunk views. Size (BMS_MAX_AUDIO_MB) and duration
+(BMS_MAX_AUDIO_S) limits are checked on the WAV header first, so an
+oversized upload is rejected before it is decoded.
+"""
+
+import json
+import os
+import struct
+import threading
+
+import numpy as np
+
+STT_BACKEND = os.environ.get("BMS_STT_BACKEND", "auto")
+VOSK_MODEL_DIR = os.environ.get("BMS_VOSK_MODEL", "models/vosk-model-small-en-us")
+CHUNK_FRAMES = 4000  # 0.25 s at 16 kHz
+STT_RATE = 16000
+# uploads are decoded inside the shared Streamlit process
+MAX_AUDIO_S = float(os.environ.get("BMS_MAX_AUDIO_S", "60"))
+MAX_AUDIO_BYTES = int(float(os.environ.get("BMS_MAX_AUDIO_MB", "25")) * 1e6)
+MAX_GAIN = 8.0  # +18 dB for quiet recordings
+_TARGET_PEAK = 0.9 * 32767
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class AudioTooLarge(ValueError):
+    pass
+
+
+def _wav_layout(buf: memoryview) -> tuple:
+    """(channels, rate, data offset, data bytes) from a RIFF/WAVE header."""
+    if len(buf) < 12 or bytes(buf[0:4]) != b"RIFF" or bytes(buf[8:12]) != b"WAVE":
+        raise ValueError("not a WAV file")
+    fmt = None
+    pos = 12
+    while pos + 8 <= len(buf):
+        chunk_id = bytes(buf[pos : pos + 4])
+        (size,) = struct.unpack_from("<I", buf, pos + 4)
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack_from("<HHIIHH", buf, body)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            tag, channels, rate, _, _, bits = fmt
+            if tag not in (_WAVE_FORMAT_PCM, _WAVE_FORMAT_EXTENSIBLE) or bits != 16:
+                raise ValueError("expected 16-bit PCM WAV, got {}-bit".format(bits))
+            # streamed WAVs carry a placeholder size; trust the buffer instead
+            size = min(size, len(buf) - body)
+            return channels, rate, body, size - size % (2 * channels)
+        pos = body + size + (size & 1)
+    raise ValueError("WAV file has no data chunk")
+
+
+def to_stt_pcm(samples: np.ndarray, rate: int, channels: int = 1) -> np.ndarray:
+    """
+    Mono int16 at STT_RATE: downmix, resample and normalize in one
+    vectorized pass. Already-conforming audio is returned as is.
+    """
+    # max / -min rather than abs(): abs(-32768) overflows int16
+    peak = max(int(samples.max()), -int(samples.min())) if len(samples) else 0
+    gain = min(max(_TARGET_PEAK / max(peak, 1), 1.0), MAX_GAIN)
+    if channels == 1 and rate == STT_RATE and gain < 1.05:
+        return samples
+
+    if rate % STT_RATE == 0:
+        # downmix and integer decimation (16 / 32 / 48 kHz) as one mean over
+        # each group of k frames x channels samples
+        group = rate // STT_RATE * channels
+        n = len(samples) - len(samples) % group
+        x = samples[:n].reshape(-1, group).mean(axis=1, dtype=np.float32)
+    else:
+        frames = samples.reshape(-1, channels)
+        x = frames.mean(axis=1, dtype=np.float32) if channels > 1 else frames[:, 0]
+        n_out = int(len(x) * STT_RATE / rate)
+        x = np.interp(
+            np.arange(n_out, dtype=np.float32) * (rate / STT_RATE),
+            np.arange(len(x), dtype=np.float32),
+            x,
+        )
+    return np.clip(x * gain, -32768, 32767).astype("<i2")
+
+
+def read_wav(raw, max_s: float = MAX_AUDIO_S) -> tuple:
+    """
+    (mono int16 samples at STT_RATE, STT_RATE) from WAV bytes or any buffer
+    (e.g. UploadedFile.getbuffer()). Samples are read straight from the
+    buffer; limits are checked on the header before any audio is touched.
+    """
+    buf = memoryview(raw).cast("B")
+    if len(buf) > MAX_AUDIO_BYTES:
+        raise AudioTooLarge(
+            "upload is {:.1f} MB, limit {:.1f} MB".format(len(buf) / 1e6, MAX_AUDIO_BYTES / 1e6)
+        )
+    channels, rate, offset, size = _wav_layout(buf)
+    if size > max_s * rate * channels * 2:
+        raise AudioTooLarge(
+            "recording is {:.0f} s, limit {:.0f} s".format(size / (rate * channels * 2), max_s)
+        )
+    samples = np.frombuffer(buf, dtype="<i2", count=size // 2, offset=offset)
+    return to_stt_pcm(samples, rate, channels), STT_RATE
+
+
+def iter_chunks(pcm: np.ndarray, frames: int = CHUNK_FRAMES):
+    """Views of successive chunks of a sample array, for SttSession.feed()."""
+    for i in range(0, len(pcm), frames):
+        yield pcm[i : i + frames]
+
+
+class SttSession:
+    def feed(self, pcm) -> str:
+        """
+        Accept a chunk of mono int16 PCM (bytes or an int16 array view);
+        returns the partial transcript.
+        """
+        raise NotImplementedError
+
+    def finish(self) -> str:
+        raise NotImplementedError
+
+
+class SttBackend:
+    name = "base"
+
+    def session(self, sample_rate: int) -> SttSession:
+        raise NotImplementedError
+
+    def transcribe_pcm(self, chunks, sample_rate: int) -> str:
+        session = self.session(sample_rate)
+        for chunk in chunks:
+            session.feed(chunk)
+        return session.finish()
+
+    def transcribe(self, raw, max_s: float = MAX_AUDIO_S) -> str:
+        """Transcribe a whole WAV file, fed to the session in chunks."""
+        pcm, rate = read_wav(raw, max_s)
+        return self.transcribe_pcm(iter_chunks(pcm), rate)
+
+
+# -------------------------------------------------------------
+# Vosk (offline)
+# -------------------------------------------------------------
+_models = {}
+_models_lock = threading.Lock()
+
+
+def _vosk_model(model_dir: str):
+    with _models_lock:
+        model = _models.get(model_dir)
+        if model is None:
+            import vosk
+
+            vosk.SetLogLevel(-1)
+            model = _models[model_dir] = vosk.Model(model_dir)
+        return model
+
+
+class _VoskSession(SttSession):
+    def __init__(self, model, sample_rate: int, grammar: str = None):
+        import vosk
+
+        if grammar:
+            self.rec = vosk.KaldiRecognizer(model, sample_rate, grammar)
+        else:
+            self.rec = vosk.KaldiRecognizer(model, sample_rate)
+        self.parts = []
+
+    def feed(self, pcm) -> str:
+        # the recognizer takes bytes; one 0.25 s chunk is copied at a time
+        if self.rec.AcceptWaveform(bytes(pcm)):
+            # end of an utterance segment: keep its final text
+            text = json.loads(self.rec.Result()).get("text", "")
+            if text:
+                self.parts.append(text)
+            return " ".join(self.parts)
+        partial = json.loads(self.rec.PartialResult()).get("partial", "")
+        return " ".join(self.parts + ([partial] if partial else []))
+
+    def finish(self) -> str:
+        text = json.loads(self.rec.FinalResult()).get("text", "")
+        if text:
+            self.parts.append(text)
+        return " ".join(self.parts).strip()
+
+
+class VoskBackend(SttBackend):
+    name = "vosk"
+
+    def __init__(self, model_dir: str = VOSK_MODEL_DIR, grammar: list = None):
+        self.model_dir = model_dir
+        # optional phrase list restricting recognition to the command vocabulary
+        self.grammar = json.dumps(grammar) if grammar else None
+        self.model = _vosk_model(model_dir)
+
+    def session(self, sample_rate: int) -> SttSession:
+        return _VoskSession(self.model, sample_rate, self.grammar)
+
+
+# -------------------------------------------------------------
+# Google Web Speech (online)
+# -------------------------------------------------------------
+class _BufferedSession(SttSession):
+    """Collects audio; the online API only takes whole utterances."""
+
+    def __init__(self, backend, sample_rate: int):
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.buf = bytearray()
+
+    def feed(self, pcm) -> str:
+        self.buf += memoryview(pcm).cast("B")
+        return ""
+
+    def finish(self) -> str:
+        return self.backend.recognize(bytes(self.buf), self.sample_rate)
+
+
+class GoogleBackend(SttBackend):
+    name = "google"
+
+    def __init__(self):
+        import speech_recognition as sr
+
+        self.sr = sr
+        self.recognizer = sr.Recognizer()
+
+    def session(self, sample_rate: int) -> SttSession:
+        return _BufferedSession(self, sample_rate)
+
+    def recognize(self, pcm: bytes, sample_rate: int) -> str:
+        if not pcm:
+            return ""
+        audio = self.sr.AudioData(pcm, sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio).strip()
+        except self.sr.UnknownValueError:
+            # Speech unintelligible
+            return ""
+        except self.sr.RequestError as e:
+            # API unreachable or rate-limited
+            return f"[STT request error: {e}]"
+
+
+# -------------------------------------------------------------
+# process-wide backend
+# -------------------------------------------------------------
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def _vosk_available() -> bool:
+    try:
+        import vosk  # noqa: F401
+    except ImportError:
+        return False
+    return os.path.isdir(VOSK_MODEL_DIR)
+
+
+def get_stt_backend() -> SttBackend:
+    """Backend selected by STT_BACKEND, created (and its model loaded) once."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            choice = STT_BACKEND
+            if choice == "auto":
+                choice = "vosk" if _vosk_available() else "google"
+            _backend = VoskBackend() if choice == "vosk" else GoogleBackend()
+        return _backend
+
+
+def preload():
+    """Load the STT model at process start instead of on the first command."""
+    return get_stt_backend()
@@ -0,0 +1,225 @@
+"""
+Schema-driven HTML tables for the Power Control and Chillers pages.
+
+Each device class has a schema of (row label, reading key, number format).
+A table has one column per device and one row per parameter. Each device
+column is formatted with one str.format call on a cached template and can
+be memoized on the device's own config version and readings, so a rerun
+only re-formats devices whose config or readings changed. Styling is
+done with CSS classes defined once per page (TABLE_CSS), not inline
+styles repeated in every cell.
+"""
+
+from functools import lru_cache
+
+SCHEMAS = {
+    "transformers": [
+        ("VOLTAGE (V)", "voltage", "{:.1f}"),
+        ("CURRENT (A)", "current", "{:.1f}"),
+        ("POWER (kW)", "power", "{:.2f}"),
+    ],
+    "ups": [
+        ("VOLTAGE (V)", "voltage", "{:.1f}"),
+        ("CURRENT (A)", "current", "{:.1f}"),
+        ("POWER (kW)", "power", "{:.2f}"),
+        ("LOAD (%)", "load", "{:.1f}"),
+    ],
+    "genset": [
+        ("VOLTAGE (V)", "voltage", "{:.1f}"),
+        ("CURRENT (A)", "current", "{:.1f}"),
+        ("POWER (kW)", "power", "{:.2f}"),
+        ("LOAD (%)", "load", "{:.1f}"),
+    ],
+    "pahu": [
+        ("SUPPLY AIR TEMP (C)", "supply_air_temp", "{:.1f}"),
+        ("RETURN AIR TEMP (C)", "return_air_temp", "{:.1f}"),
+        ("AIRFLOW (CFM)", "airflow", "{:.0f}"),
+        ("POWER (kW)", "power", "{:.2f}"),
+        ("FILTER DP (in-wg)", "filter_dp", "{:.2f}"),
+    ],
+}
+
+TABLE_CSS = """
+<style>
+.bms-wrap{background:#020617;padding:8px;border-radius:8px;
+  border:1px solid #1f2937;margin-bottom:16px;overflow-x:auto;}
+.bms-matrix{border-collapse:collapse;width:100%;font-size:11px;}
+.bms-matrix th{padding:4px 6px;border:1px solid #111827;}
+.bms-matrix th.p{background:#1f2937;color:#e5e7eb;text-align:left;}
+.bms-matrix th.u{background:#1d4ed8;color:white;text-align:center;}
+.bms-matrix td{background:#020617;color:#e5e7eb;padding:4px 6px;
+  border:1px solid #1f2937;text-align:center;}
+.bms-matrix td.p{background:#111827;font-weight:bold;text-align:left;}
+.bms-matrix td.ON,.bms-matrix td.OFF,.bms-matrix td.TRIPPED,
+.bms-matrix td.UNSERVED{color:white;font-weight:bold;}
+.bms-matrix td.ON{background:#16d916;}
+.bms-matrix td.OFF{background:#ff4d4d;}
+.bms-matrix td.TRIPPED{background:#f97316;}
+.bms-matrix td.UNSERVED{background:#a855f7;}
+</style>
+"""
+
+
+def _num(d: dict, key: str) -> float:
+    try:
+        return float(d.get(key, 0.0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@lru_cache(maxsize=256)
+def _header(names: tuple) -> str:
+    return (
+        "<tr><th class='p'>PARAMETERS</th>"
+        + "".join("<th class='u'>{}</th>".format(n) for n in names)
+        + "</tr>"
+    )
+
+
+# (table, name) -> (key, fragment); holds one entry per device and table
+_fragments = {}
+_fragment_stats = {"hits": 0, "misses": 0}
+
+
+def _memo(table, name: str, key, build):
+    """
+    Fragment for one device, rebuilt only when its key changes. key is
+    None for "do not cache".
+    """
+    if key is not None:
+        hit = _fragments.get((table, name))
+        if hit is not None and hit[0] == key:
+            _fragment_stats["hits"] += 1
+            return hit[1]
+    fragment = build()
+    _fragment_stats["misses"] += 1
+    if key is not None:
+        _fragments[(table, name)] = (key, fragment)
+    return fragment
+
+
+def fragment_stats() -> dict:
+    return dict(_fragment_stats)
+
+
+@lru_cache(maxsize=256)
+def _column_template(device_class: str) -> str:
+    """Cells of one device column, separated by \x00 (status first)."""
+    cells = ["<td class='{}'>{}</td>"]
+    cells += ["<td>" + fmt + "</td>" for _, _, fmt in SCHEMAS[device_class]]
+    return "\x00".join(cells)
+
+
+def render_matrix(
+    device_class: str,
+    devices: list,
+    readings: list,
+    states: list = None,
+    keys: list = None,
+) -> str:
+    """
+    HTML matrix for one device class (devices and readings aligned).
+    states optionally overrides the status row (e.g. TRIPPED from load flow).
+
+    keys optionally gives each device's config version; a device column is
+    only re-formatted when that version, its status or its own readings
+    differ from the previous render.
+    """
+    names = tuple(d["name"] for d in devices)
+    schema = SCHEMAS[device_class]
+    template = _column_template(device_class)
+
+    columns = []
+    for i, d in enumerate(devices):
+        status = states[i] if states is not None else d["status"]
+        r = readings[i]
+
+        def build():
+            values = [status, status] + [_num(r, key) for _, key, _ in schema]
+            return tuple(template.format(*values).split("\x00"))
+
+        key = None if keys is None else (keys[i], status, tuple(r.values()))
+        columns.append(_memo(device_class, d["name"], key, build))
+
+    parts = [
+        "<div class='bms-wrap'><table class='bms-matrix'>",
+        _header(names),
+        "<tr><td class='p'>UNIT STATUS</td>",
+    ]
+    parts.extend(c[0] for c in columns)
+    parts.append("</tr>")
+    for row, (label, _, _) in enumerate(schema, start=1):
+        parts.append("<tr><td class='p'>{}</td>".format(label))
+        parts.extend(c[row] for c in columns)
+        parts.append("</tr>")
+    parts.append("</table></div>")
+    return "".join(parts)
+
+
+# -------------------------------------------------------------
+# Row-per-device summary tables (chiller grid)
+# -------------------------------------------------------------
+CHILLER_COLUMNS = [
+    ("UNIT", "name", None),
+    ("STATUS", "status", None),
+    ("SP (C)", "setpoint", "{:.1f}"),
+    ("SUPPLY (C)", "supply", "{:.1f}"),
+    ("INLET (C)", "inlet", "{:.1f}"),
+    ("OUTLET (C)", "outlet", "{:.1f}"),
+    ("AMBIENT (C)", "ambient", "{:.1f}"),
+    ("COMP-1 (%)", "comp1", "{:.0f}"),
+    ("COMP-2 (%)", "comp2", "{:.0f}"),
+    ("POWER (kW)", "power", "{:.1f}"),
+    ("FLOW (m3/hr)", "flow", "{:.1f}"),
+]
+
+
+@lru_cache(maxsize=32)
+def _columns_templates(columns: tuple) -> tuple:
+    header = "<tr>" + "".join("<th class='u'>{}</th>".format(c[0]) for c in columns) + "</tr>"
+    cells = []
+    for _, key, fmt in columns:
+        if key == "name":
+            cells.append("<td class='p'>{}</td>")
+        elif key == "status":
+            cells.append("<td class='{}'>{}</td>")
+        else:
+            cells.append("<td>" + fmt + "</td>")
+    return header, "<tr>" + "".join(cells) + "</tr>"
+
+
+def render_rows(
+    columns: list, devices: list, readings: list, keys: list = None
+) -> str:
+    """
+    HTML table with one row per device. devices supply name / status /
+    setpoint, readings supply everything else. keys works as in
+    render_matrix.
+    """
+    columns = tuple(columns)
+    header, row = _columns_templates(columns)
+    parts = ["<div class='bms-wrap'><table class='bms-matrix'>", header]
+    for i, (dev, r) in enumerate(zip(devices, readings)):
+
+        def build():
+            values = []
+            for _, key, _ in columns:
+                if key == "name":
+                    values.append(dev["name"])
+                elif key == "status":
+                    values.append(dev["status"])
+                    values.append(dev["status"])
+                elif key in dev:
+                    values.append(_num(dev, key))
+                else:
+                    values.append(_num(r, key))
+            return row.format(*values)
+
+        key = (
+            None
+            if keys is None
+            else (keys[i], dev["status"], dev.get("setpoint"), tuple(r.values()))
+        )
+        parts.append(_memo(columns, dev["name"], key, build))
+    parts.append("</table></div>")
+    return "".join(parts)
@@ -0,0 +1,543 @@
+"""
+Append-only telemetry store for simulated and live readings.
+
+Layout on disk (one directory per device class and rollup tier, split
+into segments that each have a fixed device list and field set):
+
+    telemetry/<device_class>/<tier>/seg_000000/meta.json
+    telemetry/<device_class>/<tier>/seg_000000/ts_000000.npy    float64 [chunk_rows]
+    telemetry/<device_class>/<tier>/seg_000000/val_000000.npy   float32 [chunk_rows, devices, fields]
+
+Chunks are fixed-size, memory-mapped .npy files. Rows are written value
+first, timestamp last, so an interrupted append leaves a NaN timestamp
+and the row is simply ignored on reopen.
+
+When the fleet or field set changes (a device added, or a restart with a
+different config), appends roll over to a new segment. Queries read every
+overlapping segment and line columns up by device and field name; a
+device missing from a segment reads NaN there.
+
+Tiers:
+    "1s"    - raw samples as appended, kept for RETENTION_S["1s"]
+    "1min"  - per-minute means, built in the background
+    "15min" - per-15-minute means, built in the background
+
+Expired chunks, and then whole segments, are deleted when a tier starts
+a new chunk.
+"""
+
+import bisect
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+TELEMETRY_DIR = "telemetry"
+
+TIERS = OrderedDict([("1s", 1), ("1min", 60), ("15min", 900)])
+ROLLUP_TIERS = ["1min", "15min"]
+
+# seconds of history kept per tier (None keeps everything)
+RETENTION_S = {"1s": 7 * 86400, "1min": None, "15min": None}
+
+SEGMENT_PREFIX = "seg_"
+DEFAULT_CHUNK_ROWS = 3600
+MAX_OPEN_CHUNKS = 16
+MAX_QUERY_POINTS = 2000
+
+
+def _read_meta(path: str):
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r") as f:
+        return json.load(f)
+
+
+class _Series:
+    """
+    One segment of a (device_class, tier) series: a list of fixed-size
+    chunks for one device list and field set. names / fields of None
+    reopen an existing segment from its meta.json.
+    """
+
+    def __init__(self, path: str, names, fields, chunk_rows: int, cache):
+        self.path = path
+        self._cache = cache
+
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, "meta.json")
+        meta = _read_meta(path)
+        if meta is not None:
+            names, fields = meta["names"], meta["fields"]
+            chunk_rows = meta["chunk_rows"]
+        self.names = list(names)
+        self.fields = list(fields)
+        self.chunk_rows = chunk_rows
+        self.name_index = {n: i for i, n in enumerate(self.names)}
+        self.field_index = {f: j for j, f in enumerate(self.fields)}
+        if meta is None:
+            tmp = meta_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(
+                    {
+                        "names": self.names,
+                        "fields": self.fields,
+                        "chunk_rows": self.chunk_rows,
+                    },
+                    f,
+                )
+            os.replace(tmp, meta_path)
+
+        # chunk index: sorted chunk ids with their first / last timestamps
+        self.chunk_ids = []
+        self.chunk_first = []
+        self.chunk_last = []
+        self.fill = 0  # rows used in the last chunk
+        for fname in sorted(os.listdir(path)):
+            if fname.startswith("ts_") and fname.endswith(".npy"):
+                cid = int(fname[3:-4])
+                ts = self._open(cid)[0]
+                n = int(np.count_nonzero(~np.isnan(ts)))
+                if n == 0:
+                    continue
+                self.chunk_ids.append(cid)
+                self.chunk_first.append(float(ts[0]))
+                self.chunk_last.append(float(ts[n - 1]))
+                self.fill = n
+
+    # -------------------------------------------------------------
+    # chunk files
+    # -------------------------------------------------------------
+    def _files(self, cid: int):
+        return (
+            os.path.join(self.path, "ts_{:06d}.npy".format(cid)),
+            os.path.join(self.path, "val_{:06d}.npy".format(cid)),
+        )
+
+    def _open(self, cid: int, create: bool = False):
+        key = (self.path, cid)
+        hit = self._cache.get(key)
+        if hit is not None:
+            return hit
+
+        ts_path, val_path = self._files(cid)
+        if create and not os.path.exists(ts_path):
+            shape = (self.chunk_rows, len(self.names), len(self.fields))
+            val = np.lib.format.open_memmap(
+                val_path, mode="w+", dtype=np.float32, shape=shape
+            )
+            ts = np.lib.format.open_memmap(
+                ts_path, mode="w+", dtype=np.float64, shape=(self.chunk_rows,)
+            )
+            ts[:] = np.nan
+            ts.flush()
+        else:
+            ts = np.load(ts_path, mmap_mode="r+")
+            val = np.load(val_path, mmap_mode="r+")
+
+        self._cache.put(key, (ts, val))
+        return ts, val
+
+    # -------------------------------------------------------------
+    # append / query
+    # -------------------------------------------------------------
+    def append(self, ts: float, values: np.ndarray):
+        """Append one row: values has shape [devices, fields]."""
+        if self.chunk_ids and ts < self.chunk_last[-1]:
+            raise ValueError("Telemetry timestamps must be non-decreasing.")
+
+        if not self.chunk_ids or self.fill >= self.chunk_rows:
+            cid = self.chunk_ids[-1] + 1 if self.chunk_ids else 0
+            self._open(cid, create=True)
+            self.chunk_ids.append(cid)
+            self.chunk_first.append(ts)
+            self.chunk_last.append(ts)
+            self.fill = 0
+
+        ts_arr, val_arr = self._open(self.chunk_ids[-1])
+        val_arr[self.fill] = values
+        ts_arr[self.fill] = ts
+        self.fill += 1
+        self.chunk_last[-1] = ts
+
+    def query(self, t0: float, t1: float, device_idx=None, field_idx=None) -> dict:
+        """Return rows with t0 <= ts < t1, touching only overlapping chunks."""
+        # first chunk whose last ts >= t0, up to the first chunk starting at t1
+        start = bisect.bisect_left(self.chunk_last, t0)
+        stop = bisect.bisect_left(self.chunk_first, t1)
+
+        ts_parts, val_parts = [], []
+        for k in range(start, stop):
+            cid = self.chunk_ids[k]
+            ts_arr, val_arr = self._open(cid)
+            n = self.fill if k == len(self.chunk_ids) - 1 else self.chunk_rows
+            ts_view = ts_arr[:n]
+            lo = int(np.searchsorted(ts_view, t0, side="left"))
+            hi = int(np.searchsorted(ts_view, t1, side="left"))
+            if hi <= lo:
+                continue
+            block = val_arr[lo:hi]
+            if device_idx is not None:
+                block = block[:, device_idx]
+            if field_idx is not None:
+                block = block[..., field_idx]
+            ts_parts.append(np.array(ts_view[lo:hi]))
+            val_parts.append(np.array(block))
+
+        if not ts_parts:
+            n_dev = len(self.names) if device_idx is None else len(device_idx)
+            n_fld = len(self.fields) if field_idx is None else len(field_idx)
+            return {
+                "ts": np.empty(0),
+                "values": np.empty((0, n_dev, n_fld), dtype=np.float32),
+            }
+        return {"ts": np.concatenate(ts_parts), "values": np.concatenate(val_parts)}
+
+    def expire(self, before: float, keep_last: bool) -> bool:
+        """
+        Delete chunks whose last row is older than before; keep_last keeps
+        the chunk being written. Returns True if no chunk is left.
+        """
+        drop = bisect.bisect_left(self.chunk_last, before)
+        if keep_last:
+            drop = min(drop, len(self.chunk_ids) - 1)
+        for cid in self.chunk_ids[:drop]:
+            self._cache.drop((self.path, cid))
+            for fpath in self._files(cid):
+                try:
+                    os.remove(fpath)
+                except FileNotFoundError:
+                    pass
+        del self.chunk_ids[:drop]
+        del self.chunk_first[:drop]
+        del self.chunk_last[:drop]
+        if not self.chunk_ids:
+            self.fill = 0
+        return not self.chunk_ids
+
+    def flush(self):
+        if self.chunk_ids:
+            ts_arr, val_arr = self._open(self.chunk_ids[-1])
+            val_arr.flush()
+            ts_arr.flush()
+
+
+class _ChunkCache:
+    """Small LRU of open memmaps so memory stays bounded."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def drop(self, key):
+        self._items.pop(key, None)
+
+    def put(self, key, item):
+        self._items[key] = item
+        self._items.move_to_end(key)
+        while len(self._items) > self.capacity:
+            _, (ts, val) = self._items.popitem(last=False)
+            ts.flush()
+            val.flush()
+
+
+class _Rollup:
+    """Running mean for one rollup tier: O(devices x fields) memory."""
+
+    def __init__(self, bucket_s: int, shape: tuple, layout: tuple):
+        self.bucket_s = bucket_s
+        self.layout = layout  # (names, fields) the sums are laid out for
+        self.bucket = None
+        self.sum = np.zeros(shape, dtype=np.float64)
+        self.count = 0
+
+    def add(self, ts: float, values: np.ndarray):
+        """Accumulate one row; return (bucket_ts, mean) when a bucket closes."""
+        bucket = ts - (ts % self.bucket_s)
+        closed = None
+        if self.bucket is not None and bucket != self.bucket and self.count:
+            closed = (self.bucket, (self.sum / self.count).astype(np.float32))
+            self.sum[:] = 0.0
+            self.count = 0
+        self.bucket = bucket
+        self.sum += values
+        self.count += 1
+        return closed
+
+
+class TelemetryStore:
+    """
+    Chunked, columnar, memory-mapped telemetry store.
+
+    Usage:
+        store = TelemetryStore()
+        store.append("chillers", names, readings)
+        store.query("chillers", t0, t1, devices=["CH-5"], fields=["power"])
+    """
+
+    def __init__(
+        self,
+        root: str = TELEMETRY_DIR,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+        background: bool = True,
+        retention: dict = None,
+    ):
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.retention = dict(RETENTION_S if retention is None else retention)
+        self._cache = _ChunkCache(MAX_OPEN_CHUNKS)
+        self._series = {}
+        self._rollups = {}
+        self._lock = threading.RLock()
+
+        self._queue = None
+        self._worker = None
+        if background:
+            self._queue = queue.Queue(maxsize=1024)
+            self._worker = threading.Thread(
+                target=self._rollup_loop, name="telemetry-rollup", daemon=True
+            )
+            self._worker.start()
+
+    # -------------------------------------------------------------
+    # series management
+    # -------------------------------------------------------------
+    def _segments(self, device_class: str, tier: str) -> list:
+        """Segments of one series, oldest first (loaded on first use)."""
+        key = (device_class, tier)
+        segments = self._series.get(key)
+        if segments is None:
+            path = os.path.join(self.root, device_class, tier)
+            segments = []
+            if os.path.isdir(path):
+                if _read_meta(path) is not None:
+                    # single-segment layout written before segments existed
+                    segments.append(_Series(path, None, None, self.chunk_rows, self._cache))
+                for fname in sorted(os.listdir(path)):
+                    seg_path = os.path.join(path, fname)
+                    if fname.startswith(SEGMENT_PREFIX) and _read_meta(seg_path) is not None:
+                        segments.append(
+                            _Series(seg_path, None, None, self.chunk_rows, self._cache)
+                        )
+            self._series[key] = segments
+        return segments
+
+    def _get_series(self, device_class: str, tier: str, names: list, fields: list):
+        """Segment to append to; a new one is started if the layout changed."""
+        segments = self._segments(device_class, tier)
+        if segments and segments[-1].names == names and segments[-1].fields == fields:
+            return segments[-1]
+        last = segments[-1].path if segments else ""
+        base = os.path.basename(last)
+        seq = int(base[len(SEGMENT_PREFIX):]) + 1 if base.startswith(SEGMENT_PREFIX) else 0
+        path = os.path.join(
+            self.root, device_class, tier, "{}{:06d}".format(SEGMENT_PREFIX, seq)
+        )
+        series = _Series(path, names, fields, self.chunk_rows, self._cache)
+        segments.append(series)
+        return series
+
+    def _append_row(self, device_class, tier, names, fields, ts, values):
+        series = self._get_series(device_class, tier, names, fields)
+        series.append(ts, values)
+        keep_s = self.retention.get(tier)
+        if keep_s is not None and series.fill == 1:
+            self._expire(device_class, tier, ts - keep_s)
+
+    def _expire(self, device_class: str, tier: str, before: float):
+        segments = self._segments(device_class, tier)
+        for series in list(segments):
+            writer = series is segments[-1]
+            if series.expire(before, keep_last=writer) and not writer:
+                segments.remove(series)
+                if os.path.basename(series.path).startswith(SEGMENT_PREFIX):
+                    shutil.rmtree(series.path, ignore_errors=True)
+
+    # -------------------------------------------------------------
+    # append
+    # -------------------------------------------------------------
+    def append(self, device_class: str, names: list, readings, ts: float = None):
+        """
+        Append one sample for every device of a class (ts defaults to now).
+
+        readings is either a columnar batch {field: array[devices]} (as
+        returned by the simulator batch engine) or a list of per-device
+        readings dicts in the same order as names.
+        """
+        if isinstance(readings, dict):
+            fields = list(readings.keys())
+            values = np.stack(
+                [np.asarray(readings[f], dtype=np.float32) for f in fields], axis=-1
+            )
+        else:
+            fields = list(readings[0].keys()) if readings else []
+            values = np.array(
+                [[float(r.get(f, 0.0)) for f in fields] for r in readings],
+                dtype=np.float32,
+            ).reshape(len(names), len(fields))
+
+        names = list(names)
+        with self._lock:
+            if ts is None:
+                ts = time.time()
+            self._append_row(device_class, "1s", names, fields, ts, values)
+
+        if self._queue is not None:
+            self._queue.put((device_class, names, fields, ts, values))
+        else:
+            self._roll(device_class, names, fields, ts, values)
+
+    def _roll(self, device_class, names, fields, ts, values):
+        layout = (tuple(names), tuple(fields))
+        for tier in ROLLUP_TIERS:
+            key = (device_class, tier)
+            acc = self._rollups.get(key)
+            if acc is None or acc.layout != layout:
+                # fleet changed: the open bucket mixed two layouts, drop it
+                acc = _Rollup(TIERS[tier], values.shape, layout)
+                self._rollups[key] = acc
+            closed = acc.add(ts, values)
+            if closed is not None:
+                with self._lock:
+                    self._append_row(device_class, tier, names, fields, *closed)
+
+    def _rollup_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self._roll(*item)
+            finally:
+                self._queue.task_done()
+
+    # -------------------------------------------------------------
+    # query
+    # -------------------------------------------------------------
+    def pick_tier(self, t0: float, t1: float, max_points: int = MAX_QUERY_POINTS):
+        """Finest tier that returns at most max_points rows for [t0, t1)."""
+        span = max(t1 - t0, 0.0)
+        for tier, bucket_s in TIERS.items():
+            if span / bucket_s <= max_points:
+                return tier
+        return next(reversed(TIERS))
+
+    def query(
+        self,
+        device_class: str,
+        t0: float,
+        t1: float,
+        devices=None,
+        fields=None,
+        tier: str = "auto",
+    ) -> dict:
+        """
+        Range query over [t0, t1).
+
+        Returns {"ts": array[rows], "devices": [...], "fields": [...],
+                 "values": array[rows, devices, fields], "tier": tier}.
+        """
+        if tier == "auto":
+            tier = self.pick_tier(t0, t1)
+
+        with self._lock:
+            segments = self._segments(device_class, tier)
+            if not segments:
+                return {
+                    "ts": np.empty(0),
+                    "devices": list(devices or []),
+                    "fields": list(fields or []),
+                    "values": np.empty((0, 0, 0), dtype=np.float32),
+                    "tier": tier,
+                }
+            devices = list(segments[-1].names if devices is None else devices)
+            fields = list(segments[-1].fields if fields is None else fields)
+            ts_parts, val_parts = [], []
+            for series in segments:
+                if not series.chunk_ids or series.chunk_last[-1] < t0:
+                    continue
+                if series.chunk_first[0] >= t1:
+                    break
+                part = self._query_segment(series, t0, t1, devices, fields)
+                if part is not None:
+                    ts_parts.append(part[0])
+                    val_parts.append(part[1])
+
+        if ts_parts:
+            ts_out, values = np.concatenate(ts_parts), np.concatenate(val_parts)
+        else:
+            ts_out = np.empty(0)
+            values = np.empty((0, len(devices), len(fields)), dtype=np.float32)
+        return {
+            "ts": ts_out,
+            "devices": devices,
+            "fields": fields,
+            "values": values,
+            "tier": tier,
+        }
+
+    @staticmethod
+    def _query_segment(series, t0, t1, devices, fields):
+        """Rows of one segment with columns mapped onto devices x fields by name."""
+        dev = [series.name_index.get(d) for d in devices]
+        fld = [series.field_index.get(f) for f in fields]
+        if None not in dev and None not in fld:
+            out = series.query(t0, t1, dev, fld)
+            return (out["ts"], out["values"]) if len(out["ts"]) else None
+        have_d = [k for k, i in enumerate(dev) if i is not None]
+        have_f = [k for k, j in enumerate(fld) if j is not None]
+        out = series.query(t0, t1, [dev[k] for k in have_d], [fld[k] for k in have_f])
+        rows = len(out["ts"])
+        if not rows:
+            return None
+        values = np.full((rows, len(devices), len(fields)), np.nan, dtype=np.float32)
+        if have_d and have_f:
+            values[:, np.array(have_d)[:, None], np.array(have_f)[None, :]] = out["values"]
+        return out["ts"], values
+
+    def flush(self):
+        """Wait for pending rollups and flush open chunks to disk."""
+        if self._queue is not None:
+            self._queue.join()
+        with self._lock:
+            for segments in self._series.values():
+                for series in segments:
+                    series.flush()
+
+    def close(self):
+        self.flush()
+        if self._queue is not None:
+            self._queue.put(None)
+            self._worker.join(timeout=5)
+            self._queue = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> TelemetryStore:
+    """Process-wide telemetry store shared by all Streamlit sessions."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TelemetryStore()
+        return _store
+
+
+def record_fleet(device_class: str, devices: list, readings, ts: float = None):
+    """Append one tick of readings for a config device list (keyed by name)."""
+    names = [d["name"] for d in devices]
+    get_store().append(device_class, names, readings, ts)
@@ -0,0 +1,15 @@
+import numpy as np
+
+from alarm_detector import EWMA_WARMUP, AlarmDetector
+
+
+def test_driver_readings_without_derive_inputs_are_scored():
+    detector = AlarmDetector()
+    names = ("CH-1", "CH-2")
+    # a driver that reports inlet and flow but no outlet: delta_t is skipped
+    batch = {"inlet": np.array([30.0, 20.0]), "flow": np.array([230.0, 230.0])}
+    events = []
+    for t in range(EWMA_WARMUP + 1):
+        events += detector.update("chillers", names, batch, float(t))
+    assert [(e["source"], e["state"]) for e in events] == [("CH-1", "raise")]
+    assert "return temperature" in events[0]["message"]
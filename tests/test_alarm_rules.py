@@ -0,0 +1,10 @@
+from alarm_rules import classify, message_template
+
+
+def test_rules_only_match_their_systems():
+    msg = message_template("UPS2 high load – output above 80% rated.")
+    assert classify("UPS", msg)["id"] == "ups_high_load"
+    assert classify("Chiller", msg)["id"] == "generic"
+    standby = message_template("CH-10 switched to standby mode after load sharing.")
+    assert classify("Chiller", standby)["id"] == "chiller_standby"
+    assert classify("Genset", standby)["id"] == "generic"
@@ -0,0 +1,34 @@
+from alarm_store import AlarmStore
+
+
+def _event(i, system, severity):
+    return {
+        "ts": float(i),
+        "severity": severity,
+        "system": system,
+        "source": "{}-{}".format(system, i % 3),
+        "message": "event {}".format(i),
+    }
+
+
+def test_system_and_severity_page_through_the_pair_index():
+    store = AlarmStore()
+    for i in range(2000):
+        system = "chillers" if i % 2 else "ups"
+        severity = "critical" if i % 50 == 1 else "warning"
+        store.append(_event(i, system, severity))
+    # "chillers" alone matches half the history; the pair list is short
+    expected = [i for i in range(1999, -1, -1) if i % 50 == 1]
+
+    got, cursor = [], None
+    while True:
+        page = store.query(system="chillers", severity="critical", limit=7, cursor=cursor)
+        got.extend(r["id"] for r in page["items"])
+        assert page["total"] == len(expected)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert got == expected
+
+    page = store.query(system="chillers", severity="critical", source="chillers-1")
+    assert [r["id"] for r in page["items"]] == [i for i in expected if i % 3 == 1][:20]
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from analytics import BucketWindow, EnergyAnalytics
+
+
+def _feed(engine, ts, facility, it):
+    engine.update("transformers", {"power": np.array([facility])}, ts)
+    engine.update("ups", {"power": np.array([it])}, ts)
+
+
+def test_bucket_window_expires_old_buckets():
+    w = BucketWindow(span=60.0, n_buckets=6, n_metrics=1)
+    w.add(5.0, np.array([10.0]), 1.0)
+    w.add(25.0, np.array([10.0]), 1.0)
+    w.expire(59.0)
+    assert w.total_s == 2.0
+
+    # 65 s is bucket 6: bucket 0 (t 0-10) has left the window
+    w.expire(65.0)
+    assert w.total_s == 1.0
+    assert w.total[0] == pytest.approx(10.0)
+    w.expire(200.0)
+    assert w.total_s == 0.0
+    assert (w.slot == -1).all()
+
+
+def test_gap_longer_than_max_gap_is_not_integrated():
+    engine = EnergyAnalytics(max_gap_s=60.0)
+    _feed(engine, 1000.0, 100.0, 50.0)
+    _feed(engine, 1010.0, 100.0, 50.0)
+    _feed(engine, 1310.0, 100.0, 50.0)  # 300 s of silence
+    _feed(engine, 1320.0, 100.0, 50.0)
+
+    w = engine.window("1h", now=1320.0)
+    assert w["covered_s"] == pytest.approx(20.0)
+    assert w["facility_kwh"] == pytest.approx(100.0 * 20.0 / 3600.0)
+
+
+def test_pue_comes_from_window_energies():
+    engine = EnergyAnalytics()
+    # 10 s at PUE 2.0 on a small load, then 30 s at PUE 1.2 on a large one
+    _feed(engine, 0.0, 200.0, 100.0)
+    _feed(engine, 10.0, 1200.0, 1000.0)
+    _feed(engine, 40.0, 1200.0, 1000.0)
+
+    w = engine.window("1h", now=40.0)
+    facility = 200.0 * 10 + 1200.0 * 30
+    it = 100.0 * 10 + 1000.0 * 30
+    assert w["pue"] == pytest.approx(facility / it)
+    assert w["pue"] != pytest.approx((2.0 * 10 + 1.2 * 30) / 40)
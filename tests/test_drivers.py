@@ -0,0 +1,85 @@
+import time
+
+import numpy as np
+import pytest
+
+from drivers import ModbusTcpDriver, decode_registers, encode_batch
+from modbus_server import FakeModbusServer
+
+
+def _fleet(n, **modbus):
+    devices = [{"name": "TR{}".format(i + 1), "status": "ON"} for i in range(n)]
+    if modbus:
+        for i, dev in enumerate(devices):
+            dev["modbus"] = dict(modbus, base=i * 3)
+    return devices
+
+
+@pytest.fixture
+def server():
+    server = FakeModbusServer().start()
+    yield server
+    server.stop()
+
+
+def test_register_round_trip(server):
+    devices = _fleet(4)
+    batch = {
+        "voltage": np.array([415.0, 414.2, 0.0, 416.9]),
+        "current": np.array([649.2, 650.0, 0.0, -12.5]),
+        "power": np.array([420.0, 421.3, 0.0, 9.9]),
+    }
+    server.load_fleet("transformers", devices, batch)
+    driver = ModbusTcpDriver(server.host, server.port)
+    try:
+        got = driver.read("transformers", devices)
+    finally:
+        driver.close()
+    for field, values in batch.items():
+        assert np.allclose(got[field], values), field
+    assert np.array_equal(
+        encode_batch("transformers", got), encode_batch("transformers", batch)
+    )
+
+
+def test_contiguous_devices_coalesce_into_one_request(server):
+    # 40 transformers x 3 registers = 120 words, under the 125 limit
+    devices = _fleet(40)
+    server.load_fleet("transformers", devices)
+    driver = ModbusTcpDriver(server.host, server.port)
+    try:
+        got = driver.read("transformers", devices)
+    finally:
+        driver.close()
+    assert driver.stats["requests"] == 1
+    assert server.requests == 1
+    expected = decode_registers("transformers", server.registers_for("transformers", devices))
+    assert np.allclose(got["power"], expected["power"])
+
+
+def test_dropped_and_late_units_read_nan_without_stalling(server):
+    slow = FakeModbusServer(latency_s=1.0).start()
+    try:
+        good = _fleet(2)
+        dropped = _fleet(2, unit=7)
+        late = _fleet(2, host=slow.host, port=slow.port, unit=1)
+        devices = good + dropped + late
+        server.load_fleet("transformers", good + dropped)
+        slow.load_fleet("transformers", late)
+        server.failed_units.add(7)
+
+        driver = ModbusTcpDriver(server.host, server.port, cycle_budget_s=0.3)
+        try:
+            t0 = time.perf_counter()
+            got = driver.read("transformers", devices)
+            elapsed = time.perf_counter() - t0
+        finally:
+            driver.close()
+    finally:
+        slow.stop()
+
+    assert elapsed < 0.9
+    assert not np.isnan(got["power"][:2]).any()
+    assert np.isnan(got["power"][2:]).all()
+    assert driver.stats["errors"] == 1
+    assert driver.stats["late"] == 1
@@ -0,0 +1,27 @@
+import numpy as np
+
+from plant_model import ZONE_C, ChillerPlantModel, run_scenario
+
+
+def fleet(n_on, n=30, setpoint=21.0):
+    return [
+        {"name": "CH-{}".format(i), "status": "ON" if i <= n_on else "OFF", "setpoint": setpoint}
+        for i in range(1, n + 1)
+    ]
+
+
+def test_undersized_plant_supply_stays_bounded():
+    # 2 of 30 running cannot carry the design load
+    out = run_scenario(fleet(2), hours=24, dt=60)
+    assert np.isfinite(out["max_supply"]).all()
+    assert out["max_supply"].max() < ZONE_C
+    assert out["max_supply"].max() > 25.0  # it does run warm
+
+
+def test_sized_plant_holds_setpoint():
+    model = ChillerPlantModel(10)
+    model.sync(fleet(10, n=10))
+    for _ in range(120):
+        model.step(60.0, 5000.0, 30.0)
+    assert np.allclose(model.supply, 21.0, atol=0.1)
+    assert (model.inlet > model.supply).all()
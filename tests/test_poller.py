@@ -0,0 +1,26 @@
+import threading
+
+from poller import AsyncPoller
+from simulator import simulate_ups
+
+
+def test_hung_sync_read_does_not_hold_shared_workers():
+    release = threading.Event()
+
+    def read(device):
+        if device["name"] in ("UPS1", "UPS2", "UPS3"):
+            release.wait(10)
+        return simulate_ups(device)
+
+    devices = [{"name": "UPS{}".format(i), "status": "ON"} for i in range(1, 9)]
+    poller = AsyncPoller({"ups": read}, max_concurrency=2, timeout=0.1, max_hung=4)
+    try:
+        first = poller.poll("ups", devices)
+        second = poller.poll("ups", devices)
+    finally:
+        release.set()
+        poller.close()
+
+    assert [r.error for r in first.readings[:3]] == ["timeout"] * 3
+    assert [r.error for r in second.readings[:3]] == ["busy"] * 3
+    assert not any(r.stale for r in first.readings[3:] + second.readings[3:])
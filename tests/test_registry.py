@@ -0,0 +1,49 @@
+import shutil
+from pathlib import Path
+
+import utils
+from control import Batch
+from registry import get_registry
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _configs(tmp_path, monkeypatch):
+    for name in ("config_chillers.json", "config_power.json"):
+        shutil.copy(ROOT / name, tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+
+
+def test_save_goes_through_the_journal(tmp_path, monkeypatch):
+    _configs(tmp_path, monkeypatch)
+    snapshot = (tmp_path / "config_chillers.json").read_text()
+
+    registry = get_registry()
+    registry["chillers"].set_setpoint(4, 19.3)
+    registry["chillers"].set_status(2, "ON")
+    assert registry.save() == 2
+
+    assert (tmp_path / "config_chillers.json").read_text() == snapshot
+    assert (tmp_path / "config_chillers.json.journal").exists()
+    chillers = utils.load_chillers()["chillers"]
+    assert chillers[4]["setpoint"] == 19.3 and chillers[2]["status"] == "ON"
+    assert registry.save() == 0
+
+
+def test_setpoints_keep_float64_precision(tmp_path, monkeypatch):
+    _configs(tmp_path, monkeypatch)
+    table = get_registry()["chillers"]
+    table.set_setpoint(0, 19.35)
+    assert table.device(0)["setpoint"] == 19.35
+
+
+def test_batch_picks_names_and_tags_through_the_registry(tmp_path, monkeypatch):
+    _configs(tmp_path, monkeypatch)
+    registry = get_registry()
+    registry["chillers"].add_tag("north", [0, 1])
+    registry.save()
+
+    batch = Batch()
+    assert batch._pick("chillers", "tag:NORTH") == [0, 1]
+    assert batch._pick("chillers", "ch-5") == [4]
+    assert get_registry().lookup("CH-5") == ("chillers", 4)
@@ -0,0 +1,28 @@
+import shutil
+from pathlib import Path
+
+import scheduler
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class _BrokenStore:
+    def append(self, *args, **kwargs):
+        raise OSError("disk full")
+
+
+def test_listeners_run_when_telemetry_append_fails(tmp_path, monkeypatch):
+    for name in ("config_chillers.json", "config_power.json"):
+        shutil.copy(ROOT / name, tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(scheduler, "get_store", lambda: _BrokenStore())
+
+    seen = []
+    sched = scheduler.SimulationScheduler()
+    sched.add_listener(lambda readings, batch: seen.append(readings.device_class))
+    sched.add_listener(lambda readings, batch: 1 / 0)
+    sched.add_listener(lambda readings, batch: seen.append("after"))
+
+    readings = sched.tick("pahu")
+    assert readings.names
+    assert seen == ["pahu", "after"]
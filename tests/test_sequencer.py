@@ -0,0 +1,73 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from sequencer import ChillerCurves, Sequencer, plan
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_settings_persist_through_the_config(tmp_path, monkeypatch):
+    shutil.copy(ROOT / "config_chillers.json", tmp_path / "config_chillers.json")
+    monkeypatch.chdir(tmp_path)
+
+    Sequencer().configure(enabled=True, max_setpoint=30.0, redundancy=2)
+
+    other = Sequencer()
+    assert not other.enabled
+    other.load_settings()
+    assert other.settings() == {"enabled": True, "max_setpoint": 26.0, "redundancy": 2}
+
+
+def _curves(capacity):
+    capacity = np.asarray(capacity, dtype=np.float64)
+    return ChillerCurves(capacity, capacity / 5.0)
+
+
+def test_locked_units_keep_their_state():
+    curves = _curves([1000.0] * 4)
+    running = np.array([True, True, False, False])
+    locked = np.array([True, False, True, False])
+    # a tiny load would otherwise stop unit 0; a huge one would start unit 2
+    low = plan(50.0, running, curves, locked=locked, redundancy=0)
+    high = plan(2900.0, running, curves, locked=locked, redundancy=0)
+    assert low.running[0] and not low.running[2]
+    assert high.running[0] and not high.running[2]
+
+
+def test_n_plus_one_survives_losing_the_largest_unit():
+    cap = np.array([1200.0, 800.0, 800.0, 600.0, 600.0])
+    p = plan(1500.0, np.zeros(5, dtype=bool), _curves(cap))
+    on = cap[p.running]
+    assert p.feasible
+    assert on.sum() - on.max() >= 1500.0
+
+
+def test_redundancy_subtracts_the_k_largest_units():
+    # 2000 kW running less the two largest (1000 + 500) still covers 400 kW;
+    # k x the largest unit would call this infeasible
+    cap = np.array([1000.0, 500.0, 500.0])
+    p = plan(400.0, np.zeros(3, dtype=bool), _curves(cap), redundancy=2)
+    assert p.feasible
+    assert p.running.all()
+
+
+def test_no_unit_runs_above_full_load():
+    cap = np.array([1000.0, 500.0, 500.0, 500.0])
+    for load in (200.0, 900.0, 1600.0, 2000.0):
+        p = plan(load, np.zeros(4, dtype=bool), _curves(cap), redundancy=0)
+        assert (load / p.running.sum() <= cap[p.running]).all()
+
+
+def test_infeasible_redundancy_still_covers_the_load():
+    cap = np.array([1000.0] * 3)
+    p = plan(2500.0, np.zeros(3, dtype=bool), _curves(cap))
+    assert not p.feasible
+    assert cap[p.running].sum() >= 2500.0
+
+    # beyond what equal sharing allows, every unit runs rather than a few
+    cap = np.array([1000.0, 500.0, 500.0, 500.0])
+    p = plan(2400.0, np.zeros(4, dtype=bool), _curves(cap), redundancy=0)
+    assert not p.feasible
+    assert p.running.all()
@@ -0,0 +1,44 @@
+import numpy as np
+
+from telemetry_store import TelemetryStore
+
+
+def batch(n, value):
+    return {"power": np.full(n, value), "flow": np.full(n, value + 1)}
+
+
+def test_fleet_change_rolls_over_to_a_new_segment(tmp_path):
+    store = TelemetryStore(str(tmp_path), chunk_rows=4, background=False)
+    names = ["CH-{}".format(i) for i in range(1, 31)]
+    store.append("chillers", names, batch(30, 1.0), ts=100.0)
+    store.append("chillers", names + ["CH-31"], batch(31, 2.0), ts=101.0)
+
+    out = store.query("chillers", 0, 200, devices=["CH-1", "CH-31"], fields=["power"], tier="1s")
+    assert out["ts"].tolist() == [100.0, 101.0]
+    assert out["values"][0, 0, 0] == 1.0 and np.isnan(out["values"][0, 1, 0])
+    assert out["values"][1, :, 0].tolist() == [2.0, 2.0]
+
+
+def test_restart_with_a_different_layout(tmp_path):
+    store = TelemetryStore(str(tmp_path), background=False)
+    store.append("ups", ["UPS-1", "UPS-2"], batch(2, 1.0), ts=10.0)
+    store.close()
+
+    store = TelemetryStore(str(tmp_path), background=False)
+    store.append("ups", ["UPS-2"], {"power": np.array([5.0])}, ts=20.0)
+    out = store.query("ups", 0, 30, tier="1s")
+    assert out["devices"] == ["UPS-2"] and out["fields"] == ["power"]
+    assert out["values"][:, 0, 0].tolist() == [1.0, 5.0]
+
+
+def test_raw_tier_retention(tmp_path):
+    store = TelemetryStore(
+        str(tmp_path), chunk_rows=10, background=False, retention={"1s": 50}
+    )
+    for t in range(200):
+        store.append("pahu", ["P-1"], {"power": np.array([float(t)])}, ts=float(t))
+    out = store.query("pahu", 0, 1000, tier="1s")
+    assert out["ts"][0] >= 200 - 50 - 10
+    assert out["ts"][-1] == 199.0
+    files = list((tmp_path / "pahu" / "1s").rglob("ts_*.npy"))
+    assert len(files) <= 7
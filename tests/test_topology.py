@@ -0,0 +1,52 @@
+import json
+import shutil
+from pathlib import Path
+
+import scheduler
+import utils
+from topology import LiveGrid
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _config(tmp_path, monkeypatch):
+    for name in ("config_chillers.json", "config_power.json"):
+        shutil.copy(ROOT / name, tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+
+
+def _feeder_kw(sched, names=("TR5", "TR6")):
+    readings = sched.tick("transformers")
+    return sum(
+        row["power"] for name, row in zip(readings.names, readings.rows) if name in names
+    )
+
+
+def test_pahu_off_lowers_feeder_load(tmp_path, monkeypatch):
+    _config(tmp_path, monkeypatch)
+    monkeypatch.setattr(scheduler, "get_store", lambda: None)
+    sched = scheduler.SimulationScheduler()
+    sched.record = False
+
+    before = _feeder_kw(sched)
+    utils.update_device("pahu", "PAHU1", {"status": "OFF"})
+    after = _feeder_kw(sched)
+
+    assert after == before - 6.0
+
+
+def test_topology_change_rebuilds_flow(tmp_path, monkeypatch):
+    _config(tmp_path, monkeypatch)
+    grid = LiveGrid(noise=0.0)
+    snap = utils.get_snapshot("power")
+    grid.tick("transformers", snap.data["transformers"], snap.data, snap.version)
+    grid.set_demand("MECH-A", 300.0)
+
+    data = json.loads((tmp_path / "config_power.json").read_text())
+    data["topology"]["loads"]["PAHU1"]["demand_kw"] = 50.0
+    utils.save_power(data)
+    snap = utils.get_snapshot("power")
+    grid.tick("transformers", snap.data["transformers"], snap.data, snap.version)
+
+    assert grid.flow.demand["PAHU1"] == 50.0
+    assert grid.flow.demand["MECH-A"] == 300.0
@@ -0,0 +1,33 @@
+import os
+
+from tts import AudioCache
+
+
+def _files(root):
+    return sorted(name for _, _, names in os.walk(root) for name in names)
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = AudioCache(str(tmp_path), max_items=1, max_disk_bytes=250)
+    for key in ("aa1", "bb2", "cc3"):
+        cache.put(key, b"x" * 100)
+    assert _files(tmp_path) == ["bb2", "cc3"]
+
+    assert cache.get("bb2") == b"x" * 100  # from disk; now most recent
+    cache.put("dd4", b"x" * 100)
+    assert _files(tmp_path) == ["bb2", "dd4"]
+    assert cache.stats["evicted"] == 2
+
+    # a restarted process picks the existing files up in its budget
+    again = AudioCache(str(tmp_path), max_items=1, max_disk_bytes=250)
+    again.put("ee5", b"x" * 100)
+    assert len(_files(tmp_path)) == 2
+
+
+def test_put_survives_unwritable_cache_dir(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_bytes(b"")
+    cache = AudioCache(str(blocker), max_items=4)
+    cache.put("aa1", b"audio")
+    assert cache.stats["write_errors"] == 1
+    assert cache.get("aa1") == b"audio"
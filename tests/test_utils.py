@@ -0,0 +1,22 @@
+import json
+import shutil
+from pathlib import Path
+
+import utils
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_thawed_config_saves_as_is(tmp_path, monkeypatch):
+    shutil.copy(ROOT / "config_power.json", tmp_path / "config_power.json")
+    monkeypatch.chdir(tmp_path)
+
+    data = utils.load_power()
+    utils.edit_record(data, "pahu", 0)["status"] = "OFF"
+    utils.save_power(data)
+
+    saved = json.loads((tmp_path / "config_power.json").read_text())
+    original = json.loads((ROOT / "config_power.json").read_text())
+    assert saved["pahu"][0]["status"] == "OFF"
+    assert saved["topology"] == original["topology"]
+    assert saved["transformers"] == original["transformers"]
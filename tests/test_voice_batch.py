@@ -0,0 +1,84 @@
+import io
+import shutil
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import stt
+import utils
+import voice_batch
+
+ROOT = Path(__file__).resolve().parent.parent
+RATE = 16000
+
+
+def _wav(samples: np.ndarray, rate: int = RATE) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.astype(np.int16).tobytes())
+    return buf.getvalue()
+
+
+def _tone(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return 8000 * np.sin(2 * np.pi * 440 * t)
+
+
+class _StubPool:
+    """Stands in for the STT process pool: returns canned transcripts."""
+
+    def __init__(self, texts):
+        self.texts = list(texts)
+
+    def map(self, fn, jobs):
+        jobs = list(jobs)
+        assert len(jobs) == len(self.texts)
+        return iter(self.texts)
+
+
+def test_split_on_silence_finds_two_bursts():
+    silence = np.zeros(RATE)
+    signal = np.concatenate([silence, _tone(1.0), silence, _tone(1.5), silence])
+    spans = voice_batch.split_on_silence(signal.astype(np.int16), RATE)
+    assert len(spans) == 2
+    (s1, e1), (s2, e2) = spans
+    pad = voice_batch.PAD_MS / 1000
+    assert abs(s1 / RATE - (1.0 - pad)) < 0.05 and abs(e1 / RATE - (2.0 + pad)) < 0.05
+    assert abs(s2 / RATE - (3.0 - pad)) < 0.05 and abs(e2 / RATE - (4.5 + pad)) < 0.05
+
+
+def test_batch_over_the_byte_cap_is_rejected(monkeypatch):
+    monkeypatch.setattr(voice_batch, "MAX_BATCH_BYTES", 1000)
+    clip = _wav(_tone(0.02))  # ~700 bytes each
+    with pytest.raises(stt.AudioTooLarge):
+        voice_batch.utterances([("a.wav", clip), ("b.wav", clip)])
+
+
+def test_rejected_utterance_rolls_back_while_the_rest_commits(tmp_path, monkeypatch):
+    shutil.copy(ROOT / "config_chillers.json", tmp_path / "config_chillers.json")
+    shutil.copy(ROOT / "config_power.json", tmp_path / "config_power.json")
+    monkeypatch.chdir(tmp_path)
+
+    clip = _wav(_tone(0.5))
+    recordings = [("1.wav", clip), ("2.wav", clip), ("3.wav", clip)]
+    pool = _StubPool(
+        [
+            "turn on chiller 1",
+            "turn on chiller 2 and turn off chiller 99",  # second intent is out of range
+            "what is the weather",
+        ]
+    )
+    out = voice_batch.process_recordings(recordings, pool=pool)
+
+    status = [r["status"] for r in out["results"]]
+    assert status[0] == "applied"
+    assert status[1].startswith("rejected")
+    assert status[2] == "not understood"
+    chillers = {c["name"]: c["status"] for c in utils.load_chillers()["chillers"]}
+    assert chillers["CH-1"] == "ON"
+    assert chillers["CH-2"] == "OFF"  # rolled back with the rejected intent
@@ -0,0 +1,81 @@
+import pytest
+
+from voice_commands import Intent, parse_command
+
+
+def intents(text):
+    return [tuple(i) for i in parse_command(text)]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "set chiller 3 to 20",
+        "set chiller 3 at 20",
+        "set chiller 3 to 20 degrees",
+        "set chiller 3 setpoint to 20",
+        "chiller 3 setpoint 20",
+        "chiller 3 to 20 degrees",
+        "chiller 3 20 degrees",
+    ],
+)
+def test_setpoint_phrasings(text):
+    assert intents(text) == [("chillers", (3,), "SET", 20.0)]
+
+
+def test_put_is_a_setpoint_verb():
+    assert intents("put chiller 2 to 19") == [("chillers", (2,), "SET", 19.0)]
+    assert intents("put chiller 2 on") == [("chillers", (2,), "ON", None)]
+
+
+@pytest.mark.parametrize(
+    "text", ["turn on chiller 3 setpoint 20", "start chiller 3 at 20 degrees"]
+)
+def test_action_keeps_its_setpoint(text):
+    assert intents(text) == [
+        ("chillers", (3,), "ON", None),
+        ("chillers", (3,), "SET", 20.0),
+    ]
+
+
+def test_ranges():
+    assert intents("turn off chillers 3 to 7") == [("chillers", (3, 4, 5, 6, 7), "OFF", None)]
+    assert intents("chillers 3 to 7") == [("chillers", (3, 4, 5, 6, 7), "TOGGLE", None)]
+    assert intents("turn on chillers 3 to 20")[0][1] == tuple(range(3, 21))
+    assert intents("set chillers 1 to 4 setpoint to 19.5") == [
+        ("chillers", (1, 2, 3, 4), "SET", 19.5)
+    ]
+    assert intents("setpoint of chillers 3 to 7 to 20") == [
+        ("chillers", (3, 4, 5, 6, 7), "SET", 20.0)
+    ]
+
+
+def test_bare_value_after_a_range_is_a_setpoint():
+    assert intents("chillers 3 to 7 20 degrees") == [
+        ("chillers", (3, 4, 5, 6, 7), "SET", 20.0)
+    ]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "chiller 3 to 20",
+        "set chiller 3",
+        "chiller 3 to 20 setpoint",
+        "chiller 3 40 degrees",
+        "chillers 3 to 7 5",
+    ],
+)
+def test_ambiguous_is_rejected(text):
+    assert parse_command(text) == ()
+
+
+def test_lists_and_classes():
+    assert parse_command("turn on chiller 3 and turn off transformer 2") == (
+        Intent("chillers", (3,), "ON", None),
+        Intent("transformers", (2,), "OFF", None),
+    )
+    assert intents("chillers 1, 2 and 9 off") == [("chillers", (1, 2, 9), "OFF", None)]
+    assert intents("turn on all pahus") == [("pahu", None, "ON", None)]
+    assert intents("g3 on") == [("genset", (3,), "ON", None)]
+    assert intents("chiller 5") == [("chillers", (5,), "TOGGLE", None)]
@@ -0,0 +1,330 @@
+"""
+Electrical one-line topology and load-flow propagation.
+
+The "topology" section of config_power.json describes which transformer
+feeds which load and which genset backs which transformer:
+
+    "topology": {
+      "voltage": 415, "power_factor": 0.9, "trip_factor": 1.1,
+      "sources": {"TR1": {"rating_kw": 900, "backup": "G1"}, ...},
+      "gensets": {"G1": {"rating_kw": 1000}, ...},
+      "loads":   {"UPS1": {"feeders": ["TR1", "TR2"], "demand_kw": 420,
+                           "rating_kw": 600}, ...}
+    }
+
+Each load's demand is shared equally by its energized feeders. A feeder
+is energized by its transformer, or by the backup genset when the
+transformer is off. A source that carries more than trip_factor x rating
+trips, and its share moves onto the remaining feeders. That can cascade.
+
+Feeders and loads that share no path form separate components. A status
+or demand change only re-solves the component that contains the device.
+"""
+
+import math
+
+import numpy as np
+
+DEFAULT_VOLTAGE = 415.0
+DEFAULT_PF = 0.9
+DEFAULT_TRIP_FACTOR = 1.1
+
+
+def default_topology(power_data: dict) -> dict:
+    """Topology used when config_power.json has no "topology" section."""
+    trs = [t["name"] for t in power_data.get("transformers", [])]
+    gens = [g["name"] for g in power_data.get("genset", [])]
+    ups = [u["name"] for u in power_data.get("ups", [])]
+    pahu = [p["name"] for p in power_data.get("pahu", [])]
+
+    sources = {}
+    for i, tr in enumerate(trs):
+        sources[tr] = {"rating_kw": 900.0}
+        if i < len(gens):
+            sources[tr]["backup"] = gens[i]
+
+    loads = {}
+    # UPS pairs on TR pairs (2N), PAHUs + chiller plant on the rest
+    for i, u in enumerate(ups):
+        pair = trs[(i // 2) * 2 : (i // 2) * 2 + 2] if trs else []
+        loads[u] = {"feeders": pair, "demand_kw": 420.0, "rating_kw": 600.0}
+    mech = trs[4:] or trs
+    for p in pahu:
+        loads[p] = {"feeders": mech[:2], "demand_kw": 6.0}
+    loads["MECH-A"] = {"feeders": mech, "demand_kw": 1500.0}
+
+    return {
+        "voltage": DEFAULT_VOLTAGE,
+        "power_factor": DEFAULT_PF,
+        "trip_factor": DEFAULT_TRIP_FACTOR,
+        "sources": sources,
+        "gensets": {g: {"rating_kw": 1000.0} for g in gens},
+        "loads": loads,
+    }
+
+
+class LoadFlow:
+    """Incremental load-flow engine over the one-line topology."""
+
+    def __init__(self, power_data: dict):
+        topo = power_data.get("topology") or default_topology(power_data)
+        self.voltage = float(topo.get("voltage", DEFAULT_VOLTAGE))
+        self.pf = float(topo.get("power_factor", DEFAULT_PF))
+        self.trip_factor = float(topo.get("trip_factor", DEFAULT_TRIP_FACTOR))
+
+        self.sources = {k: dict(v) for k, v in topo["sources"].items()}
+        self.gensets = {k: dict(v) for k, v in topo.get("gensets", {}).items()}
+        self.loads = {}
+        for name, spec in topo["loads"].items():
+            spec = dict(spec)
+            spec["feeders"] = list(spec.get("feeders", []))
+            self.loads[name] = spec
+
+        self.status = {}
+        for section in ("transformers", "ups", "genset", "pahu"):
+            for dev in power_data.get(section, []):
+                self.status[dev["name"]] = dev["status"]
+        self.demand = {n: float(s.get("demand_kw", 0.0)) for n, s in self.loads.items()}
+
+        self._build_components()
+        self.results = {}
+        self.tripped = set()
+        for comp in range(len(self._members)):
+            self._solve(comp)
+
+    # -------------------------------------------------------------
+    # graph structure
+    # -------------------------------------------------------------
+    def _build_components(self):
+        parent = {}
+
+        def find(x):
+            parent.setdefault(x, x)
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        def union(a, b):
+            parent[find(a)] = find(b)
+
+        for tr, spec in self.sources.items():
+            find(tr)
+            if spec.get("backup"):
+                union(spec["backup"], tr)
+        for load, spec in self.loads.items():
+            find(load)
+            for f in spec["feeders"]:
+                union(load, f)
+
+        roots = {}
+        self.component = {}
+        for node in list(parent):
+            comp = roots.setdefault(find(node), len(roots))
+            self.component[node] = comp
+        self._members = [[] for _ in roots]
+        for node, comp in self.component.items():
+            self._members[comp].append(node)
+
+    # -------------------------------------------------------------
+    # solving
+    # -------------------------------------------------------------
+    def _kw_to_amps(self, kw: float) -> float:
+        return kw * 1000.0 / (math.sqrt(3) * self.voltage * self.pf)
+
+    def _feeder_source(self, tr: str, tripped: set):
+        """Name of the machine energizing a transformer's bus, or None."""
+        if self.status.get(tr) == "ON" and tr not in tripped:
+            return tr
+        backup = self.sources[tr].get("backup")
+        if backup and self.status.get(backup) == "ON" and backup not in tripped:
+            return backup
+        return None
+
+    def _rating(self, src: str) -> float:
+        if src in self.sources:
+            return float(self.sources[src].get("rating_kw", 0.0))
+        return float(self.gensets.get(src, {}).get("rating_kw", 0.0))
+
+    def _solve(self, comp: int) -> list:
+        """Re-solve one component; return names whose results changed."""
+        members = self._members[comp]
+        feeders = [m for m in members if m in self.sources]
+        loads = [m for m in members if m in self.loads]
+        tripped = set()
+
+        while True:
+            live = {f: self._feeder_source(f, tripped) for f in feeders}
+            carried = {}
+            served = {}
+            for load in loads:
+                on = self.status.get(load, "ON") == "ON"
+                demand = self.demand[load] if on else 0.0
+                active = [f for f in self.loads[load]["feeders"] if live.get(f)]
+                served[load] = bool(active) or demand == 0.0
+                for f in active:
+                    src = live[f]
+                    carried[src] = carried.get(src, 0.0) + demand / len(active)
+
+            new_trips = {
+                src
+                for src, kw in carried.items()
+                if kw > self.trip_factor * self._rating(src)
+            }
+            if not new_trips:
+                break
+            tripped |= new_trips
+
+        self.tripped = (self.tripped - set(members)) | tripped
+
+        results = {}
+        for node in members:
+            if node in self.loads:
+                on = self.status.get(node, "ON") == "ON"
+                kw = self.demand[node] if on and served[node] else 0.0
+                rating = float(self.loads[node].get("rating_kw", 0.0))
+                state = "OFF" if not on else ("ON" if served[node] else "UNSERVED")
+            else:
+                kw = carried.get(node, 0.0)
+                rating = self._rating(node)
+                if node in tripped:
+                    state = "TRIPPED"
+                else:
+                    state = self.status.get(node, "OFF")
+            energized = state == "ON"
+            results[node] = {
+                "state": state,
+                "kw": round(kw, 2),
+                "current": round(self._kw_to_amps(kw), 2),
+                "load_pct": round(100.0 * kw / rating, 2) if rating else 0.0,
+                "voltage": self.voltage if energized else 0.0,
+            }
+
+        changed = [n for n, r in results.items() if self.results.get(n) != r]
+        self.results.update(results)
+        return changed
+
+    # -------------------------------------------------------------
+    # incremental updates
+    # -------------------------------------------------------------
+    def set_status(self, name: str, status: str) -> list:
+        """Change one device's status and re-solve only its component."""
+        if self.status.get(name) == status:
+            return []
+        self.status[name] = status
+        comp = self.component.get(name)
+        return [] if comp is None else self._solve(comp)
+
+    def set_demand(self, load: str, demand_kw: float) -> list:
+        if self.demand.get(load) == demand_kw or load not in self.loads:
+            return []
+        self.demand[load] = float(demand_kw)
+        return self._solve(self.component[load])
+
+    def sync(self, power_data) -> list:
+        """Apply status changes from a config dict, re-solving touched components."""
+        dirty = set()
+        for section in ("transformers", "ups", "genset", "pahu"):
+            for dev in power_data.get(section, []):
+                name = dev["name"]
+                if self.status.get(name) != dev["status"]:
+                    self.status[name] = dev["status"]
+                    if name in self.component:
+                        dirty.add(self.component[name])
+        changed = []
+        for comp in dirty:
+            changed.extend(self._solve(comp))
+        return changed
+
+    # -------------------------------------------------------------
+    # readings
+    # -------------------------------------------------------------
+    def readings_batch(self, devices: list, fields: list, noise: float = 0.0) -> dict:
+        """
+        Columnar readings for a device list from the solved flows.
+        fields is a subset of voltage / current / power / load.
+        """
+        key = {"voltage": "voltage", "current": "current", "power": "kw", "load": "load_pct"}
+        empty = {"voltage": 0.0, "kw": 0.0, "current": 0.0, "load_pct": 0.0}
+        rows = [self.results.get(d["name"], empty) for d in devices]
+        out = {f: np.array([r[key[f]] for r in rows], dtype=np.float64) for f in fields}
+        if noise and "voltage" in out:
+            v = out["voltage"]
+            jitter = np.random.default_rng().uniform(-noise, noise, v.shape)
+            out["voltage"] = np.round(np.where(v > 0, v + jitter, 0.0), 2)
+        return out
+
+
+_FIELDS = {
+    "transformers": ["voltage", "current", "power"],
+    "ups": ["voltage", "current", "power", "load"],
+    "genset": ["voltage", "current", "power", "load"],
+}
+
+
+class LiveGrid:
+    """Scheduler-facing wrapper: keeps one LoadFlow in sync with the config."""
+
+    def __init__(self, noise: float = 1.5):
+        self.noise = noise
+        self.flow = None
+        self.version = None
+        self._layout = None
+        self._demand = {}
+
+    @staticmethod
+    def _layout_of(power_data) -> tuple:
+        names = tuple(
+            tuple(d["name"] for d in power_data.get(section, []))
+            for section in ("transformers", "ups", "genset", "pahu")
+        )
+        return names, power_data.get("topology")
+
+    def _ensure(self, power_data, version=None):
+        """Build the LoadFlow, or rebuild it when a new config changes the topology."""
+        if self.flow is not None and (version is None or version == self.version):
+            return
+        self.version = version
+        layout = self._layout_of(power_data)
+        if self.flow is not None and layout == self._layout:
+            return
+        self.flow = LoadFlow(power_data)
+        self._layout = layout
+        # demand pushed by set_demand() outlives the rebuild
+        for load, kw in self._demand.items():
+            self.flow.set_demand(load, kw)
+
+    def tick(self, device_class: str, devices: list, power_data=None, version=None) -> dict:
+        """
+        Readings for one device class. power_data is the whole power config:
+        every status in it is synced, so a PAHU switched off lowers its
+        feeders' load on the next transformer tick.
+        """
+        if power_data is None:
+            power_data = {device_class: devices}
+        self._ensure(power_data, version)
+        self.flow.sync(power_data)
+        return self.flow.readings_batch(devices, _FIELDS[device_class], self.noise)
+
+    def set_demand(self, load: str, demand_kw: float):
+        self._demand[load] = round(float(demand_kw), 1)
+        if self.flow is not None:
+            self.flow.set_demand(load, self._demand[load])
+
+    def states(self, devices: list) -> list:
+        """Solved state per device (TRIPPED / UNSERVED), else its config status."""
+        results = self.flow.results if self.flow is not None else {}
+        return [
+            results[d["name"]]["state"] if d["name"] in results else d["status"]
+            for d in devices
+        ]
+
+    def alerts(self) -> list:
+        """(name, state) for every tripped source or unserved load."""
+        if self.flow is None:
+            return []
+        return [
+            (name, r["state"])
+            for name, r in self.flow.results.items()
+            if r["state"] in ("TRIPPED", "UNSERVED")
+        ]
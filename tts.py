@@ -0,0 +1,287 @@
+"""
+Text-to-speech backends and a phrase-level audio cache.
+
+    EspeakBackend  offline, espeak-ng / espeak binary, WAV output
+    GttsBackend    gTTS (online), MP3 output
+
+The backend is chosen once per process. Set BMS_TTS_BACKEND to "espeak"
+or "gtts", or leave it at "auto" to use espeak when its binary is on
+PATH.
+
+Synthesized audio is cached by content address: sha256 of backend, voice
+and text. The cache has a bounded in-memory LRU tier and an on-disk tier
+under BMS_TTS_CACHE that survives restarts, evicted least recently used
+once it exceeds BMS_TTS_CACHE_MB. Agent replies repeat a small set of
+fragments, so with a WAV backend (espeak) a reply is split into device
+names, numbers and the phrases between them. Each fragment is cached on
+its own, and the reply is built by joining fragment audio. "CH-7 turned
+ON." then reuses "turned ON." from any earlier reply and only
+synthesizes "CH-7" the first time it is heard. MP3 from gTTS cannot be
+joined, so there only exact repeats of a reply are cached and every new
+reply costs a network round trip.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+import wave
+from collections import OrderedDict
+
+TTS_BACKEND = os.environ.get("BMS_TTS_BACKEND", "auto")
+TTS_CACHE_DIR = os.environ.get("BMS_TTS_CACHE", ".tts_cache")
+DISK_BYTES = int(float(os.environ.get("BMS_TTS_CACHE_MB", "64")) * 1024 * 1024)
+MEMORY_ITEMS = 512
+FRAGMENT_GAP_S = 0.06
+
+log = logging.getLogger(__name__)
+
+# device names and numbers are the variable parts of agent replies
+_FRAGMENT = re.compile(r"((?:CH-|TR|UPS|PAHU|G)\d+|\d+(?:\.\d+)?)")
+
+
+class TtsBackend:
+    name = "base"
+    voice = ""
+    mime = "audio/wav"
+    joinable = False  # output can be concatenated fragment by fragment
+
+    def synthesize(self, text: str) -> bytes:
+        raise NotImplementedError
+
+
+class EspeakBackend(TtsBackend):
+    name = "espeak"
+    mime = "audio/wav"
+    joinable = True
+
+    def __init__(self, voice: str = "en", words_per_minute: int = 160):
+        self.exe = shutil.which("espeak-ng") or shutil.which("espeak")
+        if self.exe is None:
+            raise RuntimeError("espeak-ng / espeak not found on PATH")
+        self.voice = voice
+        self.words_per_minute = words_per_minute
+
+    def synthesize(self, text: str) -> bytes:
+        return subprocess.run(
+            [self.exe, "--stdout", "-v", self.voice, "-s", str(self.words_per_minute), text],
+            check=True,
+            capture_output=True,
+            timeout=30,
+        ).stdout
+
+
+class GttsBackend(TtsBackend):
+    name = "gtts"
+    voice = "en"
+    mime = "audio/mp3"
+
+    def synthesize(self, text: str) -> bytes:
+        from gtts import gTTS
+
+        buf = io.BytesIO()
+        gTTS(text=text, lang=self.voice).write_to_fp(buf)
+        return buf.getvalue()
+
+
+# -------------------------------------------------------------
+# cache
+# -------------------------------------------------------------
+class AudioCache:
+    """Content-addressed audio: memory LRU in front of a directory of files."""
+
+    def __init__(
+        self,
+        disk_dir: str = TTS_CACHE_DIR,
+        max_items: int = MEMORY_ITEMS,
+        max_disk_bytes: int = DISK_BYTES,
+    ):
+        self.disk_dir = disk_dir
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = {"memory": 0, "disk": 0, "miss": 0, "evicted": 0, "write_errors": 0}
+        self._mem = OrderedDict()
+        self._disk = None  # key -> size, least recently used first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(backend: TtsBackend, text: str) -> str:
+        raw = "\0".join((backend.name, backend.voice, text))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def _disk_index(self) -> OrderedDict:
+        """Files already on disk, oldest first by mtime (lock held)."""
+        if self._disk is None:
+            files = []
+            for root, _, names in os.walk(self.disk_dir):
+                for name in names:
+                    if name.endswith(".tmp"):
+                        continue
+                    try:
+                        st = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, name, st.st_size))
+            self._disk = OrderedDict((name, size) for _, name, size in sorted(files))
+            self._disk_bytes = sum(self._disk.values())
+        return self._disk
+
+    def _evict(self):
+        """Drop least recently used files until the disk tier fits (lock held)."""
+        disk = self._disk_index()
+        while self._disk_bytes > self.max_disk_bytes and len(disk) > 1:
+            key, size = disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.stats["evicted"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _remember(self, key: str, audio: bytes):
+        self._mem[key] = audio
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def get(self, key: str):
+        with self._lock:
+            audio = self._mem.get(key)
+            if audio is not None:
+                self._mem.move_to_end(key)
+                self.stats["memory"] += 1
+                return audio
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+            os.utime(self._path(key))  # recency survives a restart
+        except OSError:
+            with self._lock:
+                self.stats["miss"] += 1
+            return None
+        with self._lock:
+            self.stats["disk"] += 1
+            self._remember(key, audio)
+            disk = self._disk_index()
+            if key in disk:
+                disk.move_to_end(key)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        with self._lock:
+            self._remember(key, audio)
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        tmp = "{}.{}.tmp".format(path, threading.get_ident())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)
+        except OSError:
+            # a full or read-only cache directory only costs re-synthesis
+            log.warning("could not write TTS cache file %s", path, exc_info=True)
+            with self._lock:
+                self.stats["write_errors"] += 1
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            disk = self._disk_index()
+            self._disk_bytes += len(audio) - disk.pop(key, 0)
+            disk[key] = len(audio)
+            self._evict()
+
+
+def split_fragments(text: str) -> list:
+    """'Setpoint for CH-3 updated to 20.0 C.' -> ['Setpoint for', 'CH-3', ...]"""
+    return [p.strip() for p in _FRAGMENT.split(text) if p.strip()]
+
+
+def join_wav(parts: list, gap_s: float = FRAGMENT_GAP_S) -> bytes:
+    """Concatenate WAV clips with the same format, separated by short silences."""
+    params = None
+    frames = []
+    for part in parts:
+        with wave.open(io.BytesIO(part), "rb") as w:
+            p = w.getparams()
+            # espeak streams to stdout without knowing the final length, so
+            # the header's frame count is unreliable; read to the end
+            data = w.readframes(1 << 30)
+        if params is None:
+            params = p
+            silence = b"\0" * (int(p.framerate * gap_s) * p.sampwidth * p.nchannels)
+        elif p[:3] != params[:3]:
+            raise ValueError("cannot join clips with different formats")
+        if frames:
+            frames.append(silence)
+        frames.append(data)
+
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(params.nchannels)
+        w.setsampwidth(params.sampwidth)
+        w.setframerate(params.framerate)
+        w.writeframes(b"".join(frames))
+    return buf.getvalue()
+
+
+class Speaker:
+    """Cached speech for agent replies."""
+
+    def __init__(self, backend: TtsBackend, cache: AudioCache = None):
+        self.backend = backend
+        self.cache = cache or AudioCache()
+
+    @property
+    def mime(self) -> str:
+        return self.backend.mime
+
+    def _cached(self, text: str) -> bytes:
+        key = self.cache.key(self.backend, text)
+        audio = self.cache.get(key)
+        if audio is None:
+            audio = self.backend.synthesize(text)
+            self.cache.put(key, audio)
+        return audio
+
+    def say(self, text: str) -> bytes:
+        key = self.cache.key(self.backend, text)
+        audio = self.cache.get(key)
+        if audio is not None:
+            return audio
+        fragments = split_fragments(text)
+        if self.backend.joinable and len(fragments) > 1:
+            audio = join_wav([self._cached(f) for f in fragments])
+        else:
+            audio = self.backend.synthesize(text)
+        self.cache.put(key, audio)
+        return audio
+
+
+_speaker = None
+_speaker_lock = threading.Lock()
+
+
+def get_speaker() -> Speaker:
+    global _speaker
+    with _speaker_lock:
+        if _speaker is None:
+            choice = TTS_BACKEND
+            if choice == "auto":
+                found = shutil.which("espeak-ng") or shutil.which("espeak")
+                choice = "espeak" if found else "gtts"
+            backend = EspeakBackend() if choice == "espeak" else GttsBackend()
+            _speaker = Speaker(backend)
+        return _speaker
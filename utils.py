@@ -1,18 +1,282 @@
 import json
 import os
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from types import MappingProxyType
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
 
 CONFIG_CHILLERS = "config_chillers.json"
 CONFIG_POWER = "config_power.json"
 
+# Per-device updates are appended to "<config>.journal" (one JSON record
+# per line) and folded back into the snapshot once the journal grows
+# past this many bytes.
+JOURNAL_SUFFIX = ".journal"
+COMPACT_BYTES = 64 * 1024
+
+_process_lock = threading.RLock()
+
+
+def _config_path(section: str) -> str:
+    return CONFIG_CHILLERS if section == "chillers" else CONFIG_POWER
+
+
+@contextmanager
+def _locked(path: str):
+    """Exclusive lock shared by threads and processes writing one config."""
+    with _process_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _fsync_dir(path: str):
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _json_default(obj):
+    # frozen records left in place by thaw()
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError("{!r} is not JSON serializable".format(type(obj).__name__))
+
+
+def _write_snapshot(path: str, data: dict):
+    """Atomically replace the snapshot: temp file, fsync, rename."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, default=_json_default)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path)
+
+
+def _apply_record(data: dict, rec: dict, index: dict):
+    if "settings" in rec:
+        # non-device key, e.g. {"section": "chillers", "settings": "sequencer"}
+        current = data.get(rec["settings"])
+        data[rec["settings"]] = dict(current or {}, **rec["fields"])
+        return
+    section = rec["section"]
+    key = (section, rec["name"])
+    if key not in index:
+        for i, dev in enumerate(data.get(section, [])):
+            index[(section, dev["name"])] = i
+    i = index.get(key)
+    if i is not None:
+        data[section][i].update(rec["fields"])
+
+
+def _replay(path: str, data: dict) -> dict:
+    """Apply journal records on top of a snapshot; stop at a torn tail."""
+    journal = path + JOURNAL_SUFFIX
+    if not os.path.exists(journal):
+        return data
+    index = {}
+    with open(journal, "r") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break
+            for r in rec if isinstance(rec, list) else [rec]:
+                _apply_record(data, r, index)
+    return data
+
+
+def _read(path: str) -> dict:
+    with open(path, "r") as f:
+        data = json.load(f)
+    return _replay(path, data)
+
+
+def _compact(path: str):
+    """Fold the journal into a fresh snapshot and truncate it (lock held)."""
+    data = _read(path)
+    _write_snapshot(path, data)
+    with open(path + JOURNAL_SUFFIX, "w") as f:
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _append_journal(path: str, records: list):
+    """
+    Durably append records as a single journal line (lock held).
+    A torn line left by a crash is trimmed before appending.
+    """
+    journal = path + JOURNAL_SUFFIX
+    line = json.dumps(records if len(records) > 1 else records[0]) + "\n"
+    with open(journal, "a+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            f.seek(size - 1)
+            if f.read(1) != b"\n":
+                f.seek(0)
+                keep = f.read().rfind(b"\n") + 1
+                f.truncate(keep)
+                f.seek(keep)
+        f.write(line.encode("utf-8"))
+        f.flush()
+        os.fsync(f.fileno())
+        size = f.tell()
+    if size > COMPACT_BYTES:
+        _compact(path)
+
+
+def update_device(section: str, name: str, fields: dict):
+    """
+    Persist a change to one device (e.g. {"status": "ON"}) in O(1):
+    a single fsync'd journal append instead of rewriting the whole file.
+    """
+    update_devices([{"section": section, "name": name, "fields": fields}])
+
+
+def update_settings(section: str, key: str, fields: dict):
+    """
+    Persist fields of a non-device top-level key (e.g. "sequencer" in the
+    chillers config) through the same journal as device updates.
+    """
+    update_devices([{"section": section, "settings": key, "fields": fields}])
+
+
+def update_devices(records: list):
+    """
+    Persist several per-device updates. Records for the same config file
+    are written as one journal line, so they land all-or-nothing per file;
+    a batch spanning both files is two independent appends.
+    """
+    by_path = {}
+    for rec in records:
+        by_path.setdefault(_config_path(rec["section"]), []).append(rec)
+    for path, recs in by_path.items():
+        with _locked(path):
+            _append_journal(path, recs)
+
+
+# -------------------------------------------------------------
+# In-process config cache
+# -------------------------------------------------------------
+ConfigSnapshot = namedtuple("ConfigSnapshot", ["version", "data"])
+
+_cache_lock = threading.Lock()
+_cache = {}  # path -> (file_key, ConfigSnapshot)
+_cache_stats = {"hits": 0, "misses": 0}
+_cache_version = 0
+
+
+def _stat_key(path: str):
+    """Identity of snapshot + journal: (inode, mtime_ns, size) of each."""
+    key = []
+    for p in (path, path + JOURNAL_SUFFIX):
+        try:
+            st = os.stat(p)
+            key.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            key.append(None)
+    return tuple(key)
+
+
+def _freeze(obj):
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+def get_snapshot(section: str) -> ConfigSnapshot:
+    """
+    Return a versioned, read-only snapshot of a config file. The file is
+    only re-parsed when its inode/mtime/size (or its journal's) changed.
+    """
+    global _cache_version
+    path = _config_path(section)
+    key = _stat_key(path)
+    with _cache_lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == key:
+            _cache_stats["hits"] += 1
+            return entry[1]
+
+    with _locked(path):
+        key = _stat_key(path)
+        data = _read(path)
+    with _cache_lock:
+        _cache_stats["misses"] += 1
+        _cache_version += 1
+        snap = ConfigSnapshot(_cache_version, _freeze(data))
+        _cache[path] = (key, snap)
+    return snap
+
+
+def _thaw(obj):
+    if isinstance(obj, MappingProxyType):
+        return {k: _thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple):
+        return [_thaw(v) for v in obj]
+    return obj
+
+
+def thaw(snapshot: ConfigSnapshot) -> dict:
+    """
+    Editable copy of a snapshot's top level: each section is a fresh list
+    holding the shared, frozen device records. Writers swap in a copy of
+    the one record they change (edit_record), so a read costs one list per
+    section instead of a deep copy. Records and non-list keys such as
+    "topology" stay read-only MappingProxyType; save_chillers/save_power
+    accept them as they are.
+    """
+    return {k: list(v) if isinstance(v, tuple) else v for k, v in snapshot.data.items()}
+
+
+def edit_record(data: dict, section: str, idx: int) -> dict:
+    """Replace data[section][idx] with a mutable copy (once) and return it."""
+    rec = data[section][idx]
+    if isinstance(rec, MappingProxyType):
+        rec = data[section][idx] = _thaw(rec)
+    return rec
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters for the config cache."""
+    with _cache_lock:
+        return dict(_cache_stats)
+
 
 def save_chillers(data: dict):
-    with open(CONFIG_CHILLERS, "w") as f:
-        json.dump(data, f, indent=2)
+    """Write a full chillers snapshot (atomic) and reset its journal."""
+    with _locked(CONFIG_CHILLERS):
+        _write_snapshot(CONFIG_CHILLERS, data)
+        if os.path.exists(CONFIG_CHILLERS + JOURNAL_SUFFIX):
+            os.truncate(CONFIG_CHILLERS + JOURNAL_SUFFIX, 0)
 
 
 def save_power(data: dict):
-    with open(CONFIG_POWER, "w") as f:
-        json.dump(data, f, indent=2)
+    """Write a full power snapshot (atomic) and reset its journal."""
+    with _locked(CONFIG_POWER):
+        _write_snapshot(CONFIG_POWER, data)
+        if os.path.exists(CONFIG_POWER + JOURNAL_SUFFIX):
+            os.truncate(CONFIG_POWER + JOURNAL_SUFFIX, 0)
 
 
 def load_chillers() -> dict:
@@ -31,8 +295,7 @@ def load_chillers() -> dict:
         save_chillers(data)
         return data
 
-    with open(CONFIG_CHILLERS, "r") as f:
-        return json.load(f)
+    return thaw(get_snapshot("chillers"))
 
 
 def load_power() -> dict:
@@ -51,5 +314,4 @@ def load_power() -> dict:
         save_power(data)
         return data
 
-    with open(CONFIG_POWER, "r") as f:
-        return json.load(f)
+    return thaw(get_snapshot("power"))
@@ -1,47 +1,33 @@
-import io
-import speech_recognition as sr
-from gtts import gTTS
+from stt import get_stt_backend
+from tts import get_speaker
 
 
-def transcribe_voice(raw_bytes: bytes) -> str:
+def transcribe_voice(raw) -> str:
     """
-    Use SpeechRecognition + free Google Web Speech API to transcribe audio.
-    No API key required, but requires internet and fair-use limits.
-
-    Expecting raw WAV bytes from Streamlit file uploader.
+    Transcribe a WAV upload (bytes, or UploadedFile.getbuffer() to avoid a
+    copy) with the process-wide STT backend (offline Vosk when installed,
+    else the free Google Web Speech API). See stt.py.
     """
-    if not raw_bytes:
+    if not raw:
         return ""
 
-    recognizer = sr.Recognizer()
-
-    # Wrap raw bytes as a file-like object for AudioFile
-    audio_file = sr.AudioFile(io.BytesIO(raw_bytes))
-
-    with audio_file as source:
-        audio = recognizer.record(source)
-
     try:
-        text = recognizer.recognize_google(audio)
-        return text.strip()
-    except sr.UnknownValueError:
-        # Speech unintelligible
-        return ""
-    except sr.RequestError as e:
-        # API unreachable or rate-limited
-        return f"[STT request error: {e}]"
+        return get_stt_backend().transcribe(raw)
+    except ValueError as e:
+        # not a 16-bit PCM WAV file, or over the size / duration limit
+        return f"[STT audio error: {e}]"
 
 
 def tts_voice(text: str) -> bytes:
     """
-    Use gTTS (Google Translate Text-to-Speech) to synthesize speech.
-    No API key is needed. Returns MP3 audio bytes.
+    Speak a reply through the cached TTS speaker (offline espeak when
+    installed, else gTTS). Audio format is given by tts_mime().
     """
     if not text:
         text = "I do not have anything to say."
 
-    tts = gTTS(text=text, lang="en")
-    buf = io.BytesIO()
-    tts.write_to_fp(buf)
-    buf.seek(0)
-    return buf.read()
+    return get_speaker().say(text)
+
+
+def tts_mime() -> str:
+    return get_speaker().mime
@@ -0,0 +1,202 @@
+"""
+Batch voice command processing.
+
+Accepts many recordings, or one long recording that is split into
+utterances on silence. Utterances are transcribed in parallel on a
+process pool. Each worker loads the STT model once, at pool start. The
+resulting intents are staged into one control.Batch and committed
+together, and a single summary reply is returned.
+
+An utterance that is not understood, or whose intents are rejected
+(e.g. an out-of-range index), is reported in the summary without
+aborting the rest of the batch. Its intents are rolled back from the
+Batch before the next utterance is staged.
+
+With one worker per core, a shift handover script takes roughly as long
+as its slowest utterance rather than the sum of all of them. Workers are
+started with "spawn", not fork: the app process runs the scheduler,
+poller and Streamlit threads, and a forked child would inherit their
+locks in whatever state they happened to be in.
+
+Each recording is capped by stt.MAX_AUDIO_BYTES, and a whole batch by
+MAX_BATCH_BYTES, so many files just under the single-file cap are
+rejected before any of them is decoded.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import stt
+from control import Batch, ControlError
+from voice_commands import parse_command
+from voice_control import describe, names_phrase, stage_intents
+
+FRAME_MS = 30
+SILENCE_DB = -40.0  # frame RMS relative to the loudest frame
+MIN_SILENCE_MS = 400
+MIN_UTTERANCE_MS = 250
+PAD_MS = 120
+SPLIT_ABOVE_S = 8.0  # single recordings longer than this are split
+MAX_BATCH_S = 600.0  # per recording; a handover script runs a few minutes
+MAX_BATCH_BYTES = int(float(os.environ.get("BMS_MAX_BATCH_MB", "100")) * 1e6)
+
+Utterance = namedtuple("Utterance", ["source", "start_s", "pcm", "rate"])
+
+
+def split_on_silence(samples: np.ndarray, rate: int) -> list:
+    """
+    (start, end) sample ranges of speech in a mono int16 signal.
+    Frame RMS is computed in one vectorized pass; gaps shorter than
+    MIN_SILENCE_MS stay inside an utterance.
+    """
+    frame = max(int(rate * FRAME_MS / 1000), 1)
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return []
+    frames = samples[: n_frames * frame].reshape(n_frames, frame).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1)) + 1e-9
+    db = 20.0 * np.log10(rms / rms.max())
+    voiced = db > SILENCE_DB
+
+    # rising / falling edges of the voiced mask
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+    runs = edges.reshape(-1, 2)  # [start_frame, end_frame)
+
+    min_gap = MIN_SILENCE_MS // FRAME_MS
+    merged = []
+    for start, end in runs:
+        if merged and start - merged[-1][1] < min_gap:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    pad = int(rate * PAD_MS / 1000)
+    min_len = MIN_UTTERANCE_MS // FRAME_MS
+    return [
+        (max(int(start) * frame - pad, 0), min(int(end) * frame + pad, len(samples)))
+        for start, end in merged
+        if end - start >= min_len
+    ]
+
+
+def utterances(recordings: list) -> list:
+    """
+    Utterances from [(name, wav buffer)]. A single long recording is split
+    on silence; several recordings are taken one utterance each. Raises
+    stt.AudioTooLarge if the batch is over MAX_BATCH_BYTES in total.
+    """
+    total = sum(memoryview(raw).nbytes for _, raw in recordings)
+    if total > MAX_BATCH_BYTES:
+        raise stt.AudioTooLarge(
+            "batch is {:.1f} MB, limit {:.1f} MB".format(total / 1e6, MAX_BATCH_BYTES / 1e6)
+        )
+    out = []
+    for name, raw in recordings:
+        samples, rate = stt.read_wav(raw, MAX_BATCH_S)
+        if len(recordings) == 1 and len(samples) > SPLIT_ABOVE_S * rate:
+            for start, end in split_on_silence(samples, rate):
+                out.append(Utterance(name, start / rate, samples[start:end], rate))
+        else:
+            out.append(Utterance(name, 0.0, samples, rate))
+    return out
+
+
+# -------------------------------------------------------------
+# process pool
+# -------------------------------------------------------------
+def _transcribe(job: tuple) -> str:
+    pcm, rate = job
+    try:
+        return stt.get_stt_backend().transcribe_pcm([pcm], rate)
+    except Exception as e:
+        return "[STT error: {}]".format(e)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers: int = None) -> ProcessPoolExecutor:
+    """Shared worker pool; each worker preloads the STT model once."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count() or 2,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=stt.preload,
+            )
+        return _pool
+
+
+def transcribe_all(items: list, pool=None) -> list:
+    pool = pool or get_pool()
+    return list(pool.map(_transcribe, [(u.pcm, u.rate) for u in items]))
+
+
+# -------------------------------------------------------------
+# batch
+# -------------------------------------------------------------
+def _label(result: dict) -> str:
+    if result["start_s"]:
+        return "{} at {:.1f} s".format(result["source"], result["start_s"])
+    return result["source"]
+
+
+def process_recordings(
+    recordings: list, chillers_data: dict = None, power_data: dict = None, pool=None
+) -> dict:
+    """
+    Transcribe, parse and apply a batch of recordings as one transaction.
+    Returns {"summary", "results"}; results has one entry per utterance
+    with source, start_s, text and status ("applied" / "rejected: ..." /
+    "not understood").
+    """
+    items = utterances(recordings)
+    texts = transcribe_all(items, pool) if items else []
+
+    batch = Batch(chillers_data, power_data)
+    results = []
+    staged = []
+    for item, text in zip(items, texts):
+        result = {"source": item.source, "start_s": round(float(item.start_s), 2), "text": text}
+        intents = parse_command(text) if text and not text.startswith("[") else ()
+        if not intents:
+            result["status"] = "not understood"
+        else:
+            try:
+                staged.extend(stage_intents(batch, intents))
+                result["status"] = "applied"
+            except ControlError as e:
+                result["status"] = "rejected: {}".format(e)
+        results.append(result)
+
+    changed = batch.commit()
+    applied = sum(r["status"] == "applied" for r in results)
+    parts = [
+        "Processed {} command{}: {} applied, {} device change{}.".format(
+            len(results),
+            "" if len(results) == 1 else "s",
+            applied,
+            len(changed),
+            "" if len(changed) == 1 else "s",
+        )
+    ]
+    if staged:
+        parts.append(describe(batch, staged))
+    rejected = [r for r in results if r["status"].startswith("rejected")]
+    if rejected:
+        parts.append("{} rejected.".format(len(rejected)))
+    unknown = [r for r in results if r["status"] == "not understood"]
+    if unknown:
+        parts.append(
+            "{} not understood ({}).".format(
+                len(unknown), names_phrase([_label(r) for r in unknown])
+            )
+        )
+    return {"summary": " ".join(parts), "results": results}
@@ -0,0 +1,395 @@
+"""
+Voice command grammar.
+
+A transcript is lowercased, split into word / number tokens by one
+precompiled regex, filler words are dropped by a dict lookup, and the
+remaining tokens are read left to right once. The result is a list of
+structured intents:
+
+    Intent(device_class, indices, action, value)
+
+    device_class  "chillers" | "transformers" | "ups" | "genset" | "pahu"
+    indices       tuple of 1-based indices, or None for "all"
+    action        "ON" | "OFF" | "TOGGLE" | "SET"
+    value         setpoint for SET, else None
+
+Supported forms include:
+
+    turn on chiller 5              start genset 3 / g3
+    turn off chillers 3 to 7       switch off ups 1 and ups 2
+    chillers 1, 2 and 9 off        set chiller 3 setpoint to 20
+    turn on all pahus              set chillers 1 to 4 setpoint to 19.5
+    turn on chiller 3 and turn off transformer 2
+    set chiller 3 to 20 degrees    put chiller 2 at 19
+    start chiller 3 at 20          (ON plus a SET intent)
+
+An action word binds to the device groups named before it that have no
+action yet. If there are none, it carries forward to the groups that
+follow. A device named with no action at all is toggled, as before.
+
+"to <n>" after an index is a setpoint when the group is being set, when
+a unit follows ("to 20 degrees"), or otherwise a range end. A command
+that could read either way ("chiller 3 to 20", with 20 a valid
+setpoint) or a set with no value is rejected: parse_command returns no
+intents rather than guessing a toggle. A bare number after a device
+("chiller 3 20 degrees") is a setpoint if it is inside SETPOINT_RANGE,
+and rejects the command otherwise.
+"""
+
+import re
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from control import SETPOINT_RANGE
+
+Intent = namedtuple("Intent", ["device_class", "indices", "action", "value"])
+
+
+DEVICE_WORDS = {
+    "chiller": "chillers",
+    "chillers": "chillers",
+    "transformer": "transformers",
+    "transformers": "transformers",
+    "tr": "transformers",
+    "ups": "ups",
+    "upss": "ups",
+    "genset": "genset",
+    "gensets": "genset",
+    "generator": "genset",
+    "generators": "genset",
+    "g": "genset",
+    "pahu": "pahu",
+    "pahus": "pahu",
+}
+# abbreviations that only name a device when a number follows ("tr 2", "g3")
+_NEEDS_NUMBER = {"tr", "g"}
+
+ACTION_WORDS = {
+    "on": "ON",
+    "start": "ON",
+    "enable": "ON",
+    "off": "OFF",
+    "stop": "OFF",
+    "disable": "OFF",
+    "shutdown": "OFF",
+    "toggle": "TOGGLE",
+    "set": "SET",
+    "put": "SET",
+    "setpoint": "SET",
+    "temperature": "SET",
+    "temp": "SET",
+}
+
+RANGE_WORDS = {"to", "through", "thru", "-", ".."}
+LIST_WORDS = {"and", ","}
+VALUE_WORDS = {"to", "at", "of"}
+UNIT_WORDS = {"degree", "degrees", "deg", "c", "celsius"}
+
+_TOKEN = re.compile(r"\d+(?:\.\d+)?|[a-z]+|\.\.|-|,")
+
+# word -> (kind, payload); anything else that is not a number is filler
+_KIND = {"all": ("all", None)}
+_KIND.update({w: ("range", None) for w in RANGE_WORDS})
+_KIND.update({w: ("list", None) for w in LIST_WORDS})
+_KIND.update({w: ("value", None) for w in VALUE_WORDS - RANGE_WORDS})
+_KIND.update({w: ("unit", None) for w in UNIT_WORDS})
+_KIND.update({w: ("action", a) for w, a in ACTION_WORDS.items()})
+_KIND.update({w: ("device", c) for w, c in DEVICE_WORDS.items()})
+
+
+class _Group:
+    __slots__ = (
+        "device_class", "indices", "all", "action", "value", "range_from", "accepting",
+        "ambiguous",
+    )
+
+    def __init__(self, device_class: str, all_: bool):
+        self.device_class = device_class
+        self.indices = []
+        self.all = all_
+        self.action = None
+        self.value = None
+        self.range_from = None
+        self.accepting = not all_
+        self.ambiguous = False  # "chiller 3 to 20": a range or a setpoint
+
+
+def _is_number(tokens: list, i: int) -> bool:
+    return i < len(tokens) and tokens[i][0] == "number"
+
+
+def _value_follows(tokens: list, i: int) -> bool:
+    """True if a setpoint ("to 20", "setpoint 20") comes before the next device."""
+    for j in range(i, len(tokens) - 1):
+        kind, payload, tok = tokens[j]
+        if kind == "device":
+            return False
+        if (payload == "SET" or tok in VALUE_WORDS) and _is_number(tokens, j + 1):
+            return True
+    return False
+
+
+def _parse(text: str) -> list:
+    tokens = []
+    for tok in _TOKEN.findall(text.lower()):
+        kind = _KIND.get(tok)
+        if kind is not None:
+            tokens.append((kind[0], kind[1], tok))
+        elif tok[0].isdigit():
+            tokens.append(("number", None, tok))
+    n = len(tokens)
+
+    groups = []
+    group = None  # group still collecting indices
+    named = []  # groups named since the last action word
+    carry = None  # action carried forward to groups named after it
+    awaiting_value = []  # groups still waiting for their setpoint
+    all_next = False
+
+    for i in range(n):
+        kind, payload, tok = tokens[i]
+
+        if kind == "number":
+            if group is not None and group.accepting:
+                num = int(float(tok))
+                if group.range_from is not None:
+                    lo, hi = sorted((group.range_from, num))
+                    group.indices.extend(range(lo, hi + 1))
+                    group.range_from = None
+                else:
+                    group.indices.append(num)
+                group.accepting = False
+            elif awaiting_value:
+                for g in awaiting_value:
+                    g.value = float(tok)
+                awaiting_value = []
+            else:
+                # a bare number after the groups just named ("chiller 3 20
+                # degrees") can only be a setpoint; anything else is rejected
+                value = float(tok)
+                targets = [g for g in named if g.value is None]
+                if not targets or not SETPOINT_RANGE[0] <= value <= SETPOINT_RANGE[1]:
+                    return []
+                for g in targets:
+                    g.value = value
+
+        elif kind == "device":
+            if tok in _NEEDS_NUMBER and not _is_number(tokens, i + 1):
+                continue
+            group = _Group(payload, all_next)
+            group.action = carry
+            if carry == "SET":
+                awaiting_value.append(group)
+            groups.append(group)
+            named.append(group)
+            all_next = False
+
+        elif kind == "action":
+            group = None
+            pending = [g for g in groups if g.action is None]
+            if payload != "SET":
+                # "put chiller 2 on": a bare set / put verb yields to on / off
+                pending += [g for g in named if g.action == "SET" and g.value is None]
+                awaiting_value = [g for g in awaiting_value if g not in pending]
+            if pending:
+                for g in pending:
+                    g.action = payload
+                carry = None
+                if payload == "SET":
+                    awaiting_value = pending
+            elif payload == "SET" and named:
+                # "turn on chiller 3 setpoint 20": a setpoint for the groups
+                # just named, on top of their action
+                awaiting_value = [g for g in named if g.value is None]
+                continue
+            else:
+                carry = payload
+            named = []
+
+        elif kind == "value":
+            # "at 20": the setpoint of the groups just named
+            if _is_number(tokens, i + 1) and named:
+                group = None
+                awaiting_value = [g for g in named if g.value is None]
+
+        elif kind == "range":
+            if group is None or group.accepting:
+                continue
+            if not (group.indices and _is_number(tokens, i + 1)):
+                group = None
+                continue
+            num = float(tokens[i + 1][2])
+            in_range = SETPOINT_RANGE[0] <= num <= SETPOINT_RANGE[1]
+            if i + 2 < n and tokens[i + 2][0] == "unit":
+                as_value = True  # "to 20 degrees"
+            elif _value_follows(tokens, i + 2):
+                as_value = False  # "setpoint of chillers 3 to 7 to 20"
+            elif group in awaiting_value:
+                as_value = True  # "set chiller 3 to 20"
+            else:
+                # "turn off chillers 3 to 20" is a range; with no action yet,
+                # "chiller 3 to 20" could be either
+                as_value = False
+                group.ambiguous = group.action is None and in_range
+            if as_value:
+                if group not in awaiting_value:
+                    awaiting_value.append(group)
+                group = None
+            else:
+                group.range_from = group.indices.pop()
+                group.accepting = True
+
+        elif kind == "list":
+            # "chillers 1, 2 and 5": keep collecting if a number follows
+            if group is not None and not group.accepting:
+                group.accepting = _is_number(tokens, i + 1)
+
+        elif kind == "all":
+            all_next = True
+
+    intents = []
+    for g in groups:
+        if not g.indices and not g.all:
+            continue
+        if g.ambiguous and g.action in (None, "SET"):
+            return []
+        if g.action == "SET" and g.value is None:
+            return []
+        indices = None if g.all else tuple(dict.fromkeys(g.indices))
+        if g.action is None:
+            # a device named with no action is toggled, or set if a value came
+            action = "TOGGLE" if g.value is None else "SET"
+        else:
+            action = g.action
+        if action == "SET":
+            intents.append(Intent(g.device_class, indices, "SET", g.value))
+            continue
+        intents.append(Intent(g.device_class, indices, action, None))
+        if g.value is not None:
+            intents.append(Intent(g.device_class, indices, "SET", g.value))
+    return intents
+
+
+@lru_cache(maxsize=4096)
+def parse_command(text: str) -> tuple:
+    """
+    Structured intents for one transcript (empty if nothing matched or
+    the command is ambiguous). Operators repeat the same few phrases, so
+    results are cached; an uncached parse is slower than the old regex
+    chain, and the speedup on live traffic comes from the cache.
+    """
+    return tuple(_parse(text))
+
+
+# -------------------------------------------------------------
+# Benchmark: python voice_commands.py
+# -------------------------------------------------------------
+def _legacy_match(text: str) -> list:
+    """The former voice_agent_handle_command matching, kept as a reference."""
+    t = text.lower()
+    out = []
+    if "chiller" in t:
+        m = re.search(r"chiller\s+(\d+)", t)
+        if m:
+            if "setpoint" in t or "temperature" in t:
+                m_sp = re.search(r"(\d+(\.\d+)?)", t)
+                if m_sp:
+                    out.append(("chillers", int(m.group(1)), "SET", float(m_sp.group(1))))
+            elif "on" in t or "start" in t:
+                out.append(("chillers", int(m.group(1)), "ON", None))
+            elif "off" in t or "stop" in t:
+                out.append(("chillers", int(m.group(1)), "OFF", None))
+            else:
+                out.append(("chillers", int(m.group(1)), "TOGGLE", None))
+    if "transformer" in t or re.search(r"\btr\s*\d+", t):
+        m = re.search(r"(transformer|tr)\s*([0-9]+)", t)
+        if m:
+            action = "ON" if "on" in t else "OFF" if "off" in t else "TOGGLE"
+            out.append(("transformers", int(m.group(2)), action, None))
+    if "ups" in t:
+        m = re.search(r"ups\s*([0-9]+)", t)
+        if m:
+            action = "ON" if "on" in t else "OFF" if "off" in t else "TOGGLE"
+            out.append(("ups", int(m.group(1)), action, None))
+    if "genset" in t or re.search(r"\bg\s*[0-9]+", t):
+        m = re.search(r"(genset|g)\s*([0-9]+)", t)
+        if m:
+            action = (
+                "ON" if "on" in t or "start" in t
+                else "OFF" if "off" in t or "stop" in t
+                else "TOGGLE"
+            )
+            out.append(("genset", int(m.group(2)), action, None))
+    if "pahu" in t:
+        m = re.search(r"pahu\s*([0-9]+)", t)
+        if m:
+            action = (
+                "ON" if "on" in t or "start" in t
+                else "OFF" if "off" in t or "stop" in t
+                else "TOGGLE"
+            )
+            out.append(("pahu", int(m.group(1)), action, None))
+    return out
+
+
+_TEMPLATES = [
+    "turn on chiller {a}",
+    "turn off chiller {a}",
+    "set chiller {a} setpoint to {sp}",
+    "turn off transformer {b}",
+    "start genset {b}",
+    "switch off ups {b}",
+    "turn on pahu {b}",
+    "turn on chillers {a} to {c}",
+    "please stop generator {b} now",
+    "turn on chiller {a} and turn off transformer {b}",
+]
+
+
+def _bench(n: int = 100_000):
+    import random
+
+    corpus = [
+        random.choice(_TEMPLATES).format(
+            a=random.randint(1, 15),
+            b=random.randint(1, 7),
+            c=random.randint(16, 30),
+            sp=round(random.uniform(17, 24), 1),
+        )
+        for _ in range(n)
+    ]
+
+    t0 = time.perf_counter()
+    for t in corpus:
+        _legacy_match(t)
+    legacy = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for t in corpus:
+        _parse(t)
+    grammar = time.perf_counter() - t0
+
+    parse_command.cache_clear()
+    t0 = time.perf_counter()
+    for t in corpus:
+        parse_command(t)
+    cached = time.perf_counter() - t0
+
+    print(f"{n} transcripts ({len(set(corpus))} distinct)")
+    print(f"  legacy regex chain  : {n / legacy:12,.0f} commands/s")
+    print(f"  grammar, uncached   : {n / grammar:12,.0f} commands/s")
+    print(f"  grammar, cached     : {n / cached:12,.0f} commands/s")
+    print(f"  uncached vs legacy  : {legacy / grammar:12.2f}x")
+    print("  legacy vs grammar on known misparses:")
+    for t in (
+        "set chiller 3 setpoint to 20",
+        "switch on ups 2",
+        "turn on chillers 3 to 7",
+        "start chiller 3 at 20 degrees",
+    ):
+        print(f"    {t!r}: {_legacy_match(t)} -> {parse_command(t)}")
+
+
+if __name__ == "__main__":
+    _bench()
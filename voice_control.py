@@ -0,0 +1,75 @@
+"""
+Apply parsed voice intents (voice_commands.Intent) through control.Batch
+and phrase the agent's reply.
+"""
+
+from control import Batch, ControlError
+from voice_commands import parse_command
+
+NOT_UNDERSTOOD = "I understood the text but could not map it to any control action."
+
+_INTENT_DONE = {"ON": "turned ON", "OFF": "turned OFF"}
+_GENSET_DONE = {"ON": "started", "OFF": "stopped"}
+
+
+def names_phrase(names: list) -> str:
+    if len(names) <= 3:
+        return ", ".join(names)
+    return "{} units ({} .. {})".format(len(names), names[0], names[-1])
+
+
+def stage_intents(batch: Batch, intents) -> list:
+    """
+    Stage every intent in batch; returns [(intent, indices)].
+    Raises ControlError, leaving nothing from these intents staged.
+    """
+    savepoint = batch.savepoint()
+    staged = []
+    try:
+        for intent in intents:
+            selector = "all" if intent.indices is None else list(intent.indices)
+            if intent.action == "SET":
+                idxs = batch.set_setpoint(selector, intent.value, intent.device_class)
+            elif intent.action == "TOGGLE":
+                idxs = batch.toggle(intent.device_class, selector)
+            else:
+                idxs = batch.set_status(intent.device_class, selector, intent.action)
+            staged.append((intent, idxs))
+    except ControlError:
+        batch.rollback(savepoint)
+        raise
+    return staged
+
+
+def describe(batch: Batch, staged: list) -> str:
+    """Reply text for committed (intent, indices) pairs."""
+    reply = []
+    for intent, idxs in staged:
+        devices = batch.devices(intent.device_class)
+        names = names_phrase([devices[i]["name"] for i in idxs])
+        if intent.action == "SET":
+            reply.append("Setpoint for {} updated to {:.1f} C.".format(names, intent.value))
+        elif intent.action == "TOGGLE":
+            states = sorted({devices[i]["status"] for i in idxs})
+            reply.append("Toggled {} to {}.".format(names, "/".join(states)))
+        else:
+            done = _GENSET_DONE if intent.device_class == "genset" else _INTENT_DONE
+            reply.append("{} {}.".format(names, done[intent.action]))
+    return " ".join(reply)
+
+
+def handle_command(text: str, chillers_data: dict, power_data: dict) -> str:
+    """
+    Parse one transcript, apply all of its intents in one Batch and return
+    the reply. A rejected intent (e.g. index out of range) rejects them all.
+    """
+    intents = parse_command(text)
+    if not intents:
+        return NOT_UNDERSTOOD
+    batch = Batch(chillers_data, power_data)
+    try:
+        staged = stage_intents(batch, intents)
+    except ControlError as e:
+        return "Command rejected: {}.".format(e)
+    batch.commit()
+    return describe(batch, staged)